@@ -0,0 +1,57 @@
+"""
+Reading chunked request bodies of 1 MB to 100 MB.
+
+"concat" replays the previous accumulator (bytes += chunk), "request" uses Request.bytes().
+The time per MB should stay flat for the request object as the body grows.
+
+    python -m benchmarks.bench_body
+"""
+import asyncio
+import time
+
+from ermine.request import Request
+
+CHUNK = b"x" * 64 * 1024
+
+
+def make_receive(size: int):
+    count = size // len(CHUNK)
+    state = {"sent": 0}
+
+    async def receive():
+        state["sent"] += 1
+        return {"type": "http.request", "body": CHUNK, "more_body": state["sent"] < count}
+
+    return receive
+
+
+async def concat(size: int) -> int:
+    receive = make_receive(size)
+    body = b""
+    while True:
+        message = await receive()
+        body += message["body"]
+        if not message["more_body"]:
+            return len(body)
+
+
+async def request(size: int) -> int:
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": [], "query_string": b""}
+    return len(await Request(scope, make_receive(size), None).bytes())
+
+
+def main() -> None:
+    for megabytes in (1, 10, 100):
+        size = megabytes * 1024 * 1024
+        # the quadratic accumulator takes minutes at 100 MB
+        for name, fn in (("concat", concat), ("request", request)):
+            if name == "concat" and megabytes > 10:
+                continue
+            start = time.perf_counter()
+            asyncio.run(fn(size))
+            elapsed = time.perf_counter() - start
+            print(f"{megabytes:>4} MB {name:>8}: {elapsed * 1e3:9.1f} ms  ({elapsed / megabytes * 1e3:.2f} ms/MB)")
+
+
+if __name__ == "__main__":
+    main()
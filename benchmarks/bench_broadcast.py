@@ -0,0 +1,76 @@
+"""
+Fan-out of one dict to 1,000 websockets.
+
+"per handler" is every websocket handler waiting on its own queue and encoding the dict with
+json.dumps before sending it, "broadcast" encodes it once and queues the same message for
+every subscriber of the channel.
+
+    python -m benchmarks.bench_broadcast
+"""
+import asyncio
+import contextlib
+import json
+import time
+
+from ermine.broadcast import Broadcast
+from ermine.request import WebSocket
+
+MESSAGE: dict = {"cpu": [0.41, 0.39, 0.52, 0.47], "memory": {"used": 3_221_225_472, "total": 8_589_934_592},
+                 "hosts": [{"name": f"web-{i}", "healthy": True} for i in range(10)]}
+
+
+async def noop_send(message: dict) -> None:
+    pass
+
+
+async def noop_receive() -> dict:
+    return {"type": "websocket.disconnect"}
+
+
+def sockets(count: int) -> list[WebSocket]:
+    return [WebSocket({"type": "websocket", "path": "/live", "headers": []}, noop_receive, noop_send)
+            for _ in range(count)]
+
+
+async def per_handler(clients: list[WebSocket], number: int) -> float:
+    async def handler(ws: WebSocket, queue: asyncio.Queue) -> None:
+        while (message := await queue.get()) is not None:
+            await ws.send_txt(json.dumps(message))
+
+    queues = [asyncio.Queue() for _ in clients]
+    tasks = [asyncio.ensure_future(handler(ws, queue)) for ws, queue in zip(clients, queues)]
+    start = time.perf_counter()
+    for _ in range(number):
+        for queue in queues:
+            queue.put_nowait(MESSAGE)
+        await asyncio.sleep(0)
+    for queue in queues:
+        queue.put_nowait(None)
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start
+
+
+async def broadcast(clients: list[WebSocket], number: int) -> float:
+    hub = Broadcast(max_queue=number + 1)
+    async with contextlib.AsyncExitStack() as stack:
+        for ws in clients:
+            await stack.enter_async_context(hub.subscribe(ws, "live"))
+        start = time.perf_counter()
+        for _ in range(number):
+            await hub.publish("live", MESSAGE)
+            # lets every subscriber's task send what was queued
+            await asyncio.sleep(0)
+        while any(subscriber.queue for subscriber in hub.channels["live"]):
+            await asyncio.sleep(0)
+        return time.perf_counter() - start
+
+
+def main(count: int = 1_000, number: int = 100) -> None:
+    clients = sockets(count)
+    for name, bench in (("per handler", per_handler), ("broadcast", broadcast)):
+        seconds = asyncio.run(bench(clients, number))
+        print(f"{name:>11}: {seconds / number * 1e3:.2f} ms per message to {count} sockets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+A JSON endpoint serving a 200 item list, rendered on every request versus served from a CachePolicy.
+
+    python -m benchmarks.bench_caching
+"""
+import asyncio
+import time
+
+from ermine import Ermine
+from ermine.caching import CachePolicy
+
+ITEMS: list[dict] = [{"id": i, "name": f"item {i}", "price": i * 1.5, "tags": ["a", "b"]} for i in range(200)]
+
+
+def make_app(cache: CachePolicy | None) -> Ermine:
+    app = Ermine()
+
+    @app.get("/items", cache=cache)
+    async def items():
+        return ITEMS
+
+    app.freeze()
+    return app
+
+
+async def run(app: Ermine, number: int, headers: list) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(number):
+        scope = {"type": "http", "method": "GET", "path": "/items", "headers": headers, "query_string": b""}
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main(number: int = 20_000) -> None:
+    uncached = asyncio.run(run(make_app(None), number, [])) / number
+    print(f"{'uncached':>14}: {uncached * 1e6:.2f} us/request")
+    policy = CachePolicy(ttl=60)
+    cached = asyncio.run(run(make_app(policy), number, [])) / number
+    print(f"{'cached':>14}: {cached * 1e6:.2f} us/request ({uncached / cached:.1f}x)")
+    etag = policy.entries[next(iter(policy.entries))].etag.encode("latin-1")
+    not_modified = asyncio.run(run(make_app(policy), number, [(b"if-none-match", etag)])) / number
+    print(f"{'304':>14}: {not_modified * 1e6:.2f} us/request ({uncached / not_modified:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Per-request overhead of argument resolution in the responder.
+
+"inspect" replays what the responder did before call plans existed (signature inspection,
+coroutine detection and issubclass checks on every request), "plan" runs the precompiled plan.
+
+    python -m benchmarks.bench_call_plan
+"""
+import inspect
+import timeit
+
+from ermine.plugs.responder import CallPlan, Responder
+from ermine.request import BaseRequest, Request
+
+
+class _Param:
+    def __init__(self, value: str) -> None:
+        self.value = value
+
+
+async def handler(req: Request, user_id: int, page: int = 1, q: str = "", verbose: bool = False):
+    return "ok"
+
+
+def per_request_inspect(req: BaseRequest, params: dict) -> dict:
+    inspect.iscoroutinefunction(handler)
+    temp: dict = {}
+    for name, parameter in inspect.signature(handler).parameters.items():
+        if issubclass(parameter.annotation, BaseRequest):
+            temp[name] = req
+        elif name in req.query.keys():
+            temp[name] = req.query[name]
+    temp.update({k: v.value for k, v in params.items()})
+    return temp
+
+
+def main(number: int = 100_000) -> None:
+    scope = {"type": "http", "method": "GET", "path": "/users/42", "headers": [],
+             "query_string": b"page=3&q=ermine&verbose=true"}
+    plan = CallPlan(handler, "/users/:user_id")
+    params = {"user_id": _Param("42")}
+
+    def run_inspect():
+        per_request_inspect(Request(scope, None, None), params)
+
+    def run_plan():
+        Responder._parse_arguments(Request(scope, None, None), plan, (("user_id", "42"),))
+
+    for name, fn in (("inspect", run_inspect), ("plan", run_plan)):
+        seconds = min(timeit.repeat(fn, number=number, repeat=5))
+        print(f"{name:>8}: {seconds / number * 1e6:.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
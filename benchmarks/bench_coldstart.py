@@ -0,0 +1,71 @@
+"""
+Cold start of a fresh interpreter: importing ermine and building a small app, then serving its first
+request. Optional subsystems (forms, cookies, static files, logs, admission, templating) are only
+imported once they are used, so an app that does not use them does not pay for them.
+
+    python -m benchmarks.bench_coldstart [runs]
+"""
+import json
+import statistics
+import subprocess
+import sys
+
+# run in a fresh interpreter, also by tests/test_import_time.py
+COLD_START = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+from ermine import Ermine
+
+app = Ermine()
+
+@app.get("/")
+async def index():
+    return {"ok": True}
+
+imported = time.perf_counter()
+messages = []
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message):
+    messages.append(message)
+
+scope = {"type": "http", "method": "GET", "path": "/", "raw_path": b"/", "query_string": b"",
+         "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 8000)}
+asyncio.run(app(scope, receive, send))
+served = time.perf_counter()
+print(json.dumps({"status": messages[0]["status"], "first_request_ms": (served - imported) * 1e3,
+                  "modules": sorted(sys.modules)}))
+"""
+
+
+def import_time_ms(stderr: str) -> float:
+    """the summed self time of every module `python -X importtime` reports"""
+    total: int = 0
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            total += int(line.split(":", 1)[1].split("|")[0])
+    return total / 1e3
+
+
+def main(runs: int = 20) -> None:
+    imports: list[float] = []
+    first: list[float] = []
+    modules: int = 0
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", COLD_START], capture_output=True,
+                                text=True, check=True)
+        report: dict = json.loads(result.stdout)
+        imports.append(import_time_ms(result.stderr))
+        first.append(report["first_request_ms"])
+        modules = len(report["modules"])
+    print(f"runs:          {runs}")
+    print(f"modules:       {modules}")
+    print(f"import:        {statistics.median(imports):.1f} ms (median, summed -X importtime self times)")
+    print(f"first request: {statistics.median(first):.2f} ms (median, includes freezing the app)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
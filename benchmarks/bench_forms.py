@@ -0,0 +1,76 @@
+"""
+Uploading a 1 GB file as multipart/form-data in 64 KiB chunks.
+
+"form" is Request.form() spooling the file to a temporary file, "parts" streams the upload with
+Request.parts() without keeping it. Peak memory is traced with tracemalloc and should stay in the
+range of the spool size, not of the upload.
+
+    python -m benchmarks.bench_forms [size in MB]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from ermine.request import Request
+
+BOUNDARY = b"----ermine-benchmark"
+CHUNK = bytes(range(256)) * 256
+
+
+def make_receive(size: int):
+    head = (b"--" + BOUNDARY + b'\r\nContent-Disposition: form-data; name="title"\r\n\r\nbenchmark\r\n'
+            b"--" + BOUNDARY + b'\r\nContent-Disposition: form-data; name="file"; filename="big.bin"\r\n'
+            b"Content-Type: application/octet-stream\r\n\r\n")
+    tail = b"\r\n--" + BOUNDARY + b"--\r\n"
+    count = size // len(CHUNK)
+    state = {"sent": -1}
+
+    async def receive():
+        state["sent"] += 1
+        if state["sent"] == 0:
+            return {"type": "http.request", "body": head, "more_body": True}
+        if state["sent"] <= count:
+            return {"type": "http.request", "body": CHUNK, "more_body": True}
+        return {"type": "http.request", "body": tail, "more_body": False}
+
+    return receive
+
+
+def make_request(size: int) -> Request:
+    scope = {"type": "http", "method": "POST", "path": "/", "query_string": b"",
+             "headers": [(b"content-type", b"multipart/form-data; boundary=" + BOUNDARY)]}
+    return Request(scope, make_receive(size), None)
+
+
+async def form(size: int) -> int:
+    data = await make_request(size).form()
+    upload = data["file"]
+    received = upload.size
+    await data.close()
+    return received
+
+
+async def parts(size: int) -> int:
+    received = 0
+    async for part in make_request(size).parts():
+        async for chunk in part:
+            received += len(chunk)
+    return received
+
+
+def main(megabytes: int = 1024) -> None:
+    size = megabytes * 1024 * 1024
+    for name, bench in (("form", form), ("parts", parts)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        received = asyncio.run(bench(size))
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>6}: {received / 2 ** 20:,.0f} MB in {seconds:.2f}s "
+              f"({received / 2 ** 20 / seconds:,.0f} MB/s), peak memory {peak / 2 ** 20:.2f} MB")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,70 @@
+"""
+Cost of access logging on the event loop: no access log, the queued AccessLog writing to a file
+from its thread, and a logging.FileHandler formatting and writing every request on the loop.
+
+    python -m benchmarks.bench_logs
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from ermine import Ermine
+from ermine.logs import AccessLog, FileSink
+
+
+def make_app(access_log: AccessLog | None = None, logger: logging.Logger | None = None) -> Ermine:
+    app = Ermine(access_log=access_log)
+
+    @app.get("/users/:user_id")
+    async def user(user_id: int):
+        return "ok"
+
+    if logger is not None:
+        @app.on("sent")
+        async def log(req, resp):
+            logger.info('%s "%s %s" %s', req.client[0], req.method, req.path, resp.status)
+
+    app.freeze()
+    return app
+
+
+async def run(app: Ermine, number: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(number):
+        scope = {"type": "http", "method": "GET", "path": "/users/7", "headers": [], "query_string": b"",
+                 "client": ("127.0.0.1", 50000)}
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main(number: int = 50_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = asyncio.run(run(make_app(), number)) / number
+        print(f"{'disabled':>12}: {baseline * 1e6:.2f} us/request")
+
+        log = AccessLog(sinks=[FileSink(os.path.join(tmp, "access.jsonl"))], max_queue=number)
+        seconds = asyncio.run(run(make_app(access_log=log), number)) / number
+        log.close()
+        print(f"{'AccessLog':>12}: {seconds * 1e6:.2f} us/request (+{(seconds - baseline) * 1e6:.2f} us), "
+              f"{log.written} written, {log.dropped} dropped")
+
+        logger = logging.getLogger("bench.access")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        handler = logging.FileHandler(os.path.join(tmp, "access.log"))
+        logger.addHandler(handler)
+        seconds = asyncio.run(run(make_app(logger=logger), number)) / number
+        handler.close()
+        print(f"{'FileHandler':>12}: {seconds * 1e6:.2f} us/request (+{(seconds - baseline) * 1e6:.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
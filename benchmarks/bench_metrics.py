@@ -0,0 +1,48 @@
+"""
+Cost of the request metrics: the same parameterised route without metrics, with counters and
+latency histograms, and with the per-phase timers on top.
+
+    python -m benchmarks.bench_metrics
+"""
+import asyncio
+import time
+
+from ermine import Ermine
+from ermine.metrics import Metrics
+
+
+def make_app(metrics: Metrics | None) -> Ermine:
+    app = Ermine(metrics=metrics)
+
+    @app.get("/users/:user_id")
+    async def user(user_id: int):
+        return "ok"
+
+    app.freeze()
+    return app
+
+
+async def run(app: Ermine, number: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(number):
+        scope = {"type": "http", "method": "GET", "path": "/users/7", "headers": [], "query_string": b""}
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main(number: int = 50_000) -> None:
+    baseline = asyncio.run(run(make_app(None), number)) / number
+    print(f"{'disabled':>10}: {baseline * 1e6:.2f} us/request")
+    for name, metrics in (("histograms", Metrics()), ("phases", Metrics(phases=True))):
+        seconds = asyncio.run(run(make_app(metrics), number)) / number
+        print(f"{name:>10}: {seconds * 1e6:.2f} us/request (+{(seconds - baseline) * 1e6:.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Per-layer overhead of the middleware stack: the same request through 0, 1, 5 and 10 layers.
+
+    python -m benchmarks.bench_middleware
+"""
+import asyncio
+import time
+
+from ermine import Ermine
+from ermine.middleware import CORSMiddleware, Middleware, RequestIDMiddleware
+
+
+def make_app(layers: int, middleware: type = Middleware, **options) -> Ermine:
+    app = Ermine()
+
+    @app.get("/")
+    async def index():
+        return "ok"
+
+    for _ in range(layers):
+        app.add_middleware(middleware, **options)
+    app.freeze()
+    return app
+
+
+async def run(app: Ermine, number: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    headers = [(b"host", b"example.com"), (b"origin", b"https://a.example")]
+    start = time.perf_counter()
+    for _ in range(number):
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""}
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main(number: int = 20_000) -> None:
+    baseline = asyncio.run(run(make_app(0), number)) / number
+    print(f"{'no middleware':>22}: {baseline * 1e6:.2f} us/request")
+    for layers in (1, 5, 10):
+        seconds = asyncio.run(run(make_app(layers), number)) / number
+        print(f"{f'{layers} pass-through':>22}: {seconds * 1e6:.2f} us/request "
+              f"({(seconds - baseline) / layers * 1e6:.2f} us/layer)")
+    for name, app in (("cors", make_app(1, CORSMiddleware)), ("request id", make_app(1, RequestIDMiddleware))):
+        seconds = asyncio.run(run(app, number)) / number
+        print(f"{name:>22}: {seconds * 1e6:.2f} us/request (+{(seconds - baseline) * 1e6:.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Header, query and cookie access on requests carrying 20 and 40 headers.
+
+"eager" replays the previous BaseRequest behaviour (full header multidict per request and
+a fresh query parse on every access), "lazy" uses the current request object.
+
+    python -m benchmarks.bench_request
+"""
+import timeit
+from urllib.parse import parse_qsl
+
+from multidict import CIMultiDict
+
+from ermine.request import Request
+
+
+def make_scope(header_count: int) -> dict:
+    headers = [(b"host", b"example.com"), (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64)"),
+               (b"accept", b"application/json"), (b"cookie", b"session=abc123; theme=dark")]
+    headers += [(f"x-custom-header-{i}".encode(), f"value-{i}".encode()) for i in range(header_count - len(headers))]
+    headers.append((b"authorization", b"Bearer token"))
+    return {"type": "http", "method": "GET", "path": "/search", "headers": headers,
+            "query_string": b"q=ermine&page=2&limit=50"}
+
+
+def eager(scope: dict) -> None:
+    headers = CIMultiDict([(k.decode("ascii"), v.decode("ascii")) for (k, v) in scope["headers"]])
+    headers.get("authorization")
+    for name in ("q", "page", "limit"):
+        query = CIMultiDict(parse_qsl(scope["query_string"].decode("utf-8")))
+        if name in query.keys():
+            CIMultiDict(parse_qsl(scope["query_string"].decode("utf-8")))[name]
+
+
+def lazy(scope: dict) -> None:
+    req = Request(scope, None, None)
+    req.header("authorization")
+    for name in ("q", "page", "limit"):
+        req.query.get(name)
+
+
+def main(number: int = 50_000) -> None:
+    for count in (20, 40):
+        scope = make_scope(count)
+        for name, fn in (("eager", eager), ("lazy", lazy)):
+            seconds = min(timeit.repeat(lambda: fn(scope), number=number, repeat=5))
+            print(f"{count} headers {name:>6}: {seconds / number * 1e6:.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
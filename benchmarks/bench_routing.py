@@ -0,0 +1,53 @@
+"""
+Route resolution over a 5,000 route table (half static, half parameterised).
+
+"radix" is a plain lookup in the roe-teer tree as done before, "router" goes through the
+static dict and the LRU in front of the tree.
+
+    python -m benchmarks.bench_routing
+"""
+import random
+import timeit
+
+from roe_teer import Roeteer
+
+from ermine.plugs.responder import CallPlan
+from ermine.routing import Router
+
+
+def handler():
+    return "ok"
+
+
+def build(count: int = 5_000) -> tuple[Roeteer, Router, list[str], list[str]]:
+    radix, router = Roeteer(), Router()
+    static_paths, param_paths = [], []
+    for i in range(count // 2):
+        static = f"/api/v1/resource{i}/list"
+        param = f"/api/v1/resource{i}/:id"
+        for path in (static, param):
+            plan = CallPlan(handler, path)
+            radix.get(path, plan)
+            router.add("get", path, plan)
+        static_paths.append(static)
+        param_paths.append(f"/api/v1/resource{i}/{i * 7}")
+    router.freeze()
+    return radix, router, static_paths, param_paths
+
+
+def main(number: int = 20_000) -> None:
+    radix, router, static_paths, param_paths = build()
+    random.seed(0)
+    # a few hundred hot paths, as seen in production traffic
+    workloads = {"static": random.sample(static_paths, 300), "param": random.sample(param_paths, 300)}
+    for name, paths in workloads.items():
+        hot = [random.choice(paths) for _ in range(number)]
+        radix_seconds = min(timeit.repeat(lambda: [radix._get_radix("get").lookup(p) for p in hot], number=1, repeat=3))
+        router_seconds = min(timeit.repeat(lambda: [router.resolve("get", p) for p in hot], number=1, repeat=3))
+        print(f"{name:>6}  radix: {radix_seconds / number * 1e6:.2f} us/lookup  "
+              f"router: {router_seconds / number * 1e6:.2f} us/lookup")
+    print(router.cache_info())
+
+
+if __name__ == "__main__":
+    main()
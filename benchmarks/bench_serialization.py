@@ -0,0 +1,29 @@
+"""
+Rendering a typical JSON payload with each available codec.
+
+    python -m benchmarks.bench_serialization
+"""
+import timeit
+
+from ermine.serialization import CODECS
+
+PAYLOAD = {
+    "items": [{"id": i, "name": f"item-{i}", "price": i * 1.5, "tags": ["a", "b"], "active": i % 2 == 0}
+              for i in range(100)],
+    "total": 100,
+}
+
+
+def main(number: int = 2_000) -> None:
+    for name, codec_class in CODECS.items():
+        try:
+            codec = codec_class()
+        except ImportError:
+            print(f"{name:>8}: not installed")
+            continue
+        seconds = min(timeit.repeat(lambda: codec.encode(PAYLOAD), number=number, repeat=5))
+        print(f"{name:>8}: {seconds / number * 1e6:.1f} us/response")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Memory of N workers: `python -m ermine serve --workers N`, which builds the app once and forks,
+against N independent uvicorn processes each importing and building the app themselves. The app
+has a few thousand routes so that its routing tables and call plans are noticeable.
+
+RSS counts the shared pages in every worker, PSS splits them between the processes sharing them,
+so the sum of PSS is what the workers really cost.
+
+    python -m benchmarks.bench_serve [workers]
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from ermine import Ermine
+
+ROUTES: int = 5000
+
+
+def make_app(routes: int = ROUTES) -> Ermine:
+    app = Ermine()
+    for i in range(routes):
+        async def handler(item_id: int, q: str = "", n: int = i):
+            return {"route": n, "item": item_id, "q": q}
+
+        app.get(f"/resource{i}/:item_id")(handler)
+    return app
+
+
+app = make_app()
+
+
+def memory(pid: int) -> tuple[int, int]:
+    """rss and pss of a process in KiB"""
+    values: dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1])
+    return values["Rss:"], values["Pss:"]
+
+
+def children(pid: int) -> list[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_and_load(ports: list[int], requests: int = 200) -> None:
+    deadline = time.monotonic() + 60
+    for port in ports:
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/resource1/1", timeout=1).read()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+    for i in range(requests):
+        port = ports[i % len(ports)]
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/resource{i * 7 % ROUTES}/{i}?q=x").read()
+
+
+def report(name: str, pids: list[int]) -> None:
+    usage = [memory(pid) for pid in pids]
+    rss = sum(u[0] for u in usage)
+    pss = sum(u[1] for u in usage)
+    print(f"{name:>10}: {len(pids)} workers, RSS {rss / 1024:.1f} MiB ({rss / len(pids) / 1024:.1f} per worker), "
+          f"PSS {pss / 1024:.1f} MiB ({pss / len(pids) / 1024:.1f} per worker)")
+
+
+def main(workers: int = 4, port: int = 8790) -> None:
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    target = "benchmarks.bench_serve:app"
+
+    master = subprocess.Popen([sys.executable, "-m", "ermine", "serve", target, "--workers", str(workers),
+                               "--port", str(port), "--log-level", "warning"], env=env)
+    try:
+        wait_and_load([port])
+        time.sleep(1)
+        report("pre-fork", children(master.pid))
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait()
+
+    naive = [subprocess.Popen([sys.executable, "-m", "uvicorn", target, "--port", str(port + 1 + i),
+                               "--log-level", "warning"], env=env) for i in range(workers)]
+    try:
+        wait_and_load([port + 1 + i for i in range(workers)])
+        time.sleep(1)
+        report("naive", [process.pid for process in naive])
+    finally:
+        for process in naive:
+            process.send_signal(signal.SIGTERM)
+        for process in naive:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
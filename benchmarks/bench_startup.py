@@ -0,0 +1,47 @@
+"""
+Startup time and memory of an app with 10,000 routes spread over groups.
+
+    python -m benchmarks.bench_startup
+"""
+import time
+import tracemalloc
+
+from ermine import Ermine
+from ermine.groups import Group
+
+
+def build(count: int = 10_000, group_size: int = 100) -> Ermine:
+    app = Ermine()
+    for g in range(count // group_size):
+        group = Group(f"/service{g}")
+        for i in range(group_size // 2):
+            def handler(item_id: int, limit: int = 10):
+                return {"id": item_id}
+
+            group.get(f"/resource{i}")(handler)
+            group.get(f"/resource{i}/:item_id")(handler)
+        app.include(group)
+    return app
+
+
+def main() -> None:
+    start = time.perf_counter()
+    app = build()
+    registered = time.perf_counter()
+    app.freeze()
+    frozen = time.perf_counter()
+
+    # tracing slows everything down, so memory is measured on a second build
+    tracemalloc.start()
+    measured = build()
+    measured.freeze()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"routes:   {len(app._router.routes)}")
+    print(f"register: {(registered - start) * 1e3:.1f} ms")
+    print(f"freeze:   {(frozen - registered) * 1e3:.1f} ms")
+    print(f"memory:   {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+End-to-end benchmark suite: every scenario drives a full Ermine app in-process through the
+TestClient (synthetic scope, receive and send, no server and no socket), so the numbers cover
+the whole request pipeline and can be compared between ermine versions.
+
+    python -m benchmarks                      # all scenarios, table on stdout
+    python -m benchmarks --json results.json  # also write machine readable results
+    python -m benchmarks -k json -k routing   # only scenarios whose name contains a filter
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import typing
+
+import ermine
+from ermine import Ermine, Request
+from ermine.request import WebSocket
+from ermine.plugs.static import Static
+from ermine.response import TextResponse
+from ermine.testclient import TestClient
+
+
+class Scenario(typing.NamedTuple):
+    name: str
+    description: str
+    # async callable sending one request (or websocket message) through the client
+    run: typing.Callable[[TestClient], typing.Awaitable]
+
+
+def build_app(static_dir: str) -> Ermine:
+    app = Ermine()
+
+    async def static_route():
+        return TextResponse("ok")
+
+    async def param_route(post_id: str):
+        return TextResponse(post_id)
+
+    for i in range(200):
+        app.get(f"/static/route{i}")(static_route)
+        app.get(f"/users/{i}/posts/:post_id")(param_route)
+
+    @app.get("/text")
+    async def text():
+        return "hello, world"
+
+    @app.get("/json")
+    async def json_response():
+        return {"id": 1, "name": "ermine", "tags": ["fast", "small"], "nested": {"ok": True, "score": 0.5}}
+
+    @app.get("/search")
+    async def search(req: Request, q: str, page: int = 1, verbose: bool = False):
+        return TextResponse(f"{q}:{page}:{verbose}:{req.header('user-agent')}:{len(req.headers)}")
+
+    @app.post("/upload")
+    async def upload(req: Request):
+        return TextResponse(str(len(await req.bytes())))
+
+    @app.websocket("/echo")
+    async def echo(ws: WebSocket):
+        await ws.accept()
+        while (message := await ws._receive())["type"] != "websocket.disconnect":
+            if message["type"] == "websocket.receive":
+                await ws.send_txt(message["text"])
+
+    app.mount(Static(static_dir), "/assets")
+    return app
+
+
+def scenarios(payload: bytes, ws) -> list[Scenario]:
+    chunks: list[bytes] = [payload[i:i + 65536] for i in range(0, len(payload), 65536)]
+    headers: dict = {"user-agent": "bench/1.0", "accept": "*/*", "accept-language": "en", "x-trace": "abc"}
+
+    async def websocket_echo(client: TestClient) -> None:
+        await ws.send_text("ping")
+        await ws.receive_text()
+
+    return [
+        Scenario("routing_static", "static route out of 400", lambda c: c.get("/static/route150")),
+        Scenario("routing_param", "parameterised route out of 400", lambda c: c.get("/users/150/posts/42")),
+        Scenario("query_headers", "query conversion and header parsing",
+                 lambda c: c.get("/search", query="q=ermine&page=3&verbose=true", headers=headers)),
+        Scenario("text_response", "str returned from an async handler", lambda c: c.get("/text")),
+        Scenario("json_response", "dict returned from an async handler", lambda c: c.get("/json")),
+        Scenario("large_body", f"{len(payload) // 1024} KiB request body in 64 KiB chunks",
+                 lambda c: c.post("/upload", body=chunks)),
+        Scenario("static_small", "4 KiB file from the static cache", lambda c: c.get("/assets/small.txt")),
+        Scenario("static_large", "1 MiB file streamed from disk", lambda c: c.get("/assets/large.bin")),
+        Scenario("websocket_echo", "one text message round trip", websocket_echo),
+    ]
+
+
+def percentile(samples: list[int], p: float) -> float:
+    index: int = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+async def measure(client: TestClient, scenario: Scenario, duration: float, warmup: int) -> dict:
+    for _ in range(warmup):
+        await scenario.run(client)
+    samples: list[int] = []
+    clock = time.perf_counter_ns
+    deadline: int = clock() + int(duration * 1e9)
+    started: int = clock()
+    while True:
+        before: int = clock()
+        await scenario.run(client)
+        after: int = clock()
+        samples.append(after - before)
+        if after >= deadline:
+            break
+    elapsed: float = (clock() - started) / 1e9
+    samples.sort()
+    return {
+        "name": scenario.name,
+        "description": scenario.description,
+        "requests": len(samples),
+        "requests_per_sec": round(len(samples) / elapsed, 1),
+        "mean_us": round(sum(samples) / len(samples) / 1000, 2),
+        "p50_us": round(percentile(samples, 50) / 1000, 2),
+        "p99_us": round(percentile(samples, 99) / 1000, 2),
+    }
+
+
+async def run(duration: float, warmup: int, filters: list[str]) -> list[dict]:
+    payload: bytes = os.urandom(1024 * 1024)
+    with tempfile.TemporaryDirectory() as static_dir:
+        with open(os.path.join(static_dir, "small.txt"), "wb") as f:
+            f.write(b"x" * 4096)
+        with open(os.path.join(static_dir, "large.bin"), "wb") as f:
+            f.write(payload)
+        client = TestClient(build_app(static_dir))
+        results: list[dict] = []
+        async with client:
+            async with client.websocket("/echo") as ws:
+                for scenario in scenarios(payload, ws):
+                    if filters and not any(f in scenario.name for f in filters):
+                        continue
+                    results.append(await measure(client, scenario, duration, warmup))
+        return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ermine in-process benchmark suite")
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=int, default=200, help="untimed requests before each scenario")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON ('-' for stdout)")
+    parser.add_argument("-k", dest="filters", action="append", default=[], help="only run matching scenarios")
+    args = parser.parse_args(argv)
+
+    results: list[dict] = asyncio.run(run(args.duration, args.warmup, args.filters))
+    report: dict = {
+        "ermine": ermine.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "duration": args.duration,
+        "results": results,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"ermine {report['ermine']} on {report['implementation']} {report['python']}")
+    print(f"{'scenario':<16} {'req/s':>12} {'p50 us':>10} {'p99 us':>10}")
+    for result in results:
+        print(f"{result['name']:<16} {result['requests_per_sec']:>12,.0f} "
+              f"{result['p50_us']:>10.1f} {result['p99_us']:>10.1f}")
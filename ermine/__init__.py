@@ -1,3 +1,41 @@
 __version__ = '0.4.4'
-from ermine.app import Ermine
-from ermine.request import Request
+
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from ermine.app import Ermine
+    from ermine.request import Request
+    from ermine.background import BackgroundTasks
+
+# names exported by the package and the module defining them, imported on first access
+_exports: dict[str, str] = {
+    "Ermine": "ermine.app",
+    "Request": "ermine.request",
+    "BackgroundTasks": "ermine.background",
+}
+
+# subsystems reachable as attributes of the package, e.g. ermine.metrics after a bare `import ermine`
+_submodules: frozenset[str] = frozenset({
+    "admission", "app", "background", "broadcast", "caching", "cancellation", "concurrency", "exceptions",
+    "forms", "groups", "injections", "logs", "metrics", "middleware", "request", "response", "routing",
+    "serialization", "serve", "static", "templating", "testclient",
+})
+
+__all__ = ["Ermine", "Request", "BackgroundTasks", "__version__"]
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name in _exports:
+        value = getattr(importlib.import_module(_exports[name]), name)
+    elif name in _submodules:
+        value = importlib.import_module(f"ermine.{name}")
+    else:
+        raise AttributeError(f"module 'ermine' has no attribute '{name}'")
+    # later lookups find it in the module's namespace and skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_exports, *_submodules})
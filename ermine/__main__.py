@@ -0,0 +1,31 @@
+import argparse
+import os
+
+from ermine import __version__
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m ermine", description="ermine command line")
+    parser.add_argument("--version", action="version", version=f"ermine {__version__}")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="serve an app with pre-forked uvicorn workers")
+    serve.add_argument("app", help="the app to serve as module:attribute, e.g. main:app")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    serve.add_argument("--reuse-port", action="store_true",
+                       help="every worker binds its own socket with SO_REUSEPORT instead of sharing one")
+    serve.add_argument("--graceful-timeout", type=float, default=30.0,
+                       help="seconds a stopping worker may take to finish its requests")
+    serve.add_argument("--log-level", default="info")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        from ermine.serve import serve as run
+        run(args.app, host=args.host, port=args.port, workers=args.workers, reuse_port=args.reuse_port,
+            graceful_timeout=args.graceful_timeout, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
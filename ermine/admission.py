@@ -0,0 +1,163 @@
+import asyncio
+import collections
+import math
+import time
+import typing
+
+from ermine.exceptions import HTTPException
+
+
+class ConcurrencyLimit:
+    """
+    At most max_inflight requests at once, up to max_queue more wait for a free slot in arrival order.
+
+        app = Ermine(limit=ConcurrencyLimit(256, max_queue=512, queue_timeout=5))
+
+        @app.post("/render", limit=ConcurrencyLimit(4, max_queue=16))
+
+    The app's limit is checked before the request is routed and held until its response was sent,
+    a route's limit is checked before the body is read and held while the handler runs.
+    When the queue is full, or a request waited longer than queue_timeout, it is answered with 503 and
+    a Retry-After header right away. Admitting a request below the limit does not await anything.
+    """
+
+    __slots__ = ("max_inflight", "max_queue", "queue_timeout", "retry_after", "inflight", "rejected", "waiters")
+
+    def __init__(self, max_inflight: int, max_queue: int = 0, queue_timeout: float | None = None,
+                 retry_after: int = 1) -> None:
+        self.max_inflight: int = max_inflight
+        self.max_queue: int = max_queue
+        self.queue_timeout: float | None = queue_timeout
+        self.retry_after: int = retry_after
+        self.inflight: int = 0
+        self.rejected: int = 0
+        self.waiters: collections.deque[asyncio.Future] = collections.deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self.waiters)
+
+    def try_acquire(self) -> bool:
+        if self.inflight < self.max_inflight:
+            self.inflight += 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        if self.inflight < self.max_inflight:
+            self.inflight += 1
+            return
+        if len(self.waiters) >= self.max_queue:
+            raise self._reject()
+        waiter: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            # release() hands its slot over, inflight stays the same
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._forget(waiter)
+            raise self._reject()
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just before the request gave up
+                self.release()
+            else:
+                self._forget(waiter)
+            raise
+
+    def release(self) -> None:
+        while self.waiters:
+            waiter: asyncio.Future = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.inflight -= 1
+
+    def _forget(self, waiter: asyncio.Future) -> None:
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _reject(self) -> HTTPException:
+        self.rejected += 1
+        return HTTPException(503, "Service Unavailable", {"retry-after": str(self.retry_after)})
+
+
+class RateLimit:
+    """
+    Token buckets refilled with `rate` tokens per second up to `burst`, one per client, each request
+    takes a token. Requests finding their bucket empty are answered with 429 and a Retry-After header.
+
+        app = Ermine(rate_limit=RateLimit(rate=10, burst=20))
+        @app.post("/login", rate_limit=RateLimit(rate=1, burst=5, key="x-api-key"))
+
+    Clients are told apart by their address, by the request header named in `key`, or by what a
+    callable returns for the scope. Buckets unused for `idle` seconds are evicted every `idle`
+    seconds, and the oldest ones once there are more than max_buckets.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, key: str | typing.Callable[[dict], str] = "client",
+                 idle: float = 60.0, max_buckets: int = 100_000) -> None:
+        if rate <= 0:
+            raise Exception(f"RateLimit rate must be positive, got {rate}")
+        if burst is not None and burst < 1:
+            raise Exception(f"RateLimit burst must be at least 1, got {burst}")
+        self.rate: float = rate
+        self.burst: float = burst if burst is not None else max(rate, 1.0)
+        self.key: str | typing.Callable[[dict], str] = key
+        self.idle: float = idle
+        self.max_buckets: int = max_buckets
+        self.limited: int = 0
+        # key -> [tokens, last refill]; dicts keep insertion order, a used bucket moves to the end
+        self.buckets: dict[typing.Any, list[float]] = {}
+        self._header: bytes | None = (key.lower().encode("latin-1") if isinstance(key, str) and key != "client"
+                                      else None)
+        self._next_sweep: float = time.monotonic() + idle
+
+    def key_of(self, scope: dict) -> typing.Any:
+        if self._header is not None:
+            for name, value in scope["headers"]:
+                if name == self._header:
+                    return value
+            return None
+        if callable(self.key):
+            return self.key(scope)
+        client = scope.get("client")
+        return client[0] if client else None
+
+    def check(self, scope: dict) -> None:
+        """takes a token of the request's client, raises 429 when there is none"""
+        now: float = time.monotonic()
+        if now >= self._next_sweep:
+            self.evict(now)
+        key: typing.Any = self.key_of(scope)
+        bucket: list[float] | None = self.buckets.pop(key, None)
+        if bucket is None:
+            bucket = [self.burst, now]
+            if len(self.buckets) >= self.max_buckets:
+                del self.buckets[next(iter(self.buckets))]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        self.buckets[key] = bucket
+        if bucket[0] < 1.0:
+            self.limited += 1
+            retry_after: int = math.ceil((1.0 - bucket[0]) / self.rate)
+            raise HTTPException(429, "Too Many Requests", {"retry-after": str(retry_after)})
+        bucket[0] -= 1.0
+
+    def evict(self, now: float | None = None) -> int:
+        """drops the buckets unused for `idle` seconds, return how many"""
+        now = time.monotonic() if now is None else now
+        self._next_sweep = now + self.idle
+        horizon: float = now - self.idle
+        # the least recently used buckets come first
+        stale: list = []
+        for key, bucket in self.buckets.items():
+            if bucket[1] >= horizon:
+                break
+            stale.append(key)
+        for key in stale:
+            del self.buckets[key]
+        return len(stale)
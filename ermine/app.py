@@ -1,10 +1,26 @@
 from typing import Callable, Any
 from ermine.request import Request, WebSocket
-from ermine.plugs.event import EventListener
-from roe_teer import Roeteer
-from ermine.plugs.responder import Responder
-import traceback
+from ermine.plugs.event import EventListener, Events, Hook
+from ermine.plugs.responder import Responder, CallPlan
+from ermine.routing import Route, Router, CacheInfo
+from ermine.plugs.routable import Routable
+from ermine.injections import Inject
+from ermine.concurrency import ThreadPool
+from ermine.exceptions import HTTPException, ClientDisconnect
+from ermine.response import ResponseStatus, TextResponse
+from ermine.serialization import Codec, get_codec, use_codec
+from ermine.metrics import Metrics, UNMATCHED, CLIENT_CLOSED
+from ermine.cancellation import Supervisor
+import asyncio
 import typing
+import time
+
+if typing.TYPE_CHECKING:
+    # optional subsystems, imported when they are first used
+    from ermine.admission import ConcurrencyLimit, RateLimit
+    from ermine.background import BackgroundRunner
+    from ermine.logs import AccessLog, AccessRecorder
+    from ermine.plugs.static import Static
 
 
 class Ermine:
@@ -13,144 +29,422 @@ class Ermine:
             title: str = "ermine",
             description: str = "",
             redirect_slashes: bool = True,
+            max_body_size: int | None = None,
+            serializer: str | Codec = "auto",
+            route_cache_size: int = 1024,
+            max_threads: int | None = None,
+            thread_limit: int | None = None,
+            metrics: Metrics | None = None,
+            access_log: "AccessLog | None" = None,
+            background_limit: int = 64,
+            timeout: float | None = None,
+            watch_disconnect: bool = True,
+            limit: "ConcurrencyLimit | None" = None,
+            rate_limit: "RateLimit | None" = None,
     ) -> None:
         self.title: str = title
         self.description: str = description
+        # requests announcing or sending more than this many bytes are rejected with 413
+        self.max_body_size: int | None = max_body_size
+        # json codec for responses, request bodies and websockets: 'auto', 'orjson', 'msgspec', 'json' or a Codec
+        self.codec: Codec = get_codec(serializer)
         #
-        self._router = Roeteer()
-        self._router._add_radix("ws")
-        self.__responder = Responder()
-        self.__event_listener = EventListener()
+        self._router = Router(cache_size=route_cache_size)
+        self._groups: list[tuple[str, Routable]] = []
+        # sync handlers, dependencies and event hooks run here instead of on the event loop
+        self.thread_pool: ThreadPool = ThreadPool(max_threads, thread_limit)
+        # request counters and latency histograms, None keeps the request path free of any timing
+        self.metrics: Metrics | None = metrics
+        # access and error records are written by a background thread, by default only errors to stderr
+        self._access_log: AccessLog | None = access_log
+        self._log_access: bool = access_log is not None and access_log.log_access
+        # BackgroundTasks of the requests run after their responses, at most background_limit at once
+        self._background: BackgroundRunner | None = None
+        self._background_limit: int = background_limit
+        # cancels handlers whose client disconnected or which ran longer than their timeout
+        self.supervisor: Supervisor = Supervisor(watch_disconnect, timeout)
+        self._supervised: bool = True
+        # admission of all http requests, checked before they are routed
+        self.limit: "ConcurrencyLimit | None" = limit
+        self.rate_limit: "RateLimit | None" = rate_limit
+        self.__responder = metrics.responder(self.thread_pool) if metrics is not None else Responder(self.thread_pool)
+        self.__event_listener = EventListener(self.thread_pool)
+        # per-request hook chains, empty tuples cost a single truth test per request
+        self._request_hooks: tuple[Hook, ...] = ()
+        self._response_hooks: tuple[Hook, ...] = ()
+        self._sent_hooks: tuple[Hook, ...] = ()
+        self._middleware: list[tuple[type, dict]] = []
+        self._stack: typing.Callable = self._dispatch
+        # metrics with phases replace these with versions recording the resolve and send phases
+        self._resolve: typing.Callable = self._router.resolve
+        if metrics is not None:
+            self._collect(metrics)
+
+    @property
+    def access_log(self) -> "AccessLog":
+        if self._access_log is None:
+            from ermine.logs import AccessLog
+            self._access_log = AccessLog(log_access=False)
+        return self._access_log
+
+    @property
+    def background(self) -> "BackgroundRunner":
+        if self._background is None:
+            from ermine.background import BackgroundRunner
+            self._background = BackgroundRunner(self.thread_pool, self._background_limit, on_error=self._log_error,
+                                                codec=self.codec)
+        return self._background
+
+    def _log_error(self, exc: BaseException) -> None:
+        self.access_log.error(exc)
+
+    def _collect(self, metrics: Metrics) -> None:
+        """exports the counters of the app's subsystems with its metrics"""
+        supervisor: Supervisor = self.supervisor
+        metrics.collect("requests_disconnected_total", "Handlers cancelled because the client disconnected.",
+                        lambda: supervisor.disconnected, "counter")
+        metrics.collect("requests_timed_out_total", "Handlers cancelled because they ran out of time.",
+                        lambda: supervisor.timed_out, "counter")
+        metrics.collect("background_tasks_queued", "Requests waiting to run their background tasks.",
+                        lambda: self.background.queued)
+        metrics.collect("background_tasks_running", "Requests running their background tasks.",
+                        lambda: self.background.running)
+        metrics.collect("background_tasks_completed_total", "Requests whose background tasks completed.",
+                        lambda: self.background.completed, "counter")
+        metrics.collect("background_tasks_failed_total", "Requests whose background tasks raised.",
+                        lambda: self.background.failed, "counter")
+        metrics.collect("background_tasks_dropped_total", "Background tasks dropped because too many were pending.",
+                        lambda: self.background.dropped, "counter")
+        limit: ConcurrencyLimit | None = self.limit
+        if limit is not None:
+            metrics.collect("requests_inflight", "Requests admitted and not finished yet.", lambda: limit.inflight)
+            metrics.collect("requests_queued", "Requests waiting to be admitted.", lambda: limit.queued)
+            metrics.collect("requests_rejected_total", "Requests shed with 503 because the queue was full.",
+                            lambda: limit.rejected, "counter")
+        pool: ThreadPool = self.thread_pool
+        metrics.collect("thread_pool_running", "Sync calls running in the thread pool.", lambda: pool.running)
+        metrics.collect("thread_pool_waiting", "Sync calls waiting for a thread of the pool.", lambda: pool.waiting)
+        metrics.collect("thread_pool_completed_total", "Sync calls the thread pool completed.",
+                        lambda: pool.completed, "counter")
+        rate_limit: RateLimit | None = self.rate_limit
+        if rate_limit is not None:
+            metrics.collect("requests_rate_limited_total", "Requests answered with 429.",
+                            lambda: rate_limit.limited, "counter")
+        if metrics.path:
+            self._add_route("get", metrics.path, metrics.endpoint, [])
 
     async def __call__(self, scope: dict, receive, send) -> None:
+        recorder: "AccessRecorder | None" = None
+        # whatever fails once the response started can no longer be answered with an error response
+        started: "ResponseStatus | AccessRecorder | None" = None
+        admitted: "ConcurrencyLimit | None" = None
+        request: Request | None = None
         try:
+            # responses, request bodies, websockets and the lifespan hooks all use the app's codec
+            use_codec(self.codec)
             if scope["type"] == "lifespan":
-                message = await receive()
-                if message["type"] == "lifespan.startup":
-                    await self.__event_listener("startup")
-                    await self.__event_listener(message["type"])
-                    await send({"type": "lifespan.startup.complete"})
-                elif message["type"] == "lifespan.shutdown":
-                    await self.__event_listener("shutdown")
-                    await self.__event_listener(message["type"])
-                    await send({"type": "lifespan.shutdown.complete"})
-                    return
-
-            elif scope["type"] == "http":
-                req = Request(scope, receive, send)
-                handler, params = self._router.resolve(req.method, req.path)[0]
-                resp = await self.__responder(req, handler, params)
-                await resp(scope, receive, send)
+                await self._lifespan(receive, send)
+                return
 
+            if scope["type"] == "http":
+                if self._log_access:
+                    send = started = recorder = self._access_log.recorder(send, time.perf_counter())
+                else:
+                    send = started = ResponseStatus(send)
+            if not self._router.frozen:
+                self.freeze()
+            # the request is created once and shared with the middlewares through the scope
+            if scope["type"] == "http":
+                # overload is shed before anything is routed or read
+                if self.rate_limit is not None:
+                    self.rate_limit.check(scope)
+                if self.limit is not None:
+                    if not self.limit.try_acquire():
+                        await self.limit.acquire()
+                    admitted = self.limit
+                scope["ermine.request"] = request = Request(scope, receive, send, max_body_size=self.max_body_size)
             elif scope["type"] == "websocket":
-                req = WebSocket(scope, receive, send)
-                handler, params = self._router.resolve(req.method, req.path)[0]
-                resp = await self.__responder(req, handler, params, ws=True)
-                await resp(scope, receive, send)
+                scope["ermine.request"] = WebSocket(scope, receive, send)
+            await self._stack(scope, receive, send)
 
-        except Exception:
-            traceback.print_exc()
+        except ClientDisconnect:
+            return
+        except HTTPException as e:
+            if started is not None and started.status:
+                # e.g. a streamed request body exceeding its limit while the response streams
+                return
+            await TextResponse(e.detail, e.status, e.headers)(scope, receive, send)
+        except Exception as e:
+            self.access_log.error(e, scope)
+            if started is not None and started.status:
+                # the body stays unfinished, the server closes the connection instead of completing it
+                return
             await send({"type": "http.response.start", "status": 500})
             await send({"type": "http.response.body", "body": b"Internal Server Error"})
+        finally:
+            if admitted is not None:
+                admitted.release()
+            if request is not None and request._form is not None:
+                # uploaded files spooled to disk are removed with the request, not when they are collected
+                await request._form.close()
+            if recorder is not None:
+                self._access_log.access(scope, recorder.status or CLIENT_CLOSED, recorder.sent,
+                                       time.perf_counter() - recorder.started)
+
+    async def _dispatch(self, scope: dict, receive, send) -> None:
+        """the innermost layer of the middleware stack: routes the request and sends the response"""
+        req = scope["ermine.request"]
+        # middlewares may have wrapped the channels
+        req._receive = receive
+        req._send = send
+        if scope["type"] == "http":
+            if self._request_hooks:
+                await self.__event_listener.run(self._request_hooks, req)
+            handler, params = self._resolve(req.method, req.path)
+            req.plan = handler
+            if self._supervised:
+                resp = await self.supervisor.respond(self.__responder, req, handler, params)
+            else:
+                resp = await self.__responder(req, handler, params)
+            if self._response_hooks:
+                await self.__event_listener.run(self._response_hooks, req, resp)
+            await self._send_response(req, resp, scope, receive, send)
+            if req.background is not None:
+                self.background.submit(req.background)
+            if self._sent_hooks:
+                await self.__event_listener.run(self._sent_hooks, req, resp)
+
+        elif scope["type"] == "websocket":
+            if self._request_hooks:
+                await self.__event_listener.run(self._request_hooks, req)
+            handler, params = self._router.resolve(req.method, req.path)
+            resp = await self.__responder(req, handler, params, ws=True)
+            if resp is not None:
+                await resp(scope, receive, send)
 
-    def __event_listener(self, event: str) -> None:
-        # print(f"Event: {event}")
-        pass
+    @staticmethod
+    def _send_response(req: Request, resp, scope: dict, receive, send) -> typing.Awaitable:
+        return resp(scope, receive, send)
 
-    def get(self, path: str, dependencies: list = []):
+    async def _metered_dispatch(self, scope: dict, receive, send) -> None:
+        """wraps _dispatch to record the request in the app's metrics, only used when metrics are enabled"""
+        if scope["type"] != "http":
+            await self._dispatch(scope, receive, send)
+            return
+        started: float = time.perf_counter()
+        req = scope["ermine.request"]
+        send = sent = ResponseStatus(send)
+        status: int = 500
+        try:
+            await self._dispatch(scope, receive, send)
+            # a response that never started was cut short by the client
+            status = CLIENT_CLOSED
+        except HTTPException as e:
+            status = e.status
+            raise
+        except ClientDisconnect:
+            status = CLIENT_CLOSED
+            raise
+        finally:
+            plan: CallPlan | None = req.plan
+            self.metrics.observe(req.method, plan.path if plan is not None else UNMATCHED, sent.status or status,
+                                 time.perf_counter() - started)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    self.freeze()
+                    for injection in self._injections():
+                        await injection.start()
+                    await self.__event_listener("startup")
+                except Exception as e:
+                    self.access_log.error(e)
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.__event_listener("shutdown")
+                # background tasks may still need the injected resources and the thread pool
+                if self._background is not None:
+                    await self._background.drain()
+                for injection in self._injections():
+                    await injection.stop()
+                self.thread_pool.shutdown(wait=False)
+                # waits for the writer thread to write what is still queued
+                if self._access_log is not None:
+                    self._access_log.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _injections(self) -> list[Inject]:
+        """the app-lifetime dependencies of all routes"""
+        injections: dict[int, Inject] = {}
+        for route in self._router.routes:
+            if route.plan.dependencies:
+                injections.update((id(injection), injection) for injection in route.plan.dependencies.injections)
+        return list(injections.values())
+
+    def _add_route(self, method: str, path: str, handler: typing.Callable, dependencies: list, **options) -> None:
+        """options are passed on to the route's CallPlan, e.g. threaded=False keeps a sync handler on the loop"""
+        self._router.add(method, path, CallPlan(handler, path, dependencies, **options))
+
+    def get(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self._router.get(path, handler)
+            self._add_route("get", path, handler, dependencies, **options)
             return handler
 
         return wrapper
 
-    def post(self, path: str, dependencies: list = []):
+    def post(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self._router.post(path, handler)
+            self._add_route("post", path, handler, dependencies, **options)
             return handler
 
         return wrapper
 
-    def put(self, path: str, dependencies: list = []):
+    def put(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self._router.put(path, handler)
+            self._add_route("put", path, handler, dependencies, **options)
             return handler
 
         return wrapper
 
-    def delete(self, path: str, dependencies: list = []):
+    def delete(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self._router.delete(path, handler)
+            self._add_route("delete", path, handler, dependencies, **options)
             return handler
 
         return wrapper
 
-    def connect(self, path: str, dependencies: list = []):
+    def connect(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self._router.connect(path, handler)
+            self._add_route("connect", path, handler, dependencies, **options)
             return handler
 
         return wrapper
 
-    def patch(self, path: str, dependencies: list = []):
+    def patch(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self._router.patch(path, handler)
+            self._add_route("patch", path, handler, dependencies, **options)
             return handler
 
         return wrapper
 
-    def head(self, path: str, dependencies: list = []):
+    def head(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self._router.head(path, handler)
+            self._add_route("head", path, handler, dependencies, **options)
             return handler
 
         return wrapper
 
-    def route(self, path: str, dependencies: list = [], methods: list | tuple = ("get",)):
+    def route(self, path: str, dependencies: list = [], methods: list | tuple = ("get",), **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
             for method in methods:
-                self._router._get_radix(method).insert(path, handler)
+                self._add_route(method, path, handler, dependencies, **options)
             return handler
 
         return wrapper
 
-    def websocket(self, path: str) -> None:
+    def websocket(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self._router._get_radix("ws").insert(path, handler)
+            self._add_route("ws", path, handler, dependencies, **options)
+            return handler
 
         return wrapper
 
-    # def route(
-    #     self, path: str, dependencies: list = [], methods: list | tuple = ("get",)
-    # ):
-    #     def wrapper(handler: typing.Callable) -> typing.Callable:
-    #         for method in methods:
-    #             self.__router.insert(method, path, handler)
-    #         return handler
-    #     return wrapper
-
-    # def mount(self, plugin: Pluggable, prefix: str = None) -> None:
-    #     if prefix and not prefix.startswith("/"):
-    #         raise Exception("Prefix must start with '/'")
-
-    #     if isinstance(plugin, Group):
-    #         prefix = plugin.prefix or prefix
-    #         if not prefix:
-    #             raise Exception("Prefix cannot be empty")
-    #         for path, func, method, deps in plugin.routes:
-    #             if not self.__router.strict_mode and path.endswith("/"):
-    #                 path = path[:-1]
-    #             self.__router.add(f"{prefix}{path}", func, method, deps)
-    #     if isinstance(plugin, StaticFiles):
-    #         if not prefix:
-    #             raise Exception("Prefix cannot be empty")
-    #         self.__router.add(f"{prefix}/*filename", plugin, "get", [])
-
-    #     return True
-
-    def on(self, event: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def mount(self, plugin: "Static | Routable", prefix: str = None) -> bool:
+        if isinstance(plugin, Routable):
+            self.include(plugin, prefix)
+            return True
+        if not prefix or not prefix.startswith("/"):
+            raise Exception("Prefix must start with '/'")
+
+        from ermine.plugs.static import Static
+        if isinstance(plugin, Static):
+            path: str = f"{prefix.rstrip('/')}/*filename"
+            self._add_route("get", path, plugin, [])
+            self._add_route("head", path, plugin, [])
+            return True
+        return False
+
+    def include(self, group: Routable, prefix: str = None) -> None:
+        """adds the routes of a group (and everything mounted on it) when the app is frozen"""
+        prefix = prefix if prefix is not None else getattr(group, "prefix", None) or ""
+        if prefix and not prefix.startswith("/"):
+            raise Exception("Prefix must start with '/'")
+        if self._router.frozen:
+            raise Exception("Cannot include a group after the app was frozen")
+        self._groups.append((prefix.rstrip("/"), group))
+
+    def freeze(self) -> None:
+        """
+        flattens all included groups, validates the routes and compiles the routing tables.
+        runs on lifespan.startup or the first request, no routes can be added afterwards
+        """
+        if self._router.frozen:
+            return
+        # nothing is changed before everything compiled, a failed freeze can be fixed and tried again
+        grouped: list[Route] = [
+            Route(method, path, CallPlan(handler, path, dependencies, **options))
+            for prefix, group in self._groups
+            for path, handler, method, dependencies, options in group.flatten(prefix)
+        ]
+        stack: typing.Callable = self._dispatch if self.metrics is None else self._metered_dispatch
+        for middleware, options in reversed(self._middleware):
+            stack = middleware(stack, **options)
+        routes: list[Route] = self._router.routes
+        count: int = len(routes)
+        routes.extend(grouped)
+        try:
+            self._router.freeze()
+        except Exception:
+            del routes[count:]
+            raise
+        self._supervised = self.supervisor.enabled(route.plan for route in routes)
+        if self.metrics is not None and self.metrics.phases:
+            self._resolve = self.metrics.resolver(self._router.resolve)
+            self._send_response = self.metrics.send
+        self._stack = stack
+
+    def warm(self) -> None:
+        """
+        freezes the app and runs the 'warmup' hooks, e.g. precompiling templates. `ermine serve` calls it
+        once before forking the workers, so what it builds is shared by all of them. the hooks run right
+        here, not in the thread pool, no threads may be running when the process forks
+        """
+        self.freeze()
+        for hook in self.__event_listener.chain("warmup"):
+            if hook.is_async:
+                asyncio.run(hook.handler())
+            else:
+                hook.handler()
+
+    def add_middleware(self, middleware: type, **options) -> None:
+        """
+        adds an ASGI middleware, created as middleware(app, **options) when the app is frozen.
+        the first middleware added is the outermost one
+        """
+        if self._router.frozen:
+            raise Exception("Cannot add a middleware after the app was frozen")
+        self._middleware.append((middleware, options))
+
+    def route_cache_info(self) -> CacheInfo:
+        """return the hit and miss counters of the route resolution"""
+        return self._router.cache_info()
+
+    def on(self, event: str | Events) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        registers an event handler. 'startup' and 'shutdown' run with the lifespan,
+        'request' runs with the request before routing, 'response' with the request and the response
+        before it is sent and 'sent' after it was sent
+        """
         def wrapper(handler: typing.Callable) -> typing.Callable:
             self.__event_listener.add(event, handler)
+            self._request_hooks = self.__event_listener.chain("request")
+            self._response_hooks = self.__event_listener.chain("response")
+            self._sent_hooks = self.__event_listener.chain("sent")
             return handler
 
         return wrapper
@@ -0,0 +1,130 @@
+import asyncio
+import inspect
+import typing
+
+from ermine.concurrency import ThreadPool
+from ermine.serialization import Codec, use_codec
+
+
+class TaskStats(typing.NamedTuple):
+    limit: int
+    max_pending: int
+    queued: int
+    running: int
+    completed: int
+    failed: int
+    dropped: int
+
+
+class BackgroundTasks:
+    """
+    Work a handler wants done after its response was sent, injected like the request:
+
+        @app.post("/orders")
+        async def order(tasks: BackgroundTasks):
+            tasks.add_task(send_confirmation, "leo@example.com")
+            return {"ok": True}
+
+    The tasks run one after the other in the order they were added, sync ones in the thread pool.
+    """
+
+    __slots__ = ("tasks",)
+
+    def __init__(self) -> None:
+        self.tasks: list[tuple[typing.Callable, tuple, dict]] = []
+
+    def add_task(self, func: typing.Callable, *args, **kwargs) -> None:
+        self.tasks.append((func, args, kwargs))
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    async def __call__(self, pool: ThreadPool | None = None) -> None:
+        for func, args, kwargs in self.tasks:
+            if inspect.iscoroutinefunction(func):
+                await func(*args, **kwargs)
+            elif pool is not None:
+                await pool.run(func, *args, **kwargs)
+            else:
+                func(*args, **kwargs)
+
+
+class BackgroundRunner:
+    """
+    Runs the background tasks of the app's requests once their responses were sent.
+
+    At most `limit` requests have their tasks running at once, the others are queued. Tasks arriving
+    while `max_pending` requests are queued or running are dropped, counted and reported to on_error.
+    drain() waits for everything on lifespan.shutdown and cancels what is left after `drain_timeout`.
+    """
+
+    def __init__(self, pool: ThreadPool | None = None, limit: int = 64, max_pending: int = 10_000,
+                 drain_timeout: float = 30.0, on_error: typing.Callable[[BaseException], None] | None = None,
+                 codec: Codec | None = None) -> None:
+        self.pool: ThreadPool | None = pool
+        self.limit: int = limit
+        self.max_pending: int = max_pending
+        self.drain_timeout: float = drain_timeout
+        # called with the exception of a failed task, the app passes its error log
+        self.on_error: typing.Callable[[BaseException], None] | None = on_error
+        # the app's codec, the tasks may encode json like their handler did
+        self.codec: Codec | None = codec
+        self.queued: int = 0
+        self.running: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.dropped: int = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(limit)
+
+    @property
+    def full(self) -> bool:
+        return self.queued + self.running >= self.max_pending
+
+    def submit(self, tasks: BackgroundTasks) -> None:
+        if not tasks.tasks:
+            return
+        if self.full:
+            self.dropped += len(tasks)
+            if self.on_error is not None:
+                self.on_error(Exception(f"background tasks dropped, {self.max_pending} requests are pending"))
+            return
+        self.queued += 1
+        task: asyncio.Task = asyncio.get_running_loop().create_task(self._run(tasks))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, tasks: BackgroundTasks) -> None:
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        if self.codec is not None:
+            # the task has a context of its own, whatever submitted it
+            use_codec(self.codec)
+        try:
+            await tasks(self.pool)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            if self.on_error is not None:
+                self.on_error(e)
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """waits for the queued and running tasks, cancels them after timeout seconds"""
+        timeout = self.drain_timeout if timeout is None else timeout
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    def stats(self) -> TaskStats:
+        return TaskStats(self.limit, self.max_pending, self.queued, self.running, self.completed, self.failed,
+                         self.dropped)
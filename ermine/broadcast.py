@@ -0,0 +1,255 @@
+import abc
+import asyncio
+import collections
+import typing
+
+from ermine.request import WebSocket
+from ermine.serialization import Codec, current_codec
+
+# what a subscriber does when its send queue is full
+DROP_OLDEST: str = "drop_oldest"
+DROP_NEWEST: str = "drop_newest"
+DISCONNECT: str = "disconnect"
+POLICIES: frozenset[str] = frozenset({DROP_OLDEST, DROP_NEWEST, DISCONNECT})
+# close code sent to subscribers disconnected for being too slow (policy violation)
+SLOW_CONSUMER_CODE: int = 1008
+# close code sent to all subscribers when the hub shuts down (going away)
+SHUTDOWN_CODE: int = 1001
+
+
+class BroadcastBackend(abc.ABC):
+    """
+    Transport of the published messages.
+    A backend calls `deliver(channel, message)` for every message published on a channel it was
+    subscribed to. Messages are ASGI websocket.send dicts, already encoded.
+    """
+
+    @abc.abstractmethod
+    async def start(self, deliver: typing.Callable[[str, dict], int]) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def stop(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def subscribe(self, channel: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def unsubscribe(self, channel: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def publish(self, channel: str, message: dict) -> None:
+        ...
+
+
+class MemoryBackend(BroadcastBackend):
+    """delivers messages to the subscribers of this process"""
+
+    def __init__(self) -> None:
+        self.deliver: typing.Callable[[str, dict], int] | None = None
+
+    async def start(self, deliver: typing.Callable[[str, dict], int]) -> None:
+        self.deliver = deliver
+
+    async def stop(self) -> None:
+        self.deliver = None
+
+    async def subscribe(self, channel: str) -> None:
+        pass
+
+    async def unsubscribe(self, channel: str) -> None:
+        pass
+
+    async def publish(self, channel: str, message: dict) -> None:
+        self.deliver(channel, message)
+
+
+class Subscriber:
+    """
+    A websocket subscribed to one or more channels.
+    Messages are queued without blocking the publisher and sent by the subscriber's own task,
+    a full queue is handled according to the policy.
+    """
+
+    __slots__ = ("hub", "send", "channels", "max_queue", "policy", "queue", "dropped", "closed",
+                 "close_code", "_wakeup", "_task")
+
+    def __init__(self, hub: "Broadcast", send: typing.Callable, channels: tuple[str, ...], max_queue: int,
+                 policy: str) -> None:
+        if policy not in POLICIES:
+            raise Exception(f"Unknown slow consumer policy '{policy}'")
+        self.hub: Broadcast = hub
+        self.send: typing.Callable = send
+        self.channels: tuple[str, ...] = channels
+        self.max_queue: int = max_queue
+        self.policy: str = policy
+        self.queue: collections.deque = collections.deque()
+        self.dropped: int = 0
+        self.closed: bool = False
+        self.close_code: int | None = None
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "Subscriber":
+        await self.hub._add(self)
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.hub._remove(self)
+        self.close()
+        if self._task is not None:
+            # messages still queued are not worth waiting for, a pending close frame is
+            if self.close_code is None:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def put(self, message: dict) -> bool:
+        """queues a message, returns False if it was not queued"""
+        if self.closed:
+            return False
+        if len(self.queue) >= self.max_queue:
+            if self.policy == DISCONNECT:
+                self.close(SLOW_CONSUMER_CODE)
+                return False
+            self.dropped += 1
+            if self.policy == DROP_NEWEST:
+                return False
+            self.queue.popleft()
+        self.queue.append(message)
+        self._wakeup.set()
+        return True
+
+    def close(self, code: int | None = None) -> None:
+        """stops sending, with a code the websocket is closed once the sender task wakes up"""
+        if self.closed:
+            return
+        self.closed = True
+        self.close_code = code
+        self.queue.clear()
+        self.hub._discard(self)
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self.queue and not self.closed:
+                    await self.send(self.queue.popleft())
+            if self.close_code is not None:
+                await self.send({"type": "websocket.close", "code": self.close_code})
+        except Exception:
+            # the client is gone, there is nobody left to send to
+            self.close()
+
+
+class Broadcast:
+    """
+    Publish/subscribe hub for websockets.
+
+        broadcast = Broadcast()
+
+        @app.websocket("/live")
+        async def live(ws: WebSocket):
+            await ws.accept()
+            await broadcast.serve(ws, "dashboard")
+
+        await broadcast.publish("dashboard", {"cpu": 0.4})
+
+    A published message is encoded once and the same ASGI message is queued for every subscriber
+    of the channel. Each subscriber has a bounded queue, a slow consumer either loses messages
+    (drop_oldest, drop_newest) or is disconnected (disconnect). Subscribers are removed when their
+    handler leaves `serve`/`subscribe` or sending to them fails.
+    """
+
+    def __init__(self, backend: BroadcastBackend | None = None, max_queue: int = 64, policy: str = DROP_OLDEST,
+                 codec: Codec | None = None) -> None:
+        if policy not in POLICIES:
+            raise Exception(f"Unknown slow consumer policy '{policy}'")
+        self.backend: BroadcastBackend = backend or MemoryBackend()
+        self.max_queue: int = max_queue
+        self.policy: str = policy
+        # None encodes with the codec of the app handling the current request
+        self.codec: Codec | None = codec
+        self.channels: dict[str, set[Subscriber]] = {}
+        self._started: bool = False
+
+    async def start(self) -> None:
+        if not self._started:
+            self._started = True
+            await self.backend.start(self.deliver)
+
+    async def stop(self) -> None:
+        """closes every subscriber and the backend, meant for the app's shutdown event"""
+        for subscribers in list(self.channels.values()):
+            for subscriber in list(subscribers):
+                subscriber.close(SHUTDOWN_CODE)
+        if self._started:
+            self._started = False
+            await self.backend.stop()
+
+    def encode(self, message: typing.Any) -> dict:
+        """return the websocket.send message for str (text), bytes or anything the codec can encode (text)"""
+        if isinstance(message, str):
+            return {"type": "websocket.send", "text": message}
+        if isinstance(message, (bytes, bytearray, memoryview)):
+            return {"type": "websocket.send", "bytes": bytes(message)}
+        encoded: bytes = (self.codec or current_codec()).encode(message)
+        return {"type": "websocket.send", "text": encoded.decode("utf-8")}
+
+    async def publish(self, channel: str, message: typing.Any) -> None:
+        await self.start()
+        await self.backend.publish(channel, self.encode(message))
+
+    def deliver(self, channel: str, message: dict) -> int:
+        """queues an encoded message for every subscriber of the channel, return how many got it"""
+        subscribers: set[Subscriber] | None = self.channels.get(channel)
+        if not subscribers:
+            return 0
+        delivered: int = 0
+        for subscriber in tuple(subscribers):
+            delivered += subscriber.put(message)
+        return delivered
+
+    def subscribe(self, ws: WebSocket, *channels: str, max_queue: int | None = None,
+                  policy: str | None = None) -> Subscriber:
+        """subscribes an accepted websocket, use as `async with broadcast.subscribe(ws, "news"):`"""
+        if not channels:
+            raise Exception("Subscribe to at least one channel")
+        return Subscriber(self, ws._send, channels, max_queue or self.max_queue, policy or self.policy)
+
+    async def serve(self, ws: WebSocket, *channels: str, max_queue: int | None = None,
+                    policy: str | None = None) -> None:
+        """sends the channels' messages to an accepted websocket until the client disconnects"""
+        async with self.subscribe(ws, *channels, max_queue=max_queue, policy=policy):
+            async for _ in ws:
+                pass
+
+    def subscribers(self, channel: str) -> int:
+        return len(self.channels.get(channel, ()))
+
+    async def _add(self, subscriber: Subscriber) -> None:
+        await self.start()
+        for channel in subscriber.channels:
+            subscribers: set[Subscriber] | None = self.channels.get(channel)
+            if subscribers is None:
+                subscribers = self.channels[channel] = set()
+                await self.backend.subscribe(channel)
+            subscribers.add(subscriber)
+
+    def _discard(self, subscriber: Subscriber) -> None:
+        for channel in subscriber.channels:
+            subscribers: set[Subscriber] | None = self.channels.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+
+    async def _remove(self, subscriber: Subscriber) -> None:
+        self._discard(subscriber)
+        for channel in subscriber.channels:
+            if channel in self.channels and not self.channels[channel]:
+                del self.channels[channel]
+                await self.backend.unsubscribe(channel)
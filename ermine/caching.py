@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import time
+import typing
+from collections import OrderedDict
+
+from ermine.request import BaseRequest
+from ermine.response import FileResponse, Response, StreamingResponse
+
+# headers of the full response that are sent with a 304 as well
+NOT_MODIFIED_HEADERS: frozenset[bytes] = frozenset({b"etag", b"cache-control", b"vary", b"expires", b"last-modified"})
+
+
+class CachedEntry(typing.NamedTuple):
+    status: int
+    headers: tuple[tuple[bytes, bytes], ...]
+    body: bytes
+    etag: str
+    expires: float
+
+
+class ResponseCacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    coalesced: int
+    not_modified: int
+    maxsize: int
+    currsize: int
+
+
+class CachedResponse(Response):
+    """a response sent from a cache entry, nothing is rendered again"""
+
+    def __init__(self, entry: CachedEntry, not_modified: bool = False) -> None:
+        self.content = entry.body
+        if not_modified:
+            self.status: int = 304
+            self.body: bytes = b""
+            self.headers = [(k, v) for k, v in entry.headers if k in NOT_MODIFIED_HEADERS]
+        else:
+            self.status = entry.status
+            self.body = entry.body
+            # hooks and middlewares may add headers, the entry keeps its own
+            self.headers = list(entry.headers)
+
+
+class CachePolicy:
+    """
+    Caches the rendered responses of a route.
+
+        @app.get("/stats", cache=CachePolicy(ttl=60, vary=["accept-language"], query=["period"]))
+
+    Entries are keyed by method, path, the query parameters named in `query` (the whole query string
+    when it is None) and the request headers named in `vary`, and kept in an LRU of at most
+    max_entries. Only complete 200 responses without cookies are stored. Every stored response
+    gets an ETag and a matching If-None-Match is answered with 304 without calling the handler.
+    Requests missing the same key at the same time wait for the first one instead of running the
+    handler again. The route's dependencies run for every request, hits included, so guards raising
+    401 or 403 are never skipped.
+    """
+
+    def __init__(self, ttl: float, vary: typing.Iterable[str] = (), query: typing.Iterable[str] | None = None,
+                 max_entries: int = 1024) -> None:
+        self.ttl: float = ttl
+        self.vary: tuple[str, ...] = tuple(name.lower() for name in vary)
+        self.query: tuple[str, ...] | None = tuple(query) if query is not None else None
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict[tuple, CachedEntry] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._vary_header: bytes | None = ", ".join(self.vary).encode("latin-1") if self.vary else None
+        self.hits: int = 0
+        self.misses: int = 0
+        self.coalesced: int = 0
+        self.not_modified: int = 0
+
+    def key(self, req: BaseRequest) -> tuple:
+        if self.query is None:
+            query: typing.Any = req.scope.get("query_string", b"")
+        else:
+            params = req.query
+            query = tuple(params.get(name) for name in self.query)
+        return req.method, req.path, query, tuple(req.header(name) for name in self.vary)
+
+    async def respond(self, req: BaseRequest, call: typing.Callable[[], typing.Awaitable[Response]]) -> Response:
+        """returns the cached response of the request, awaits call() for it on a miss"""
+        key: tuple = self.key(req)
+        entry: CachedEntry | None = self.entries.get(key)
+        if entry is not None:
+            if entry.expires > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self._send(req, entry)
+            del self.entries[key]
+
+        flight: asyncio.Future | None = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            entry = await asyncio.shield(flight)
+            if entry is not None:
+                return self._send(req, entry)
+            # the first response could not be cached, this request gets its own
+            return await call()
+
+        self.misses += 1
+        flight = self._inflight[key] = asyncio.get_running_loop().create_future()
+        entry = None
+        try:
+            response: Response = await call()
+            entry = self.store(key, response)
+        finally:
+            del self._inflight[key]
+            # waiting requests run the handler themselves if it failed
+            flight.set_result(entry)
+        return self._send(req, entry) if entry is not None else response
+
+    def store(self, key: tuple, response: Response) -> CachedEntry | None:
+        if response.status != 200 or isinstance(response, (StreamingResponse, FileResponse)):
+            return None
+        headers: list[tuple[bytes, bytes]] = []
+        etag: str | None = None
+        for name, value in response.headers:
+            name = name.lower()
+            if name == b"set-cookie":
+                return None
+            if name == b"etag":
+                etag = value.decode("latin-1")
+            headers.append((name, value))
+        body: bytes = bytes(response.body)
+        if etag is None:
+            etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+            headers.append((b"etag", etag.encode("latin-1")))
+        if self._vary_header is not None:
+            headers.append((b"vary", self._vary_header))
+        entry = CachedEntry(response.status, tuple(headers), body, etag, time.monotonic() + self.ttl)
+        self.entries[key] = entry
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def _send(self, req: BaseRequest, entry: CachedEntry) -> CachedResponse:
+        if_none_match: str | None = req.header("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, entry.etag):
+            self.not_modified += 1
+            return CachedResponse(entry, not_modified=True)
+        return CachedResponse(entry)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def cache_info(self) -> ResponseCacheInfo:
+        return ResponseCacheInfo(self.hits, self.misses, self.coalesced, self.not_modified, self.max_entries,
+                                 len(self.entries))
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """weak comparison as If-None-Match requires"""
+    if header.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
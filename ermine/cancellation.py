@@ -0,0 +1,166 @@
+import asyncio
+import typing
+
+from ermine.exceptions import ClientDisconnect, HTTPException
+
+if typing.TYPE_CHECKING:
+    from ermine.plugs.responder import CallPlan
+    from ermine.request import Request
+    from ermine.response import Response
+
+# why a handler was cancelled
+DISCONNECTED: int = 1
+TIMED_OUT: int = 2
+
+
+class HandlerGuard:
+    """
+    The receive channel of a request while its handler runs, and the handle to cancel the handler.
+
+    Once the supervisor starts watching, a watcher task is the only reader of the server's channel:
+    it passes the body messages on to the request one at a time, so it never buffers more than a
+    single message, and cancels the handler when the client disconnects. A disconnect can only be
+    seen once the last body message was read. A message still buffered when the guard closes is
+    handed out before the server's channel is read again.
+    """
+
+    __slots__ = ("task", "receive", "started", "deadline", "reason", "reading", "messages", "watcher")
+
+    def __init__(self, receive: typing.Callable, started: float, timeout: float | None) -> None:
+        self.task: asyncio.Task = asyncio.current_task()
+        self.receive: typing.Callable = receive
+        self.started: float = started
+        self.deadline: float | None = started + timeout if timeout else None
+        self.reason: int = 0
+        # the request is reading the server's channel itself, no watcher may start meanwhile
+        self.reading: bool = False
+        self.messages: asyncio.Queue | None = None
+        self.watcher: asyncio.Task | None = None
+
+    @property
+    def pending(self) -> bool:
+        """whether a message was read from the server but not by the request yet"""
+        return self.messages is not None and not self.messages.empty()
+
+    async def __call__(self) -> dict:
+        if self.pending:
+            message: dict = self.messages.get_nowait()
+            self.messages.task_done()
+            return message
+        if self.watcher is None:
+            self.reading = True
+            try:
+                return await self.receive()
+            finally:
+                self.reading = False
+        if self.reason == DISCONNECTED:
+            return {"type": "http.disconnect"}
+        message = await self.messages.get()
+        self.messages.task_done()
+        return message
+
+    def watch(self) -> None:
+        if self.messages is None:
+            self.messages = asyncio.Queue(1)
+        self.watcher = asyncio.get_running_loop().create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            message: dict = await self.receive()
+            if message["type"] == "http.disconnect":
+                self.cancel(DISCONNECTED)
+                return
+            self.messages.put_nowait(message)
+            if message.get("more_body", False):
+                # wait for the request to take the chunk, being cancelled here loses nothing
+                await self.messages.join()
+
+    def cancel(self, reason: int) -> None:
+        if not self.reason:
+            self.reason = reason
+            self.task.cancel()
+
+    def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.cancel()
+            self.watcher = None
+        # a handler swallowing the cancellation must not leave it pending on the task
+        if self.reason and self.task.cancelling():
+            self.task.uncancel()
+
+
+class Supervisor:
+    """
+    Cancels handlers whose client disconnected or which ran longer than their timeout.
+
+    `timeout` is the default deadline in seconds of all routes, a route's own timeout= replaces it and
+    timeout=0 turns it off. Timed out requests are answered with 504. With watch_disconnect, handlers
+    still running after `grace` seconds are cancelled as soon as their client goes away.
+
+    Fast requests cost a set insertion: a single ticker task checks the running handlers every
+    `interval` seconds, so deadlines are kept to within that interval, and only starts watching the
+    connection of the slow ones. Sync handlers stop being awaited, their thread finishes on its own.
+    """
+
+    def __init__(self, watch_disconnect: bool = True, timeout: float | None = None, grace: float = 0.05,
+                 interval: float = 0.05) -> None:
+        self.watch_disconnect: bool = watch_disconnect
+        self.timeout: float | None = timeout
+        self.grace: float = grace
+        self.interval: float = interval
+        # handlers cancelled because their client disconnected and because they ran out of time
+        self.disconnected: int = 0
+        self.timed_out: int = 0
+        self.running: set[HandlerGuard] = set()
+        self._ticker: asyncio.Task | None = None
+
+    def enabled(self, plans: typing.Iterable["CallPlan"]) -> bool:
+        """False when no handler could ever be cancelled, the app then skips the supervisor"""
+        return self.watch_disconnect or bool(self.timeout) or any(plan.timeout for plan in plans)
+
+    async def respond(self, responder: typing.Callable, req: "Request", plan: "CallPlan | None",
+                      params: tuple) -> "Response":
+        timeout: float | None = self.timeout if plan is None or plan.timeout is None else plan.timeout
+        if not plan or not (self.watch_disconnect or timeout):
+            return await responder(req, plan, params)
+        loop = asyncio.get_running_loop()
+        receive: typing.Callable = req._receive
+        guard: HandlerGuard = HandlerGuard(receive, loop.time(), timeout)
+        req._receive = guard
+        self.running.add(guard)
+        if self._ticker is None:
+            self._ticker = loop.create_task(self._tick())
+        try:
+            return await responder(req, plan, params)
+        except asyncio.CancelledError:
+            reason: int = guard.reason
+            guard.close()
+            if not reason or guard.task.cancelling():
+                # cancelled by the server, not by the supervisor
+                raise
+            if reason == TIMED_OUT:
+                self.timed_out += 1
+                raise HTTPException(504, "Gateway Timeout")
+            self.disconnected += 1
+            raise ClientDisconnect()
+        finally:
+            self.running.discard(guard)
+            guard.close()
+            req._receive = guard if guard.pending else receive
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self.running:
+                await asyncio.sleep(self.interval)
+                now: float = loop.time()
+                for guard in list(self.running):
+                    if guard.reason:
+                        continue
+                    if guard.deadline is not None and now >= guard.deadline:
+                        guard.cancel(TIMED_OUT)
+                    elif (self.watch_disconnect and guard.watcher is None and not guard.reading
+                          and now - guard.started >= self.grace):
+                        guard.watch()
+        finally:
+            self._ticker = None
@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import os
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class PoolStats(typing.NamedTuple):
+    max_workers: int
+    limit: int
+    running: int
+    waiting: int
+    completed: int
+
+
+class ThreadPool:
+    """
+    Runs sync callables (handlers, dependencies, event hooks) off the event loop.
+
+    At most `limit` calls are handed to the executor at once, further calls wait on the loop,
+    so the executor queue stays bounded and `waiting` shows the queue depth.
+    """
+
+    def __init__(self, max_workers: int | None = None, limit: int | None = None) -> None:
+        self.max_workers: int = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.limit: int = limit or self.max_workers
+        self.running: int = 0
+        self.waiting: int = 0
+        self.completed: int = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(self.limit)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # threads are only started once the first sync call arrives
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="ermine")
+        return self._executor
+
+    async def run(self, func: typing.Callable, *args, **kwargs) -> typing.Any:
+        """calls func in a worker thread with the caller's context variables"""
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        loop = asyncio.get_running_loop()
+        try:
+            context = contextvars.copy_context()
+            future: Future = self.executor.submit(context.run, func, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        # the slot is given back when the thread is done, not when the caller stops waiting for it,
+        # so callers that were cancelled or timed out cannot push the pool past its limit
+        future.add_done_callback(lambda _: self._release_soon(loop))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _release_soon(self, loop: asyncio.AbstractEventLoop) -> None:
+        # runs in the worker thread
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # the loop is closed, nobody waits for the slot anymore
+            pass
+
+    def _release(self) -> None:
+        self.running -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> PoolStats:
+        return PoolStats(self.max_workers, self.limit, self.running, self.waiting, self.completed)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,26 @@
+class HTTPException(Exception):
+    """
+    Raised to abort a request with the given status code.
+    """
+
+    def __init__(self, status: int, detail: str = "", headers: dict | None = None) -> None:
+        super().__init__(status, detail)
+        self.status: int = status
+        self.detail: str = detail
+        self.headers: dict | None = headers
+
+
+class ClientDisconnect(Exception):
+    """
+    Raised when the client went away while the request was still being handled.
+    """
+
+
+class WebSocketDisconnect(ClientDisconnect):
+    """
+    Raised when receiving from a websocket the client has closed.
+    """
+
+    def __init__(self, code: int = 1000) -> None:
+        super().__init__(code)
+        self.code: int = code
@@ -0,0 +1,348 @@
+import asyncio
+import collections
+import tempfile
+import typing
+from urllib.parse import parse_qsl, unquote
+
+from multidict import CIMultiDict, MultiDict
+
+from ermine.exceptions import HTTPException
+
+# parser events
+PART: int = 0
+DATA: int = 1
+END: int = 2
+
+# parser states
+_PREAMBLE: int = 0
+_HEADERS: int = 1
+_BODY: int = 2
+_DELIMITER: int = 3
+_EPILOGUE: int = 4
+
+
+def parse_options(header: str) -> tuple[str, dict[str, str]]:
+    """splits a header like 'form-data; name="a"; filename="b.txt"' into its value and parameters"""
+    value, _, rest = header.partition(";")
+    options: dict[str, str] = {}
+    i, length = 0, len(rest)
+    while i < length:
+        while i < length and rest[i] in " \t;":
+            i += 1
+        start = i
+        while i < length and rest[i] not in "=;":
+            i += 1
+        key: str = rest[start:i].strip().lower()
+        if i >= length or rest[i] == ";":
+            if key:
+                options[key] = ""
+            continue
+        i += 1
+        if i < length and rest[i] == '"':
+            i += 1
+            chars: list[str] = []
+            while i < length and rest[i] != '"':
+                if rest[i] == "\\" and i + 1 < length:
+                    i += 1
+                chars.append(rest[i])
+                i += 1
+            i += 1
+            option: str = "".join(chars)
+        else:
+            start = i
+            while i < length and rest[i] != ";":
+                i += 1
+            option = rest[start:i].strip()
+        if key.endswith("*"):
+            # RFC 5987: charset'language'percent-encoded
+            charset, _, encoded = option.partition("'")
+            _, _, encoded = encoded.partition("'")
+            key, option = key[:-1], unquote(encoded, encoding=charset or "utf-8", errors="replace")
+        if key:
+            options[key] = option
+    return value.strip().lower(), options
+
+
+class MultipartParser:
+    """
+    Incremental multipart/form-data parser.
+
+    feed() takes the body chunk by chunk and returns (PART, headers), (DATA, bytes) and (END, None)
+    events. Only the bytes that could still be the start of a boundary are kept between chunks.
+    """
+
+    __slots__ = ("delimiter", "max_header_size", "buffer", "state")
+
+    def __init__(self, boundary: bytes, max_header_size: int = 16 * 1024) -> None:
+        self.delimiter: bytes = b"\r\n--" + boundary
+        self.max_header_size: int = max_header_size
+        # the leading CRLF makes the first boundary look like all the others
+        self.buffer: bytearray = bytearray(b"\r\n")
+        self.state: int = _PREAMBLE
+
+    def feed(self, chunk: bytes) -> list[tuple[int, typing.Any]]:
+        events: list[tuple[int, typing.Any]] = []
+        buffer, delimiter = self.buffer, self.delimiter
+        if self.state == _EPILOGUE:
+            return events
+        buffer += chunk
+        while True:
+            if self.state == _BODY:
+                index: int = buffer.find(delimiter)
+                if index < 0:
+                    # keep what might be the beginning of the delimiter
+                    keep: int = len(delimiter) - 1
+                    if len(buffer) > keep:
+                        events.append((DATA, bytes(buffer[:-keep])))
+                        del buffer[:-keep]
+                    return events
+                if index:
+                    events.append((DATA, bytes(buffer[:index])))
+                del buffer[:index + len(delimiter)]
+                self.state = _DELIMITER
+            elif self.state == _DELIMITER:
+                if len(buffer) < 2:
+                    return events
+                if buffer[:2] == b"--":
+                    events.append((END, None))
+                    self.state = _EPILOGUE
+                    buffer.clear()
+                    return events
+                # transport padding after the boundary is allowed
+                end: int = buffer.find(b"\r\n")
+                if end < 0:
+                    return events
+                del buffer[:end + 2]
+                self.state = _HEADERS
+            elif self.state == _HEADERS:
+                end = buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(buffer) > self.max_header_size:
+                        raise HTTPException(413, "Multipart headers too large")
+                    return events
+                if end > self.max_header_size:
+                    raise HTTPException(413, "Multipart headers too large")
+                events.append((PART, self._parse_headers(bytes(buffer[:end]))))
+                del buffer[:end + 4]
+                self.state = _BODY
+            elif self.state == _PREAMBLE:
+                index = buffer.find(delimiter)
+                if index < 0:
+                    keep = len(delimiter) - 1
+                    if len(buffer) > keep:
+                        del buffer[:-keep]
+                    return events
+                del buffer[:index + len(delimiter)]
+                self.state = _DELIMITER
+            else:
+                return events
+
+    def close(self) -> None:
+        """raises if the body ended before the closing boundary"""
+        if self.state != _EPILOGUE:
+            raise HTTPException(400, "Incomplete multipart body")
+
+    @staticmethod
+    def _parse_headers(raw: bytes) -> CIMultiDict:
+        headers: CIMultiDict = CIMultiDict()
+        for line in raw.split(b"\r\n"):
+            if not line:
+                continue
+            name, sep, value = line.partition(b":")
+            if not sep:
+                raise HTTPException(400, "Invalid multipart header")
+            headers.add(name.strip().decode("latin-1"), value.strip().decode("utf-8", "replace"))
+        return headers
+
+
+class Part:
+    """one part of a multipart body, its content can only be read while it is the current part"""
+
+    def __init__(self, reader: "MultipartReader", headers: CIMultiDict) -> None:
+        self.reader: MultipartReader = reader
+        self.headers: CIMultiDict = headers
+        _, options = parse_options(headers.get("content-disposition", ""))
+        self.name: str = options.get("name", "")
+        # None for plain form fields
+        self.filename: str | None = options.get("filename")
+        self.content_type: str = headers.get("content-type", "text/plain" if self.filename is None else
+                                             "application/octet-stream")
+        self.size: int = 0
+        self.exhausted: bool = False
+
+    async def stream(self) -> typing.AsyncIterator[bytes]:
+        """yields the content chunk by chunk as it arrives"""
+        limit: int | None = self.reader.max_part_size
+        while not self.exhausted:
+            event, value = await self.reader._next_event()
+            if event != DATA:
+                self.reader._pending.appendleft((event, value))
+                self.exhausted = True
+                return
+            self.size += len(value)
+            if limit is not None and self.size > limit:
+                raise HTTPException(413, f"Part '{self.name}' is too large")
+            yield value
+
+    def __aiter__(self) -> typing.AsyncIterator[bytes]:
+        return self.stream()
+
+    async def read(self, limit: int | None = None) -> bytes:
+        chunks: list[bytes] = []
+        size: int = 0
+        async for chunk in self.stream():
+            size += len(chunk)
+            if limit is not None and size > limit:
+                raise HTTPException(413, f"Field '{self.name}' is too large")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def text(self, limit: int | None = None) -> str:
+        _, options = parse_options(self.content_type)
+        return (await self.read(limit)).decode(options.get("charset", "utf-8"), "replace")
+
+    async def drain(self) -> None:
+        async for _ in self.stream():
+            pass
+
+
+class MultipartReader:
+    """
+    Reads a multipart body part by part as it arrives, without buffering it.
+
+        async for part in req.parts():
+            async for chunk in part:
+                ...
+    """
+
+    def __init__(self, chunks: typing.AsyncIterator[bytes], boundary: bytes, max_part_size: int | None = None,
+                 max_parts: int = 1000, max_header_size: int = 16 * 1024) -> None:
+        self.chunks: typing.AsyncIterator[bytes] = chunks
+        self.parser: MultipartParser = MultipartParser(boundary, max_header_size)
+        self.max_part_size: int | None = max_part_size
+        self.max_parts: int = max_parts
+        self.parts: int = 0
+        self._pending: collections.deque = collections.deque()
+        self._current: Part | None = None
+        self._done: bool = False
+
+    async def _next_event(self) -> tuple[int, typing.Any]:
+        while not self._pending:
+            if self._done:
+                return END, None
+            try:
+                chunk: bytes = await self.chunks.__anext__()
+            except StopAsyncIteration:
+                self._done = True
+                self.parser.close()
+                continue
+            self._pending.extend(self.parser.feed(chunk))
+        return self._pending.popleft()
+
+    async def next_part(self) -> Part | None:
+        if self._current is not None and not self._current.exhausted:
+            await self._current.drain()
+        event, value = await self._next_event()
+        while event == DATA:
+            event, value = await self._next_event()
+        if event == END:
+            self._current = None
+            return None
+        self.parts += 1
+        if self.parts > self.max_parts:
+            raise HTTPException(413, "Too many multipart parts")
+        self._current = Part(self, value)
+        return self._current
+
+    def __aiter__(self) -> "MultipartReader":
+        return self
+
+    async def __anext__(self) -> Part:
+        part: Part | None = await self.next_part()
+        if part is None:
+            raise StopAsyncIteration
+        return part
+
+
+class UploadFile:
+    """
+    an uploaded file, kept in memory up to the spool size and on disk beyond it. The files of a form
+    are closed once the response was sent, a background task needing one reads it in the handler.
+    """
+
+    def __init__(self, filename: str, content_type: str, headers: CIMultiDict, spool_size: int) -> None:
+        self.filename: str = filename
+        self.content_type: str = content_type
+        self.headers: CIMultiDict = headers
+        self.size: int = 0
+        self.spool_size: int = spool_size
+        self.file: tempfile.SpooledTemporaryFile = tempfile.SpooledTemporaryFile(max_size=spool_size)
+
+    @property
+    def in_memory(self) -> bool:
+        # the file is only written by write(), which moves it to disk once it grows past the spool size
+        return self.size <= self.spool_size
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.in_memory:
+            self.file.write(data)
+        else:
+            # the write rolling the file over copies what was spooled to disk, off the loop as well
+            await asyncio.get_running_loop().run_in_executor(None, self.file.write, data)
+
+    async def read(self, size: int = -1) -> bytes:
+        if self.in_memory:
+            return self.file.read(size)
+        return await asyncio.get_running_loop().run_in_executor(None, self.file.read, size)
+
+    async def seek(self, offset: int) -> None:
+        self.file.seek(offset)
+
+    async def close(self) -> None:
+        if self.in_memory:
+            self.file.close()
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, self.file.close)
+
+
+class FormData(MultiDict):
+    """the fields (str) and files (UploadFile) of a form"""
+
+    async def close(self) -> None:
+        for value in self.values():
+            if isinstance(value, UploadFile):
+                await value.close()
+
+
+def boundary_of(content_type: str) -> bytes:
+    _, options = parse_options(content_type)
+    boundary: str | None = options.get("boundary")
+    if not boundary or len(boundary) > 200:
+        raise HTTPException(400, "Missing multipart boundary")
+    return boundary.encode("latin-1")
+
+
+async def parse_multipart(reader: MultipartReader, max_field_size: int, spool_size: int) -> FormData:
+    form: FormData = FormData()
+    try:
+        async for part in reader:
+            if part.filename is None:
+                form.add(part.name, await part.text(max_field_size))
+                continue
+            upload: UploadFile = UploadFile(part.filename, part.content_type, part.headers, spool_size)
+            form.add(part.name, upload)
+            async for chunk in part:
+                await upload.write(chunk)
+            await upload.seek(0)
+    except BaseException:
+        await form.close()
+        raise
+    return form
+
+
+def parse_urlencoded(body: bytes, max_fields: int) -> FormData:
+    try:
+        return FormData(parse_qsl(body.decode("utf-8", "replace"), keep_blank_values=True, max_num_fields=max_fields))
+    except ValueError:
+        raise HTTPException(413, "Too many form fields")
@@ -1,3 +1,4 @@
+import asyncio
 import inspect
 import typing
 
@@ -5,16 +6,48 @@ import typing
 class Inject:
     """
     Injectable class.
+    The factory runs once per app lifetime (at startup) and its value is shared by all requests.
+    Generator factories are resumed on shutdown to release what they created.
     """
     def __init__(self, injection) -> None:
         self.injection = injection
+        self.value: typing.Any = None
+        self.ready: bool = False
+        self._teardown: typing.Any = None
+        self._lock: asyncio.Lock = asyncio.Lock()
 
+    async def start(self) -> typing.Any:
+        async with self._lock:
+            if self.ready:
+                return self.value
+            result = self.injection()
+            if inspect.isasyncgen(result):
+                self._teardown = result
+                result = await result.__anext__()
+            elif inspect.isgenerator(result):
+                self._teardown = result
+                result = next(result)
+            elif inspect.isawaitable(result):
+                result = await result
+            self.value = result
+            self.ready = True
+            return result
+
+    async def stop(self) -> None:
+        teardown, self._teardown = self._teardown, None
+        self.ready = False
+        self.value = None
+        if inspect.isasyncgen(teardown):
+            async for _ in teardown:
+                pass
+        elif inspect.isgenerator(teardown):
+            for _ in teardown:
+                pass
 
     async def __call__(self, **kwargs) -> typing.Any:
-        if inspect.iscoroutinefunction(self.dep):
-            return await self.dep(**kwargs)
-        else:
-            return self.dep(**kwargs)
+        return await self.start()
+
+
 class Depends:
     """
     Dependency class.
@@ -28,4 +61,90 @@ class Depends:
             return await self.dep(**kwargs)
         else:
             return self.dep(**kwargs)
-  
\ No newline at end of file
+
+
+class DependencyGraph:
+    """
+    The dependencies of a route, built once when the route is registered.
+
+    Dependencies are grouped into levels: everything in a level only depends on earlier levels,
+    so the async dependencies of one level are awaited concurrently. Each dependency appears
+    once in the graph no matter how often it is requested, so it runs at most once per request.
+    """
+
+    __slots__ = ("levels", "injections")
+
+    def __init__(self, levels: tuple[tuple[typing.Any, ...], ...], injections: tuple[Inject, ...]) -> None:
+        self.levels = levels
+        self.injections = injections
+
+    @classmethod
+    def build(cls, plan, dependencies: typing.Iterable = ()) -> "DependencyGraph | None":
+        from ermine.plugs.responder import CallPlan, Source
+
+        nodes: dict[typing.Callable, CallPlan] = {}
+        depths: dict[typing.Callable, int] = {}
+        injections: dict[int, Inject] = {}
+
+        def visit(owner: CallPlan, path: tuple) -> int:
+            depth: int = 0
+            for arg in owner.arguments:
+                if arg.source is Source.SINGLETON:
+                    injections[id(arg.default)] = arg.default
+                elif arg.source is Source.DEPENDENCY:
+                    depth = max(depth, visit_dependency(arg.default.dep, path) + 1)
+            return depth
+
+        def visit_dependency(call: typing.Callable, path: tuple) -> int:
+            if call in depths:
+                return depths[call]
+            if call in path:
+                raise Exception(f"Circular dependency: {' -> '.join(_name(c) for c in path + (call,))}")
+            node: CallPlan = CallPlan(call, plan.path, graph=False, threaded=plan.threaded)
+            depths[call] = visit(node, path + (call,))
+            nodes[call] = node
+            return depths[call]
+
+        visit(plan, ())
+        for dependency in dependencies:
+            if isinstance(dependency, Inject):
+                injections[id(dependency)] = dependency
+            else:
+                visit_dependency(dependency.dep if isinstance(dependency, Depends) else dependency, ())
+
+        if not nodes and not injections:
+            return None
+        levels: list[list[tuple[typing.Callable, CallPlan]]] = [[] for _ in range(max(depths.values(), default=-1) + 1)]
+        for call, node in nodes.items():
+            levels[depths[call]].append((call, node))
+        return cls(tuple(tuple(level) for level in levels), tuple(injections.values()))
+
+    async def resolve(self, req, params: tuple, pool=None) -> dict:
+        """evaluates every dependency of the route once, returns their values keyed by callable"""
+        from ermine.plugs.responder import Responder
+
+        for injection in self.injections:
+            if not injection.ready:
+                await injection.start()
+        values: dict = {}
+        for level in self.levels:
+            pending: list = []
+            for call, node in level:
+                arguments: dict = Responder._parse_arguments(req, node, params, values)
+                if node.is_async:
+                    pending.append((call, node.handler(**arguments)))
+                elif node.threaded and pool is not None:
+                    pending.append((call, pool.run(node.handler, **arguments)))
+                else:
+                    values[call] = node.handler(**arguments)
+            if len(pending) == 1:
+                values[pending[0][0]] = await pending[0][1]
+            elif pending:
+                results = await asyncio.gather(*(coroutine for _, coroutine in pending))
+                for (call, _), result in zip(pending, results):
+                    values[call] = result
+        return values
+
+
+def _name(call: typing.Callable) -> str:
+    return getattr(call, "__qualname__", type(call).__name__)
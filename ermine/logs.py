@@ -0,0 +1,243 @@
+import abc
+import atexit
+import collections
+import datetime
+import logging
+import sys
+import threading
+import time
+import traceback
+import typing
+
+from ermine.serialization import default_codec
+
+# queued entries are tuples, they are turned into records by the writer thread
+ACCESS: str = "access"
+ERROR: str = "error"
+LOG: str = "log"
+
+
+class Sink(abc.ABC):
+    """receives batches of records from the writer thread"""
+
+    @abc.abstractmethod
+    def write(self, records: list[dict]) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class StreamSink(Sink):
+    """writes records to a stream, stderr by default, as text lines or as JSON lines"""
+
+    def __init__(self, stream: typing.TextIO | None = None, json_lines: bool = False) -> None:
+        self.stream: typing.TextIO | None = stream
+        self.json_lines: bool = json_lines
+
+    def write(self, records: list[dict]) -> None:
+        stream: typing.TextIO = self.stream or sys.stderr
+        formatter: typing.Callable[[dict], str] = format_json if self.json_lines else format_text
+        stream.write("".join(formatter(record) + "\n" for record in records))
+        stream.flush()
+
+
+class FileSink(StreamSink):
+    """appends records to a file, as JSON lines by default"""
+
+    def __init__(self, path: str, json_lines: bool = True) -> None:
+        super().__init__(None, json_lines)
+        self.path: str = path
+
+    def write(self, records: list[dict]) -> None:
+        if self.stream is None:
+            self.stream = open(self.path, "a", encoding="utf-8")
+        super().write(records)
+
+    def close(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+def format_text(record: dict) -> str:
+    timestamp: str = datetime.datetime.fromtimestamp(record["time"]).isoformat(timespec="milliseconds")
+    if record["type"] == ACCESS:
+        route: str = f' route={record["route"]}' if record["route"] else ""
+        request_id: str = f' request_id={record["request_id"]}' if record["request_id"] else ""
+        return (f'{timestamp} {record["client"] or "-"} "{record["method"]} {record["path"]}" {record["status"]} '
+                f'{record["bytes"]}B {record["duration_ms"]}ms{route}{request_id}')
+    if record["type"] == ERROR:
+        where: str = f' during "{record["method"]} {record["path"]}"' if record["path"] else ""
+        return f'{timestamp} ERROR {record["error"]}{where}\n{record["traceback"].rstrip()}'
+    return f'{timestamp} {record["level"]} {record["logger"]}: {record["message"]}'
+
+
+def format_json(record: dict) -> str:
+    # the fastest json library installed, the writer thread shares the GIL with the event loop
+    return default_codec().encode(record).decode("utf-8")
+
+
+class AccessLog:
+    """
+    Structured access and error logging that never writes on the event loop.
+
+    The app only appends a tuple to a bounded queue, a background thread turns the entries into
+    records and hands them to the sinks in batches. When the queue is full new entries are dropped
+    and counted in `dropped`.
+
+        app = Ermine(access_log=AccessLog(sinks=[StreamSink(), FileSink("access.jsonl")]))
+        logging.getLogger("myapp").addHandler(app.access_log.handler())
+    """
+
+    def __init__(
+        self,
+        sinks: typing.Iterable[Sink] | None = None,
+        log_access: bool = True,
+        log_errors: bool = True,
+        max_queue: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+    ) -> None:
+        self.sinks: list[Sink] = list(sinks) if sinks is not None else [StreamSink()]
+        self.log_access: bool = log_access
+        self.log_errors: bool = log_errors
+        self.max_queue: int = max_queue
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.dropped: int = 0
+        self.written: int = 0
+        # deque appends and pops are atomic, the loop and the writer share it without a lock
+        self._queue: collections.deque = collections.deque()
+        self._wakeup: threading.Event = threading.Event()
+        self._stopping: bool = False
+        self._thread: threading.Thread | None = None
+        self._lock: threading.Lock = threading.Lock()
+        self._registered: bool = False
+
+    def push(self, entry: tuple, urgent: bool = False) -> bool:
+        """queues an entry for the writer thread, returns False if it was dropped"""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        self._queue.append(entry)
+        if self._thread is None:
+            self._start()
+        if urgent or len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def access(self, scope: dict, status: int, sent: int, duration: float) -> None:
+        req = scope.get("ermine.request")
+        plan = getattr(req, "plan", None)
+        client = scope.get("client")
+        self.push((ACCESS, time.time(), scope.get("method"), scope.get("path"), plan.path if plan else None,
+                   status, sent, duration, client[0] if client else None, scope.get("request_id")))
+
+    def error(self, exc: BaseException, scope: dict | None = None) -> None:
+        if not self.log_errors:
+            return
+        # the traceback is formatted by the writer thread
+        scope = scope or {}
+        self.push((ERROR, time.time(), scope.get("method"), scope.get("path"), exc), urgent=True)
+
+    def recorder(self, send: typing.Callable, started: float) -> "AccessRecorder":
+        """wraps the send channel of a request to note what its response was"""
+        return AccessRecorder(send, started)
+
+    def handler(self, level: int = logging.NOTSET) -> logging.Handler:
+        """a logging handler passing the application's log records through the same queue"""
+        return QueuedHandler(self, level)
+
+    def flush(self) -> None:
+        """writes everything queued so far, from the calling thread"""
+        with self._lock:
+            while self._queue:
+                batch: list[dict] = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._record(self._queue.popleft()))
+                for sink in self.sinks:
+                    try:
+                        sink.write(batch)
+                    except Exception:
+                        # a failing sink must neither stop the writer nor the other sinks
+                        pass
+                self.written += len(batch)
+
+    def close(self) -> None:
+        """stops the writer thread after it wrote what is queued, and closes the sinks"""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping = True
+            self._wakeup.set()
+            thread.join()
+            self._stopping = False
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="ermine-log", daemon=True)
+            self._thread.start()
+        if not self._registered:
+            # what is still queued when the process exits without a lifespan shutdown
+            atexit.register(self.close)
+            self._registered = True
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    @staticmethod
+    def _record(entry: tuple) -> dict:
+        kind: str = entry[0]
+        if kind == ACCESS:
+            _, at, method, path, route, status, sent, duration, client, request_id = entry
+            return {"type": ACCESS, "time": at, "method": method, "path": path, "route": route, "status": status,
+                    "bytes": sent, "duration_ms": round(duration * 1000, 3), "client": client,
+                    "request_id": request_id}
+        if kind == ERROR:
+            _, at, method, path, exc = entry
+            return {"type": ERROR, "time": at, "method": method, "path": path,
+                    "error": f"{type(exc).__name__}: {exc}", "traceback": "".join(traceback.format_exception(exc))}
+        _, handler, record = entry
+        return {"type": LOG, "time": record.created, "level": record.levelname, "logger": record.name,
+                "message": handler.format(record)}
+
+
+class QueuedHandler(logging.Handler):
+    """logging handler that only queues the record, it is formatted and written by the writer thread"""
+
+    def __init__(self, log: AccessLog, level: int = logging.NOTSET) -> None:
+        super().__init__(level)
+        self.log: AccessLog = log
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.log.push((LOG, self, record), urgent=record.levelno >= logging.ERROR)
+
+
+class AccessRecorder:
+    """send wrapper noting the status and the number of body bytes of a response"""
+
+    __slots__ = ("send", "status", "sent", "started")
+
+    def __init__(self, send: typing.Callable, started: float) -> None:
+        self.send: typing.Callable = send
+        self.status: int = 0
+        self.sent: int = 0
+        self.started: float = started
+
+    async def __call__(self, message: dict) -> None:
+        message_type: str = message["type"]
+        if message_type == "http.response.body":
+            self.sent += len(message.get("body", b""))
+        elif message_type == "http.response.start":
+            self.status = message["status"]
+        elif message_type == "http.response.zerocopy":
+            self.sent += message.get("count", 0)
+        await self.send(message)
@@ -0,0 +1,190 @@
+import bisect
+import time
+import typing
+
+from ermine.plugs.responder import CallPlan, Responder
+from ermine.request import BaseRequest
+from ermine.response import Response, TextResponse
+
+# request latency buckets in seconds, the same for every route so histograms can be aggregated
+DEFAULT_BUCKETS: tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# route label of requests no route matched, so scanners probing random paths don't add label values
+UNMATCHED: str = "unmatched"
+# status recorded when the client went away before the response was sent
+CLIENT_CLOSED: int = 499
+
+
+class Histogram:
+    """fixed bucket histogram, counts are kept per bucket and made cumulative when rendered"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets: tuple[float, ...] = buckets
+        # the last slot counts the observations above the highest bucket (+Inf)
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[int]:
+        total, counts = 0, []
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class RouteStats:
+    """the status counters and the latency histogram of one route and method"""
+
+    __slots__ = ("statuses", "latency")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.statuses: dict[int, int] = {}
+        self.latency: Histogram = Histogram(buckets)
+
+
+class Metrics:
+    """
+    Request counters and latency histograms per route, method and status.
+
+        app = Ermine(metrics=Metrics(phases=True))
+
+    Everything is recorded on the event loop thread between two awaits, so the counters need no locks.
+    With phases=True the time spent resolving the route, building the arguments (dependencies included),
+    running the handler, rendering the response and sending it is recorded per route as well.
+    The metrics are served in the Prometheus text format on `path`, pass path=None to only collect them.
+    """
+
+    def __init__(self, buckets: typing.Iterable[float] = DEFAULT_BUCKETS, phases: bool = False,
+                 path: str | None = "/metrics", prefix: str = "ermine") -> None:
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        self.phases: bool = phases
+        self.path: str | None = path
+        self.prefix: str = prefix
+        self.routes: dict[tuple[str, str], RouteStats] = {}
+        self.phase_latency: dict[tuple[str, str, str], Histogram] = {}
+        # values read when the metrics are rendered: name -> (help, type, read)
+        self.collectors: dict[str, tuple[str, str, typing.Callable[[], float]]] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        stats: RouteStats | None = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats(self.buckets)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        stats.latency.observe(seconds)
+
+    def observe_phase(self, method: str, route: str, phase: str, seconds: float) -> None:
+        histogram: Histogram | None = self.phase_latency.get((method, route, phase))
+        if histogram is None:
+            histogram = self.phase_latency[(method, route, phase)] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def collect(self, name: str, help: str, read: typing.Callable[[], float], kind: str = "gauge") -> None:
+        """adds a value owned by someone else, e.g. a queue depth, read each time the metrics are rendered"""
+        self.collectors[name] = (help, kind, read)
+
+    def resolver(self, resolve: typing.Callable) -> typing.Callable:
+        """wraps the router's resolve to record the resolve phase"""
+        def timed(method: str, path: str) -> tuple:
+            started: float = time.perf_counter()
+            plan, params = resolve(method, path)
+            self.observe_phase(method, plan.path if plan is not None else UNMATCHED, "resolve",
+                               time.perf_counter() - started)
+            return plan, params
+
+        return timed
+
+    async def send(self, req: BaseRequest, response: Response, scope: dict, receive, send) -> None:
+        """sends a response, recording the send phase"""
+        started: float = time.perf_counter()
+        await response(scope, receive, send)
+        self.observe_phase(req.method, req.plan.path if req.plan is not None else UNMATCHED, "send",
+                           time.perf_counter() - started)
+
+    def responder(self, pool=None) -> Responder:
+        """the responder the app uses, it records the argument, handler and render phases when enabled"""
+        return PhaseResponder(self, pool) if self.phases else Responder(pool)
+
+    def render(self) -> str:
+        """return all metrics in the Prometheus text exposition format"""
+        requests: str = f"{self.prefix}_requests_total"
+        duration: str = f"{self.prefix}_request_duration_seconds"
+        lines: list[str] = [
+            f"# HELP {requests} Total number of HTTP requests.",
+            f"# TYPE {requests} counter",
+        ]
+        routes: list = sorted(self.routes.items(), key=lambda item: item[0])
+        for (method, route), stats in routes:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f'{requests}{{method="{method.upper()}",route="{_escape(route)}",status="{status}"}} {count}')
+        lines.append(f"# HELP {duration} HTTP request latency in seconds.")
+        lines.append(f"# TYPE {duration} histogram")
+        for (method, route), stats in routes:
+            self._render_histogram(lines, duration, f'method="{method.upper()}",route="{_escape(route)}"', stats.latency)
+        if self.phases:
+            phases: str = f"{self.prefix}_request_phase_duration_seconds"
+            lines.append(f"# HELP {phases} Time spent in each phase of a HTTP request in seconds.")
+            lines.append(f"# TYPE {phases} histogram")
+            for (method, route, phase), histogram in sorted(self.phase_latency.items(), key=lambda item: item[0]):
+                labels: str = f'method="{method.upper()}",route="{_escape(route)}",phase="{phase}"'
+                self._render_histogram(lines, phases, labels, histogram)
+        for name, (help, kind, read) in self.collectors.items():
+            lines.append(f"# HELP {self.prefix}_{name} {help}")
+            lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+            lines.append(f"{self.prefix}_{name} {read():.9g}")
+        lines.append("")
+        return "\n".join(lines)
+
+    def _render_histogram(self, lines: list[str], name: str, labels: str, histogram: Histogram) -> None:
+        counts: list[int] = histogram.cumulative()
+        for bound, count in zip(self.buckets, counts):
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {counts[-1]}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.9g}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+    async def endpoint(self) -> Response:
+        return TextResponse(self.render(), headers={"cache-control": "no-store"},
+                            media_type="text/plain; version=0.0.4")
+
+
+class PhaseResponder(Responder):
+    """Responder recording how long the arguments, the handler and the rendering of each route take"""
+
+    def __init__(self, metrics: Metrics, pool=None) -> None:
+        super().__init__(pool)
+        self.metrics: Metrics = metrics
+
+    async def arguments(self, req: BaseRequest, plan: CallPlan, params: tuple) -> dict:
+        if req.scope["type"] != "http":
+            return await super().arguments(req, plan, params)
+        started: float = time.perf_counter()
+        arguments: dict = await super().arguments(req, plan, params)
+        self.metrics.observe_phase(req.method, plan.path, "arguments", time.perf_counter() - started)
+        return arguments
+
+    async def run(self, req: BaseRequest, plan: CallPlan, arguments: dict, ws: bool = False) -> Response:
+        if ws:
+            return await super().run(req, plan, arguments, ws)
+
+        clock = time.perf_counter
+        started: float = clock()
+        response: Response | typing.Any = await self.invoke(plan, arguments)
+        called: float = clock()
+        response = Responder._to_response(response, ws)
+        rendered: float = clock()
+
+        method, observe = req.method, self.metrics.observe_phase
+        observe(method, plan.path, "handler", called - started)
+        observe(method, plan.path, "render", rendered - called)
+        return response
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,4 @@
+from ermine.middleware.base import Middleware, append_headers
+from ermine.middleware.cors import CORSMiddleware
+from ermine.middleware.request_id import RequestIDMiddleware
+from ermine.middleware.compression import CompressionMiddleware
@@ -0,0 +1,32 @@
+import typing
+
+from ermine.request import BaseRequest
+
+
+class Middleware:
+    """
+    Baseclass for ASGI middlewares added with app.add_middleware(...).
+    The stack is built once when the app is frozen, each layer gets the next one as app.
+    """
+
+    def __init__(self, app: typing.Callable) -> None:
+        self.app: typing.Callable = app
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def request(scope: dict) -> BaseRequest:
+        """return the request ermine already created for this connection, headers are parsed only once"""
+        return scope["ermine.request"]
+
+
+def append_headers(send, headers: list[tuple[bytes, bytes]]) -> typing.Callable:
+    """wraps send so the given headers are added to the response"""
+    async def wrapped(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            message["headers"] = [*message.get("headers", ()), *headers]
+        await send(message)
+
+    return wrapped
+
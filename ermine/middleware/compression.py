@@ -0,0 +1,181 @@
+import asyncio
+import typing
+import zlib
+
+from ermine.middleware.base import Middleware
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# media types that are compressed already, compressing them again only costs cpu
+INCOMPRESSIBLE_PREFIXES: tuple[str, ...] = ("image/", "video/", "audio/", "font/woff")
+INCOMPRESSIBLE_TYPES: frozenset[str] = frozenset({
+    "application/zip", "application/gzip", "application/x-gzip", "application/x-brotli", "application/zstd",
+    "application/x-7z-compressed", "application/x-rar-compressed", "application/x-bzip2", "application/x-xz",
+    "application/octet-stream", "application/pdf", "application/wasm",
+})
+# svg is text and compresses well
+COMPRESSIBLE_TYPES: frozenset[str] = frozenset({"image/svg+xml"})
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """return the content codings the client accepts (q > 0)"""
+    accepted: set[str] = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        q: str = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware(Middleware):
+    """
+    Compresses responses with brotli (when installed) or gzip, as negotiated by Accept-Encoding.
+
+    Complete bodies below minimum_size and already compressed media types are sent as they are.
+    Streaming responses are compressed chunk by chunk and flushed after every chunk, so they keep
+    streaming. Bodies (or chunks) larger than offload_threshold are compressed in the default executor.
+    """
+
+    def __init__(
+        self,
+        app: typing.Callable,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        offload_threshold: int = 256 * 1024,
+        brotli_enabled: bool = True,
+    ) -> None:
+        super().__init__(app)
+        self.minimum_size: int = minimum_size
+        self.gzip_level: int = gzip_level
+        self.brotli_quality: int = brotli_quality
+        self.offload_threshold: int = offload_threshold
+        self.brotli_enabled: bool = brotli_enabled and brotli is not None
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept: str | None = self.request(scope).header("accept-encoding")
+        encoding: str | None = self.negotiate(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressingSend(self, encoding, send))
+
+    def negotiate(self, accept: str) -> str | None:
+        accepted: set[str] = accepted_encodings(accept)
+        if self.brotli_enabled and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def compressor(self, encoding: str) -> "Compressor":
+        return Compressor(encoding, self.gzip_level, self.brotli_quality)
+
+    @staticmethod
+    def compressible(headers: list) -> bool:
+        for name, value in headers:
+            name = name.lower()
+            if name in (b"content-encoding", b"content-range"):
+                # a range is a slice of the identity body, compressing it breaks resuming the download
+                return False
+            if name == b"content-type":
+                media_type: str = value.decode("latin-1").split(";", 1)[0].strip().lower()
+                if media_type in COMPRESSIBLE_TYPES:
+                    continue
+                if media_type in INCOMPRESSIBLE_TYPES or media_type.startswith(INCOMPRESSIBLE_PREFIXES):
+                    return False
+        return True
+
+
+class Compressor:
+    """incremental gzip or brotli compressor"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding: str = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool = False) -> bytes:
+        if self.encoding == "br":
+            out: bytes = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressingSend:
+    """send wrapper that holds back http.response.start until the first body message shows what to do"""
+
+    __slots__ = ("middleware", "encoding", "send", "start", "compressor")
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send) -> None:
+        self.middleware: CompressionMiddleware = middleware
+        self.encoding: str = encoding
+        self.send = send
+        self.start: dict | None = None
+        self.compressor: Compressor | None = None
+
+    async def __call__(self, message: dict) -> None:
+        message_type: str = message["type"]
+        if message_type == "http.response.start":
+            headers: list = list(message.get("headers", ()))
+            if message.get("status", 200) in (204, 206, 304) or not self.middleware.compressible(headers):
+                await self.send(message)
+                return
+            self.start = message
+            return
+
+        if self.start is None:
+            if self.compressor is not None and message_type == "http.response.body":
+                more_body: bool = message.get("more_body", False)
+                message["body"] = await self._compress(message.get("body", b""), final=not more_body)
+            await self.send(message)
+            return
+
+        start, self.start = self.start, None
+        if message_type != "http.response.body":
+            # pathsend / zerocopy bodies are sent as they are
+            await self.send(start)
+            await self.send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self.compressor = self.middleware.compressor(self.encoding)
+        compressed: bytes = await self._compress(body, final=not more_body)
+        headers = [(k, v) for k, v in start.get("headers", ())
+                   if k.lower() not in (b"content-length", b"vary", b"etag")]
+        vary: list[bytes] = [v for k, v in start.get("headers", ()) if k.lower() == b"vary"]
+        # the compressed body differs from the identity one byte for byte, a strong validator may not be shared
+        headers += [(b"etag", v if v.startswith(b"W/") else b"W/" + v) for k, v in start.get("headers", ())
+                    if k.lower() == b"etag"]
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        headers.append((b"vary", b", ".join([*vary, b"Accept-Encoding"]) if vary else b"Accept-Encoding"))
+        if not more_body:
+            headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+        await self.send({**start, "headers": headers})
+        await self.send({**message, "body": compressed})
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= self.middleware.offload_threshold:
+            return await asyncio.get_running_loop().run_in_executor(None, self.compressor.compress, body, final)
+        return self.compressor.compress(body, final)
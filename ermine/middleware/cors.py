@@ -0,0 +1,93 @@
+import typing
+
+from ermine.middleware.base import Middleware, append_headers
+from ermine.response import Response, TextResponse
+
+SAFELISTED_HEADERS: frozenset[str] = frozenset({"accept", "accept-language", "content-language", "content-type"})
+
+
+class CORSMiddleware(Middleware):
+    """
+    Answers CORS preflight requests without routing them and adds the CORS headers to responses.
+    All header values are encoded once when the middleware is created.
+    """
+
+    def __init__(
+        self,
+        app: typing.Callable,
+        allow_origins: typing.Sequence[str] = ("*",),
+        allow_methods: typing.Sequence[str] = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE"),
+        allow_headers: typing.Sequence[str] = (),
+        allow_credentials: bool = False,
+        expose_headers: typing.Sequence[str] = (),
+        max_age: int = 600,
+    ) -> None:
+        super().__init__(app)
+        self.allow_all_origins: bool = "*" in allow_origins
+        self.allow_origins: frozenset[str] = frozenset(allow_origins)
+        self.allow_methods: frozenset[str] = frozenset(m.upper() for m in allow_methods)
+        self.allow_all_headers: bool = "*" in allow_headers
+        self.allow_headers: frozenset[str] = frozenset(h.lower() for h in allow_headers) | SAFELISTED_HEADERS
+        self.allow_credentials: bool = allow_credentials
+
+        simple: list[tuple[bytes, bytes]] = []
+        if allow_credentials:
+            simple.append((b"access-control-allow-credentials", b"true"))
+        if expose_headers:
+            simple.append((b"access-control-expose-headers", ", ".join(expose_headers).encode("latin-1")))
+        self.simple_headers: list[tuple[bytes, bytes]] = simple
+        self.preflight_headers: dict[str, str] = {
+            "access-control-allow-methods": ", ".join(sorted(self.allow_methods)),
+            "access-control-max-age": str(max_age),
+        }
+        if allow_credentials:
+            self.preflight_headers["access-control-allow-credentials"] = "true"
+        if not self.allow_all_headers:
+            self.preflight_headers["access-control-allow-headers"] = ", ".join(sorted(self.allow_headers))
+        # a literal '*' is only allowed when the response does not depend on the origin
+        self.wildcard: bool = self.allow_all_origins and not allow_credentials
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = self.request(scope)
+        origin: str | None = request.header("origin")
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request.header("access-control-request-method") is not None:
+            await self.preflight(request, origin)(scope, receive, send)
+            return
+
+        if not self.is_allowed_origin(origin):
+            await self.app(scope, receive, send)
+            return
+        headers: list[tuple[bytes, bytes]] = [*self.simple_headers, self._origin_header(origin)]
+        if not self.wildcard:
+            headers.append((b"vary", b"Origin"))
+        await self.app(scope, receive, append_headers(send, headers))
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        return self.allow_all_origins or origin in self.allow_origins
+
+    def preflight(self, request, origin: str) -> Response:
+        headers: dict[str, str] = dict(self.preflight_headers)
+        method: str = request.header("access-control-request-method", "").upper()
+        requested: str = request.header("access-control-request-headers", "")
+        if not self.is_allowed_origin(origin) or method not in self.allow_methods:
+            return TextResponse("Disallowed CORS request", 400)
+        if requested:
+            if self.allow_all_headers:
+                headers["access-control-allow-headers"] = requested
+            elif any(h.strip().lower() not in self.allow_headers for h in requested.split(",")):
+                return TextResponse("Disallowed CORS headers", 400)
+        name, value = self._origin_header(origin)
+        headers[name.decode()] = value.decode("latin-1")
+        if not self.wildcard:
+            headers["vary"] = "Origin"
+        return TextResponse("OK", 200, headers=headers)
+
+    def _origin_header(self, origin: str) -> tuple[bytes, bytes]:
+        return b"access-control-allow-origin", b"*" if self.wildcard else origin.encode("latin-1")
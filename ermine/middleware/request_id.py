@@ -0,0 +1,28 @@
+import typing
+import uuid
+
+from ermine.middleware.base import Middleware, append_headers
+
+
+class RequestIDMiddleware(Middleware):
+    """
+    Gives every request an id, taken from the incoming header when present.
+    The id is stored as scope["request_id"] and echoed in the response header.
+    """
+
+    def __init__(self, app: typing.Callable, header: str = "x-request-id", trust_incoming: bool = True) -> None:
+        super().__init__(app)
+        self.header: str = header.lower()
+        self.header_raw: bytes = self.header.encode("latin-1")
+        self.trust_incoming: bool = trust_incoming
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id: str | None = self.request(scope).header(self.header) if self.trust_incoming else None
+        # ids from clients end up in logs, so only short printable ones are accepted
+        if not request_id or len(request_id) > 128 or not request_id.isprintable():
+            request_id = uuid.uuid4().hex
+        scope["request_id"] = request_id
+        await self.app(scope, receive, append_headers(send, [(self.header_raw, request_id.encode("latin-1"))]))
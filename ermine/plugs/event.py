@@ -9,6 +9,21 @@ class Events(enum.IntEnum):
     SHUTDOWN = 1
     ON_REQUEST = 2
     ON_RESPONSE = 3
+    AFTER_SEND = 4
+    WARMUP = 5
+
+
+# event names as used with app.on(...), lifespan message types are accepted as aliases
+EVENT_NAMES: dict[typing.Any, str] = {
+    Events.STARTUP: "startup",
+    Events.SHUTDOWN: "shutdown",
+    Events.ON_REQUEST: "request",
+    Events.ON_RESPONSE: "response",
+    Events.AFTER_SEND: "sent",
+    Events.WARMUP: "warmup",
+    "lifespan.startup": "startup",
+    "lifespan.shutdown": "shutdown",
+}
 
 
 class Event(typing.NamedTuple):
@@ -16,19 +31,45 @@ class Event(typing.NamedTuple):
     handler: typing.Callable
 
 
+class Hook(typing.NamedTuple):
+    handler: typing.Callable
+    is_async: bool
+
+
 class EventListener(Pluggable):
+    """
+    Dispatches events to their handlers.
+    Handlers are indexed by event name and compiled into a chain when they are added,
+    firing an event without handlers is a single dict lookup.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, pool=None) -> None:
         super().__init__()
-        self.events: typing.List[Event] = []
+        # sync handlers are run in this thread pool when given
+        self.pool = pool
+        self.events: typing.Dict[str, typing.List[Event]] = {}
+        self.chains: typing.Dict[str, typing.Tuple[Hook, ...]] = {}
 
     async def __call__(self, event: str, *args, **kwargs) -> None:
-        for ev in self.events:
-            if ev.event == event:
-                if inspect.iscoroutinefunction(ev.handler):
-                    await ev.handler(*args, **kwargs)
-                else:
-                    ev.handler(*args, **kwargs)
+        chain = self.chains.get(EVENT_NAMES.get(event, event))
+        if chain:
+            await self.run(chain, *args, **kwargs)
+
+    async def run(self, chain: typing.Tuple[Hook, ...], *args, **kwargs) -> None:
+        for hook in chain:
+            if hook.is_async:
+                await hook.handler(*args, **kwargs)
+            elif self.pool is not None:
+                await self.pool.run(hook.handler, *args, **kwargs)
+            else:
+                hook.handler(*args, **kwargs)
 
     def add(self, event: str, handler: typing.Callable):
-        self.events.append(Event(event, handler))
+        name: str = EVENT_NAMES.get(event, event)
+        self.events.setdefault(name, []).append(Event(name, handler))
+        self.chains[name] = tuple(Hook(ev.handler, inspect.iscoroutinefunction(ev.handler))
+                                  for ev in self.events[name])
+
+    def chain(self, event: str) -> typing.Tuple[Hook, ...]:
+        """return the compiled handlers of an event, empty if there are none"""
+        return self.chains.get(EVENT_NAMES.get(event, event), ())
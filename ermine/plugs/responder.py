@@ -1,44 +1,196 @@
+import dataclasses
+import enum
 import inspect
+import re
+import types
 import typing
 
+from ermine.background import BackgroundTasks
+from ermine.concurrency import ThreadPool
 from ermine.plugs import Pluggable
+from ermine.exceptions import HTTPException
+from ermine.injections import Depends, Inject, DependencyGraph
 from ermine.request import BaseRequest
-from ermine.response import Response, TextResponse, JsonResponse
+from ermine.response import Response, TextResponse, JsonResponse, StreamingResponse
+
+if typing.TYPE_CHECKING:
+    from ermine.admission import ConcurrencyLimit, RateLimit
+    from ermine.caching import CachePolicy
+
+
+_PATH_PARAM = re.compile(r"[:*]([a-zA-Z0-9._-]+)")
+
+
+class Source(enum.IntEnum):
+    """where the value of a handler parameter comes from"""
+    REQUEST = 0
+    PATH = 1
+    QUERY = 2
+    DEPENDENCY = 3
+    SINGLETON = 4
+    BACKGROUND = 5
+
+
+def _to_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+CONVERTERS: dict[type, typing.Callable[[str], typing.Any]] = {
+    int: int,
+    float: float,
+    bool: _to_bool,
+    str: str,
+}
+
+
+def _converter_of(annotation: typing.Any) -> typing.Callable[[str], typing.Any] | None:
+    """the converter of an annotation, Optional[X] and X | None convert like X"""
+    converter = CONVERTERS.get(annotation)
+    if converter is not None:
+        return converter
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        members: list = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(members) == 1:
+            return CONVERTERS.get(members[0])
+    return None
+
+
+class Argument(typing.NamedTuple):
+    name: str
+    source: Source
+    default: typing.Any
+    converter: typing.Callable[[str], typing.Any] | None
+
+    @property
+    def required(self) -> bool:
+        return self.default is inspect.Parameter.empty
+
+
+class CallPlan:
+    """
+    Everything the responder needs to know about a handler, computed once when the route is registered.
+    """
+
+    __slots__ = ("handler", "path", "is_async", "is_stream", "arguments", "path_params", "accepts_kwargs",
+                 "dependencies", "threaded", "cache", "timeout", "limit", "rate_limit")
+
+    def __init__(self, handler: typing.Callable, path: str = "", dependencies: typing.Iterable = (),
+                 graph: bool = True, threaded: bool = True, cache: "CachePolicy | None" = None,
+                 timeout: float | None = None, limit: "ConcurrencyLimit | None" = None,
+                 rate_limit: "RateLimit | None" = None) -> None:
+        self.handler: typing.Callable = handler
+        self.path: str = path
+        # sync handlers run in the thread pool unless the route opts out
+        self.threaded: bool = threaded
+        # responses of cached routes are served from the policy's cache while they are fresh
+        self.cache: CachePolicy | None = cache
+        # seconds the handler may run before it is cancelled with a 504, None uses the app's default
+        self.timeout: float | None = timeout
+        # admission of the route's requests, checked before the arguments and the body are read
+        self.limit: ConcurrencyLimit | None = limit
+        self.rate_limit: RateLimit | None = rate_limit
+        self.is_async: bool = inspect.iscoroutinefunction(handler) or inspect.iscoroutinefunction(
+            getattr(handler, "__call__", None))
+        # generator handlers are streamed to the client as they yield
+        self.is_stream: bool = inspect.isasyncgenfunction(handler) or inspect.isgeneratorfunction(handler)
+        self.path_params: tuple[str, ...] = tuple(_PATH_PARAM.findall(path))
+        self.accepts_kwargs: bool = False
+        self.arguments: tuple[Argument, ...] = self._compile(handler)
+        # dependency plans are nodes of their route's graph and have none of their own
+        self.dependencies: DependencyGraph | None = DependencyGraph.build(self, dependencies) if graph else None
+
+    def _compile(self, handler: typing.Callable) -> tuple[Argument, ...]:
+        signature = inspect.signature(handler)
+        try:
+            hints = typing.get_type_hints(handler)
+        except Exception:
+            hints = {}
+        arguments: list[Argument] = []
+        for name, parameter in signature.parameters.items():
+            if parameter.kind is inspect.Parameter.VAR_KEYWORD:
+                self.accepts_kwargs = True
+                continue
+            if parameter.kind is inspect.Parameter.VAR_POSITIONAL:
+                continue
+            annotation = hints.get(name, parameter.annotation)
+            if isinstance(parameter.default, Depends):
+                source = Source.DEPENDENCY
+            elif isinstance(parameter.default, Inject):
+                source = Source.SINGLETON
+            elif inspect.isclass(annotation) and issubclass(annotation, BaseRequest):
+                source = Source.REQUEST
+            elif annotation is BackgroundTasks:
+                source = Source.BACKGROUND
+            elif name in self.path_params:
+                source = Source.PATH
+            else:
+                source = Source.QUERY
+            arguments.append(Argument(name, source, parameter.default, _converter_of(annotation)))
+        return tuple(arguments)
 
 
 class Responder(Pluggable):
 
-    async def __call__(self, req: BaseRequest, handler: typing.Callable, params: dict, ws: bool = False) -> Response:
-        if not handler:
+    def __init__(self, pool: ThreadPool | None = None) -> None:
+        super().__init__()
+        self.pool: ThreadPool | None = pool
+
+    async def __call__(self, req: BaseRequest, plan: CallPlan, params: tuple, ws: bool = False) -> Response:
+        if not plan:
             return TextResponse("Not found", 404)
+        if ws:
+            return await self.call(req, plan, params, ws)
+        if plan.rate_limit is not None:
+            plan.rate_limit.check(req.scope)
+        if plan.limit is not None:
+            limit: ConcurrencyLimit = plan.limit
+            if not limit.try_acquire():
+                await limit.acquire()
+            try:
+                return await self._respond(req, plan, params)
+            finally:
+                limit.release()
+        return await self._respond(req, plan, params)
 
-        for k, v in params.items():
-            params[k] = v.value
-
-        arguments: dict = Responder._parse_arguments(req, Responder._get_handler_arguments(handler))
-        # populate arguments for functions with existing params
-        arguments.update(params)
-        # executing the function and passing the arguments
-        if inspect.iscoroutinefunction(handler):
-            response: Response | typing.Any = await handler(**arguments)
-            if not isinstance(response, Response):
-                if type(response) == dict:
-                    response = JsonResponse(response, 200)
-                else:
-                    if not response and ws:
-                        pass
-                    response = TextResponse(response, 200)
-            # implement handling for other response types (pydantic & dataclass)
-        else:
-            response: Response | typing.Any = handler(**arguments)
-            if not isinstance(response, Response):
-                if type(response) == dict:
-                    response = JsonResponse(response, 200)
-                else:
-                    if not response and ws:
-                        pass
-                    response = TextResponse(response, 200)
-            # implement handling for other response types (pydantic & dataclass)
+    async def _respond(self, req: BaseRequest, plan: CallPlan, params: tuple) -> Response:
+        if plan.cache is not None:
+            # the dependencies run on hits too, guards such as authentication are never skipped
+            arguments: dict = await self.arguments(req, plan, params)
+            return await plan.cache.respond(req, lambda: self.run(req, plan, arguments))
+        return await self.call(req, plan, params)
+
+    async def call(self, req: BaseRequest, plan: CallPlan, params: tuple, ws: bool = False) -> Response:
+        """runs the dependencies and the handler of a route and returns its response"""
+        return await self.run(req, plan, await self.arguments(req, plan, params), ws)
+
+    async def arguments(self, req: BaseRequest, plan: CallPlan, params: tuple) -> dict:
+        """resolves the dependencies of a route and builds the arguments of its handler"""
+        resolved: dict | None = (await plan.dependencies.resolve(req, params, self.pool)
+                                 if plan.dependencies else None)
+        return Responder._parse_arguments(req, plan, params, resolved)
+
+    async def run(self, req: BaseRequest, plan: CallPlan, arguments: dict, ws: bool = False) -> Response:
+        """calls the handler with its arguments and wraps what it returned into a response"""
+        return Responder._to_response(await self.invoke(plan, arguments), ws)
+
+    async def invoke(self, plan: CallPlan, arguments: dict) -> Response | typing.Any:
+        """runs the handler, generator handlers are streamed instead"""
+        if plan.is_stream:
+            return StreamingResponse(plan.handler(**arguments))
+        if plan.is_async:
+            return await plan.handler(**arguments)
+        if plan.threaded and self.pool is not None:
+            return await self.pool.run(plan.handler, **arguments)
+        return plan.handler(**arguments)
+
+    @staticmethod
+    def _to_response(response: typing.Any, ws: bool = False) -> Response:
+        """wraps what a handler returned into a response"""
+        if not isinstance(response, Response):
+            if type(response) in (dict, list) or Responder._is_model(response):
+                response = JsonResponse(response, 200)
+            elif response is not None or not ws:
+                response = TextResponse(response, 200)
 
         if not response and not ws:
             raise Exception("no response could be generated")
@@ -46,20 +198,53 @@ class Responder(Pluggable):
         return response
 
     @staticmethod
-    def _get_handler_arguments(handler: typing.Callable) -> list[tuple[str, inspect.Parameter]]:
-        return [(name, typ) for name, typ in list(inspect.signature(handler).parameters.items())]
+    def _is_model(response: typing.Any) -> bool:
+        """dataclasses and pydantic models are encoded by the codec directly"""
+        return (dataclasses.is_dataclass(response) or hasattr(response, "__pydantic_serializer__")
+                or hasattr(response, "__fields__"))
 
     @staticmethod
-    def _parse_arguments(req: BaseRequest, args: list[tuple[str, inspect.Parameter]]) -> dict:
+    def _parse_arguments(req: BaseRequest, plan: CallPlan, params: tuple[tuple[str, str], ...],
+                         resolved: dict | None = None) -> dict:
         temp: dict = dict()
-        for arg in args:
-            if issubclass(arg[1].annotation, BaseRequest):
-                temp[arg[0]] = req
-            # TODO add parsing for dataclasses and pydantic models
+        query = None
+        path_values: dict = dict(params)
+        for arg in plan.arguments:
+            if arg.source is Source.REQUEST:
+                temp[arg.name] = req
+                continue
+            if arg.source is Source.DEPENDENCY:
+                temp[arg.name] = resolved[arg.default.dep]
+                continue
+            if arg.source is Source.SINGLETON:
+                temp[arg.name] = arg.default.value
+                continue
+            if arg.source is Source.BACKGROUND:
+                # shared by the handler and its dependencies, the app runs them once the response was sent
+                if req.background is None:
+                    req.background = BackgroundTasks()
+                temp[arg.name] = req.background
+                continue
+            if arg.source is Source.PATH:
+                value = path_values[arg.name]
             else:
-                if arg[0] in req.query.keys():
-                    temp[arg[0]] = req.query[arg[0]]
-            value = temp.get(arg[0])
-            if not value:
-                value = arg[1].default
+                if query is None:
+                    query = req.query
+                value = query.get(arg.name)
+                if value is None:
+                    if arg.required:
+                        raise HTTPException(400, f"Bad Request: missing query parameter '{arg.name}'")
+                    temp[arg.name] = arg.default
+                    continue
+            if arg.converter is None:
+                temp[arg.name] = value
+                continue
+            try:
+                temp[arg.name] = arg.converter(value)
+            except ValueError:
+                raise HTTPException(400, f"Bad Request: invalid value for '{arg.name}'")
+        # path parameters the handler does not name explicitly are still passed through
+        if plan.accepts_kwargs:
+            for k, v in params:
+                temp.setdefault(k, v)
         return temp
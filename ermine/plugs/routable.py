@@ -5,40 +5,80 @@ import typing
 class Routable(Pluggable):
     def __init__(self) -> None:
         self.routes: list = []
+        self.children: list = []
 
-    def get(self, path: str, dependencies: list = []):
+    def get(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self.routes.append((path, handler, "get", dependencies))
+            self.routes.append((path, handler, "get", dependencies, options))
             return handler
 
         return wrapper
 
-    def post(self, path: str, dependencies: list = []):
+    def post(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self.routes.append((path, handler, "post", dependencies))
+            self.routes.append((path, handler, "post", dependencies, options))
             return handler
 
         return wrapper
 
-    def put(self, path: str, dependencies: list = []):
+    def put(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self.routes.append((path, handler, "put", dependencies))
+            self.routes.append((path, handler, "put", dependencies, options))
             return handler
 
         return wrapper
 
-    def delete(self, path: str, dependencies: list = []):
+    def delete(self, path: str, dependencies: list = [], **options):
         def wrapper(handler: typing.Callable) -> typing.Callable:
-            self.routes.append((path, handler, "delete", dependencies))
+            self.routes.append((path, handler, "delete", dependencies, options))
+            return handler
+
+        return wrapper
+
+    def patch(self, path: str, dependencies: list = [], **options):
+        def wrapper(handler: typing.Callable) -> typing.Callable:
+            self.routes.append((path, handler, "patch", dependencies, options))
+            return handler
+
+        return wrapper
+
+    def head(self, path: str, dependencies: list = [], **options):
+        def wrapper(handler: typing.Callable) -> typing.Callable:
+            self.routes.append((path, handler, "head", dependencies, options))
+            return handler
+
+        return wrapper
+
+    def route(self, path: str, dependencies: list = [], methods: list | tuple = ("get",), **options):
+        def wrapper(handler: typing.Callable) -> typing.Callable:
+            for method in methods:
+                self.routes.append((path, handler, method, dependencies, options))
+            return handler
+
+        return wrapper
+
+    def websocket(self, path: str, dependencies: list = [], **options):
+        def wrapper(handler: typing.Callable) -> typing.Callable:
+            self.routes.append((path, handler, "ws", dependencies, options))
             return handler
 
         return wrapper
 
     def mount(self, plug: Pluggable, prefix: str = None) -> bool:
-        # if isinstance(plug, StaticFiles):
-        #     self.routes.append((prefix + "/*filename", plug, "get"))
-        #     return True
-        if isinstance(plug, type(self)):
-            for route in plug.routes:
-                self.routes.append((prefix + route[0], route[1], route[2], route[3]))
+        from .static import Static
+        if isinstance(plug, Static):
+            self.routes.append((prefix + "/*filename", plug, "get", [], {}))
+            self.routes.append((prefix + "/*filename", plug, "head", [], {}))
             return True
+        if isinstance(plug, Routable):
+            # kept by reference, routes added to the child later are still picked up when flattening
+            self.children.append((prefix if prefix is not None else getattr(plug, "prefix", None) or "", plug))
+            return True
+        return False
+
+    def flatten(self, prefix: str = "") -> typing.Iterator[tuple]:
+        """yields the routes of this routable and all mounted children with their full path"""
+        for path, handler, method, dependencies, options in self.routes:
+            yield prefix + path, handler, method, dependencies, options
+        for child_prefix, child in self.children:
+            yield from child.flatten(prefix + child_prefix)
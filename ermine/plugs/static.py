@@ -1,16 +1,167 @@
+import asyncio
+import os
+import typing
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
 from mimetypes import MimeTypes
+
 from . import Pluggable
-from ermine.response import Response
+from ermine.request import Request
+from ermine.response import Response, FileResponse, TextResponse
+
+# precompressed siblings, in order of preference
+ENCODINGS: tuple[tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+
+
+class CachedFile(typing.NamedTuple):
+    mtime: int
+    size: int
+    body: bytes
+
 
 class Static(Pluggable):
-    def __init__(self, path):
+    """
+    Serves the files below a directory.
+
+    Small files are kept in a bounded LRU (invalidated when their mtime or size changes),
+    larger ones are streamed. Every response carries an ETag and Last-Modified header,
+    conditional and Range requests are answered with 304 and 206.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 16 * 1024 * 1024,
+        cache_file_limit: int = 64 * 1024,
+        precompressed: bool = False,
+    ) -> None:
         self.path: str = path
+        self.root: str = os.path.realpath(path)
+        self.cache_size: int = cache_size
+        self.cache_file_limit: int = cache_file_limit
+        self.precompressed: bool = precompressed
+        self._mime: MimeTypes = MimeTypes()
+        self._cache: OrderedDict[str, CachedFile] = OrderedDict()
+        self._cached_bytes: int = 0
+
+    async def __call__(self, req: Request, filename: str) -> Response:
+        file: str | None = self._resolve(filename)
+        stat: os.stat_result | None = self._stat(file) if file else None
+        if stat is None:
+            return TextResponse("Not found", 404)
+
+        media_type: str | None = self._mime.guess_type(file)[0] or "application/octet-stream"
+        range_header: str | None = req.header("range")
+        encoding: str | None = None
+        # ranges are served from the identity file
+        if self.precompressed and not range_header:
+            accept: str = req.header("accept-encoding", "")
+            for candidate, suffix in ENCODINGS:
+                if candidate in accept and (variant := self._stat(file + suffix)) is not None:
+                    encoding, file, stat = candidate, file + suffix, variant
+                    break
+        # every encoding is a representation of its own and gets its own validator
+        etag: str = (f'"{stat.st_mtime_ns:x}-{stat.st_size:x}-{encoding}"' if encoding
+                     else f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"')
+        headers: dict = {
+            "etag": etag,
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+            "accept-ranges": "bytes",
+        }
+        if self.precompressed:
+            headers["vary"] = "Accept-Encoding"
+        if encoding:
+            headers["content-encoding"] = encoding
+        if self._not_modified(req, etag, stat):
+            return Response(None, 304, headers=headers)
+
+        byte_range: tuple[int, int] | None = None
+        # multiple ranges are not supported, such requests get the whole file
+        if range_header and "," not in range_header and req.header("if-range", etag) == etag:
+            byte_range = self._parse_range(range_header, stat.st_size)
+            if byte_range is None:
+                headers["content-range"] = f"bytes */{stat.st_size}"
+                return Response(None, 416, headers=headers)
+
+        if byte_range is not None:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{stat.st_size}"
+            return FileResponse(file, 206, headers=headers, media_type=media_type, offset=start,
+                                length=end - start + 1)
+
+        if stat.st_size <= self.cache_file_limit:
+            body: bytes = await self._cached(file, stat)
+            return Response(body, headers=headers, media_type=media_type)
+        return FileResponse(file, headers=headers, media_type=media_type, length=stat.st_size)
+
+    def _resolve(self, filename: str) -> str | None:
+        file: str = os.path.realpath(os.path.join(self.root, filename.lstrip("/")))
+        # refuse anything that escapes the served directory
+        if file != self.root and not file.startswith(self.root + os.sep):
+            return None
+        return file
+
+    @staticmethod
+    def _stat(file: str) -> os.stat_result | None:
+        # a metadata lookup is served from the dentry cache, so it is done on the loop
+        try:
+            stat: os.stat_result = os.stat(file)
+        except OSError:
+            return None
+        return stat if os.path.isfile(file) else None
+
+    @staticmethod
+    def _not_modified(req: Request, etag: str, stat: os.stat_result) -> bool:
+        if_none_match: str | None = req.header("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since: str | None = req.header("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+        """parses a single 'bytes=' range, returns None when it cannot be satisfied"""
+        unit, _, spec = header.partition("=")
+        if unit.strip() != "bytes":
+            return None
+        start, _, end = spec.strip().partition("-")
+        try:
+            if not start:
+                length = int(end)
+                if length <= 0:
+                    return None
+                return max(size - length, 0), size - 1
+            first: int = int(start)
+            last: int = min(int(end), size - 1) if end else size - 1
+        except ValueError:
+            return None
+        if first > last or first >= size:
+            return None
+        return first, last
+
+    async def _cached(self, file: str, stat: os.stat_result) -> bytes:
+        entry: CachedFile | None = self._cache.get(file)
+        if entry is not None and entry.mtime == stat.st_mtime_ns and entry.size == stat.st_size:
+            self._cache.move_to_end(file)
+            return entry.body
+
+        body: bytes = await asyncio.get_running_loop().run_in_executor(None, self._read, file)
+        if entry is not None:
+            self._cached_bytes -= entry.size
+        self._cache[file] = CachedFile(stat.st_mtime_ns, len(body), body)
+        self._cache.move_to_end(file)
+        self._cached_bytes += len(body)
+        while self._cached_bytes > self.cache_size and self._cache:
+            self._cached_bytes -= self._cache.popitem(last=False)[1].size
+        return body
 
-    async def __call__(self, filepath: str) -> Response:
-        mime = MimeTypes()
-        file_type = mime.guess_type(self.path + filepath)
-        file: str = self.path + ("/" + filepath) if not self.path.endswith("/") else self.path + filepath
+    @staticmethod
+    def _read(file: str) -> bytes:
         with open(file, "rb") as f:
-            content = f.read()
-        response = Response(content, headers={"content-type": file_type[0]}, media_type=file_type[0])
-        return response
\ No newline at end of file
+            return f.read()
@@ -1,22 +1,36 @@
-import json
-from http.cookies import SimpleCookie
-from typing import Optional, Any, overload
+import asyncio
+from typing import Optional, Any, AsyncIterator, TYPE_CHECKING
 from urllib.parse import parse_qsl
 
 from multidict import CIMultiDict
 
 from ermine.enum import ConnectionType
+from ermine.exceptions import HTTPException, ClientDisconnect, WebSocketDisconnect
+from ermine.serialization import current_codec
+
+if TYPE_CHECKING:
+    # imported by the first request reading cookies or a form
+    from http.cookies import SimpleCookie
+    from ermine.forms import FormData, MultipartReader
 
 
 class BaseRequest:
     """class representing a basic request to the server"""
 
+    __slots__ = ("_receive", "_send", "_scope", "_req_headers", "_req_query", "_req_cookies", "plan",
+                 "background")
+
     def __init__(self, scope: dict, receive, send) -> None:
         self._receive = receive
         self._send = send
         self._scope = scope
         self._req_headers: Optional[CIMultiDict] = None
-        self._req_cookies: Optional[SimpleCookie] = None
+        self._req_query: Optional[CIMultiDict] = None
+        self._req_cookies: Optional["SimpleCookie"] = None
+        # the CallPlan of the matched route, set by the app once the request was routed
+        self.plan = None
+        # the BackgroundTasks of the request, created when a handler or dependency asks for them
+        self.background = None
 
     @property
     def path(self) -> str:
@@ -25,23 +39,36 @@ class BaseRequest:
     @property
     def headers(self) -> CIMultiDict:
         """return the headers of the request"""
-        if not self._req_headers:
+        if self._req_headers is None:
             self._req_headers = CIMultiDict(
-                [(k.decode("ascii"), v.decode("ascii")) for (k, v) in self._scope["headers"]])
+                [(k.decode("latin-1"), v.decode("latin-1")) for (k, v) in self._scope["headers"]])
         return self._req_headers
 
+    def header(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """return a single header without parsing all of them"""
+        if self._req_headers is not None:
+            return self._req_headers.get(name, default)
+        # header names are lowercased by the ASGI server
+        key: bytes = name.lower().encode("latin-1")
+        for k, v in self._scope["headers"]:
+            if k == key:
+                return v.decode("latin-1")
+        return default
+
     @property
     def client(self) -> str:
         """return the client of the request"""
         return self._scope['client']
 
     @property
-    def cookies_raw(self) -> SimpleCookie:
+    def cookies_raw(self) -> "SimpleCookie":
         """return the raw cookies of the request"""
-        if not self._req_headers:
-            self._req_headers = CIMultiDict(
-                [(k.decode("ascii"), v.decode("ascii")) for (k, v) in self._scope["headers"]])
-            self._req_cookies.load(self._req_headers.get("cookie", {}))
+        if self._req_cookies is None:
+            from http.cookies import SimpleCookie
+            self._req_cookies = SimpleCookie()
+            cookie: Optional[str] = self.header("cookie")
+            if cookie:
+                self._req_cookies.load(cookie)
         return self._req_cookies
 
     @property
@@ -57,12 +84,15 @@ class BaseRequest:
     @property
     def query(self) -> CIMultiDict[Any]:
         """return the query of the request"""
-        return CIMultiDict(parse_qsl(self.scope.get("query_string", b"").decode("utf-8")))
+        if self._req_query is None:
+            query_string: bytes = self._scope.get("query_string", b"")
+            self._req_query = CIMultiDict(parse_qsl(query_string.decode("latin-1"))) if query_string else CIMultiDict()
+        return self._req_query
 
     @property
     def type(self) -> ConnectionType:
         """return the type of the request"""
-        return ConnectionType.ws if self.scope.get("type") == "websocket" else ConnectionType.http
+        return ConnectionType.ws if self._scope.get("type") == "websocket" else ConnectionType.http
 
     async def handle(self, message):
         return NotImplemented
@@ -71,11 +101,14 @@ class BaseRequest:
 class Request(BaseRequest):
     """class representing a request"""
 
-    def __init__(self, scope: dict, receive, send) -> None:
+    __slots__ = ("max_body_size", "_body", "_stream_consumed", "_form")
+
+    def __init__(self, scope: dict, receive, send, max_body_size: int | None = None) -> None:
         super().__init__(scope, receive, send)
-        self.http_body: bytes = b""
-        self.__http_has_more_body: bool = True
-        self.__http_received_body_length: int = 0
+        self.max_body_size: int | None = max_body_size
+        self._body: bytes | None = None
+        self._stream_consumed: bool = False
+        self._form: "FormData | None" = None
 
     @property
     def method(self) -> str:
@@ -84,82 +117,221 @@ class Request(BaseRequest):
 
     async def handle(self, message) -> None:
         if message.get("type") == "http.disconnect":
-            raise Exception("Disconnect")
-
-    async def __body_iter(self):
-        if not self.type == ConnectionType.http:
-            raise Exception("Not an HTTP connection")
-        if self.__http_received_body_length > 0 and self.__http_has_more_body:
-            raise Exception("body iter is already started and is not finished")
-        if self.__http_received_body_length > 0 and not self.__http_has_more_body:
-            yield self.http_body
-
-        req_body_length: int | None = (int(self.headers.get("content-length", "0"))
-                                       if not self.headers.get("transfer-encoding") == "chunked"
-                                       else None)
-
-        while self.__http_has_more_body:
-            if req_body_length and self.__http_received_body_length > req_body_length:
-                raise Exception("body length exceeded")
-
+            raise ClientDisconnect()
+
+    async def stream(self, max_size: int | None = None) -> AsyncIterator[bytes]:
+        """yields the body chunk by chunk as it arrives, without buffering it, max_size lowers the app's limit"""
+        limit: int | None = self.max_body_size
+        if max_size is not None and (limit is None or max_size < limit):
+            limit = max_size
+        if self._body is not None:
+            if limit is not None and len(self._body) > limit:
+                raise HTTPException(413, "Request Entity Too Large")
+            yield self._body
+            return
+        if self._stream_consumed:
+            raise RuntimeError("body stream was already consumed")
+        self._stream_consumed = True
+
+        declared: str | None = self.header("content-length")
+        declared_length: int | None = int(declared) if declared and declared.isdigit() else None
+        # reject before a single byte is received when the client announces too much
+        if limit is not None and declared_length is not None and declared_length > limit:
+            raise HTTPException(413, "Request Entity Too Large")
+
+        received: int = 0
+        while True:
             message = await self._receive()
-            message_type: str = message.get("type")
             await self.handle(message)
-            if message_type != "http.request":
+            if message.get("type") != "http.request":
                 continue
             chunk: bytes = message.get("body", b"")
-            if not isinstance(chunk, bytes):
-                raise RuntimeError("Chunk is not bytes")
-            self.http_body += chunk
-            self.__http_has_more_body = message.get("more_body", False)
-            self.__http_received_body_length += len(chunk)
-            yield bytes(chunk)
-
-    async def body(self) -> bytes | dict:
-        """return the body of the request"""
-        data: bytes = b"".join([chunk async for chunk in self.__body_iter()])
+            received += len(chunk)
+            if limit is not None and received > limit:
+                raise HTTPException(413, "Request Entity Too Large")
+            if declared_length is not None and received > declared_length:
+                raise HTTPException(400, "body length exceeded")
+            if chunk:
+                yield chunk
+            if not message.get("more_body", False):
+                return
+
+    async def body(self) -> Any:
+        """return the body of the request, decoded if it was sent as json"""
+        content_type: str = self.header("content-type", "")
+        if content_type.startswith("application/json"):
+            return await self.json()
+        return await self.bytes()
+
+    async def json(self) -> Any:
+        """return the body of the request decoded as json"""
         try:
-            return json.loads(data)
-        except json.decoder.JSONDecodeError:
-            return data
+            return current_codec().decode(await self.bytes())
+        except ValueError:
+            raise HTTPException(400, "Invalid JSON body")
+
+    async def form(
+        self,
+        max_part_size: int | None = None,
+        max_field_size: int = 1024 * 1024,
+        max_fields: int = 1000,
+        spool_size: int = 1024 * 1024,
+        max_size: int | None = 16 * 1024 * 1024,
+    ) -> "FormData":
+        """
+        return the fields and files of a multipart or urlencoded body. multipart bodies are parsed
+        as they arrive, files larger than spool_size are written to a temporary file. Bodies larger
+        than max_size are rejected with 413, the files are closed once the response was sent
+        """
+        if self._form is not None:
+            return self._form
+        from ermine.forms import parse_multipart, parse_options, parse_urlencoded
+        content_type, _ = parse_options(self.header("content-type", ""))
+        if content_type == "multipart/form-data":
+            self._form = await parse_multipart(self.parts(max_part_size, max_fields, max_size), max_field_size,
+                                               spool_size)
+        elif content_type == "application/x-www-form-urlencoded":
+            self._form = parse_urlencoded(await self.bytes(max_size), max_fields)
+        else:
+            raise HTTPException(415, "Unsupported Media Type")
+        return self._form
+
+    def parts(self, max_part_size: int | None = None, max_parts: int = 1000,
+              max_size: int | None = None) -> "MultipartReader":
+        """iterates the parts of a multipart body as they arrive, for uploads too large to keep"""
+        from ermine.forms import MultipartReader, boundary_of
+        return MultipartReader(self.stream(max_size), boundary_of(self.header("content-type", "")), max_part_size,
+                               max_parts)
+
+    async def bytes(self, max_size: int | None = None) -> bytes:
+        """return the raw body of the request"""
+        if self._body is None:
+            chunks: list = [chunk async for chunk in self.stream(max_size)]
+            self._body = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        elif max_size is not None and len(self._body) > max_size:
+            raise HTTPException(413, "Request Entity Too Large")
+        return self._body
 
 
 class WebSocket(BaseRequest):
+    """
+    A websocket connection. Messages are str for text frames and bytes for binary frames,
+    receiving after the client closed the connection raises WebSocketDisconnect.
+
+        await ws.accept()
+        async for message in ws:
+            await ws.send_txt(message)
+    """
 
-    def __init__(self, scope: dict, receive, send):
+    __slots__ = ("_close_code",)
+
+    method: str = "ws"
+
+    def __init__(self, scope: dict, receive, send) -> None:
         super().__init__(scope, receive, send)
-        self.method = "ws"
+        # set once websocket.disconnect was received
+        self._close_code: int | None = None
 
-    async def accept(self) -> None:
+    async def accept(self, subprotocol: str | None = None, headers: dict | None = None) -> None:
         """accepts client on websocket"""
-        await self._send({
-            "type": "websocket.accept"
-        })
-
-    async def _receive_raw(self) -> str:
-        """retrieves whatever the websocket sends in raw"""
-        msg = await self._receive()
-        if msg["type"] == "websocket.receive":
-            return msg["text"]
-
-    async def receive_json(self) -> dict | None:
-        """parses message to json, returns none if error occurs"""
-        raw = await self._receive_raw()
-        if raw:
+        # the server announces the connection first
+        message = await self._receive()
+        if message["type"] == "websocket.disconnect":
+            self._close_code = message.get("code", 1000)
+            raise WebSocketDisconnect(self._close_code)
+        message = {"type": "websocket.accept"}
+        if subprotocol is not None:
+            message["subprotocol"] = subprotocol
+        if headers:
+            message["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+        await self._send(message)
+
+    async def receive(self) -> str | bytes:
+        """return the next message, str for text frames and bytes for binary frames"""
+        if self._close_code is not None:
+            raise WebSocketDisconnect(self._close_code)
+        while True:
+            message = await self._receive()
+            if message["type"] == "websocket.receive":
+                text = message.get("text")
+                return text if text is not None else message.get("bytes", b"")
+            if message["type"] == "websocket.disconnect":
+                self._close_code = message.get("code", 1000)
+                raise WebSocketDisconnect(self._close_code)
+
+    async def __aiter__(self) -> AsyncIterator[str | bytes]:
+        """yields the messages until the client disconnects"""
+        try:
+            while True:
+                yield await self.receive()
+        except WebSocketDisconnect:
+            return
+
+    async def receive_many(self, max_n: int = 64, timeout: float = 0.0) -> list[str | bytes]:
+        """
+        waits for the next message and returns it together with the ones arriving within timeout
+        seconds after it, at most max_n. a disconnect is raised once the collected messages were returned
+        """
+        messages: list[str | bytes] = [await self.receive()]
+        loop = asyncio.get_running_loop()
+        deadline: float = loop.time() + timeout
+        while len(messages) < max_n and self._close_code is None:
+            pending = asyncio.ensure_future(self.receive())
             try:
-                return json.loads(raw)
-            except json.decoder.JSONDecodeError:
-                return None
-
-    async def receive_text(self) -> str | None:
-        """retrieves message as plain str"""
-        return str(await self._receive_raw())
+                await asyncio.wait((pending,), timeout=max(deadline - loop.time(), 0))
+            finally:
+                # on the timeout, and when the caller is cancelled: nothing may keep reading the socket
+                if not pending.done():
+                    pending.cancel()
+            try:
+                messages.append(await pending)
+            except WebSocketDisconnect:
+                break
+            except asyncio.CancelledError:
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    # the timeout ran out
+                    break
+                raise
+        return messages
+
+    async def _receive_raw(self) -> str | bytes | None:
+        """retrieves whatever the websocket sends in raw, None once it disconnected"""
+        try:
+            return await self.receive()
+        except WebSocketDisconnect:
+            return None
+
+    async def receive_text(self) -> str:
+        """retrieves message as plain str, binary frames are decoded as utf-8"""
+        message = await self.receive()
+        return message if isinstance(message, str) else message.decode("utf-8")
+
+    async def receive_bytes(self) -> bytes:
+        """retrieves message as bytes, text frames are encoded as utf-8"""
+        message = await self.receive()
+        return message if isinstance(message, bytes) else message.encode("utf-8")
+
+    async def receive_json(self) -> Any:
+        """parses a text or binary message as json, returns none if it is not valid json"""
+        message = await self.receive()
+        try:
+            return current_codec().decode(message)
+        except ValueError:
+            return None
 
     async def send_txt(self, content: str):
         await self._send({"type": "websocket.send", "text": content})
 
-    async def send_json(self, content: dict):
-        await self._send({"type": "websocket.send", "bytes": json.dumps(content).encode("utf-8")})
+    async def send_bytes(self, content: bytes):
+        await self._send({"type": "websocket.send", "bytes": content})
+
+    async def send_json(self, content: Any, mode: str = "text"):
+        """sends content as json in a text frame, or in a binary frame with mode='binary'"""
+        encoded: bytes = current_codec().encode(content)
+        if mode == "binary":
+            await self._send({"type": "websocket.send", "bytes": encoded})
+        else:
+            await self._send({"type": "websocket.send", "text": encoded.decode("utf-8")})
 
     async def _raw_send(self, content: bytes):
         """send byte content to websocket"""
@@ -167,4 +339,4 @@ class WebSocket(BaseRequest):
 
     async def close(self, status: int = 1000, reason: str = ""):
         """closes connection to websocket"""
-        await self._send({"type": "websocket.close", "status": status, "reason": reason})
+        await self._send({"type": "websocket.close", "code": status, "reason": reason})
@@ -1,7 +1,10 @@
-from http.cookies import BaseCookie, SimpleCookie
-import json
+import asyncio
+import os
 import typing
 
+from ermine.exceptions import HTTPException
+from ermine.serialization import current_codec
+
 
 class Response:
     """
@@ -45,7 +48,7 @@ class Response:
 
         body: bytes = getattr(self, "body", b"")
         if body:
-            raw_headers.append(("Content-Length", str(len(body)).encode(self.charset)))
+            raw_headers.append((b"content-length", str(len(body)).encode(self.charset)))
         ctype: str = self.media_type
         if ctype:
             if ctype.startswith("text/"):
@@ -66,7 +69,8 @@ class Response:
         samesite: str = "lax",
     ) -> None:
         """Adds a cookie to the answer"""
-        cookie: BaseCookie = SimpleCookie()
+        from http.cookies import SimpleCookie
+        cookie: SimpleCookie = SimpleCookie()
         cookie[key] = value
         if max_age:
             cookie[key]["max-age"] = max_age
@@ -108,11 +112,230 @@ class JsonResponse(Response):
     media_type = "application/json"
 
 
-    def render(self, content: dict) -> bytes:
-        return json.dumps(content, indent=None).encode("utf-8")
+    def render(self, content: typing.Any) -> bytes:
+        return current_codec().encode(content)
 
 
 class TextResponse(Response):
     media_type = "text/plain"
 
-    
\ No newline at end of file
+
+class StreamingResponse(Response):
+    """
+    Sends the body chunk by chunk as the given (async) iterator produces it.
+    Production stops as soon as the client disconnects.
+    """
+
+    # bytes of request body kept for a handler that has not started reading it yet
+    relay_buffer: int = 64 * 1024
+
+    def __init__(
+        self,
+        content: typing.Iterable | typing.AsyncIterable,
+        status: int = 200,
+        headers: dict | None = None,
+        media_type: str | None = None,
+    ) -> None:
+        self.status: int = status
+        self.content: typing.Iterable | typing.AsyncIterable = content
+        if media_type:
+            self.media_type = media_type
+        self.body: bytes = b""
+        self.set_headers(headers)
+
+    def render(self, content: typing.Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return content
+        return content.encode(self.charset)
+
+    async def body_iterator(self) -> typing.AsyncIterator[bytes]:
+        content = self.content
+        if hasattr(content, "__aiter__"):
+            async for chunk in content:
+                yield self.render(chunk)
+        elif isinstance(content, (list, tuple)):
+            for chunk in content:
+                yield self.render(chunk)
+        else:
+            # arbitrary sync iterators may block (file reads, db cursors), so advance them off the loop
+            loop = asyncio.get_running_loop()
+            iterator = iter(content)
+            done = object()
+            while (chunk := await loop.run_in_executor(None, next, iterator, done)) is not done:
+                yield self.render(chunk)
+
+    async def _stream(self, send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": self.headers,
+            }
+        )
+        iterator = self.body_iterator()
+        try:
+            async for chunk in iterator:
+                if chunk:
+                    # awaiting send applies the server's flow control before the next chunk is produced
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            await iterator.aclose()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _listen_for_disconnect(receive, relay: "BodyRelay | None" = None) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            if relay is not None:
+                await relay.put(message)
+
+    async def __call__(self, scope, receive, send) -> None:
+        request = scope.get("ermine.request")
+        relay: BodyRelay | None = None
+        if request is not None:
+            # the listener is the only reader of the channel, the body messages it reads are passed
+            # on to the request, so a handler streaming the request body loses none of them
+            receive = request._receive
+            relay = request._receive = BodyRelay(self.relay_buffer)
+        stream = asyncio.ensure_future(self._stream(send))
+        listener = asyncio.ensure_future(self._listen_for_disconnect(receive, relay))
+        try:
+            await asyncio.wait((stream, listener), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (stream, listener):
+                task.cancel()
+            if request is not None:
+                request._receive = receive
+        await asyncio.gather(stream, listener, return_exceptions=True)
+        if stream.done() and not stream.cancelled() and stream.exception():
+            raise stream.exception()
+
+
+class BodyRelay:
+    """
+    The receive channel of a request while its streaming response is sent.
+
+    The disconnect listener is the only reader of the server's channel and passes the body messages
+    on. Up to `limit` unread bytes are kept, beyond that the listener waits for a handler reading the
+    body, so a slow consumer slows the client down. The body of a handler not reading it is discarded
+    instead, so the disconnect behind it is still seen, reading it afterwards raises 413.
+    """
+
+    __slots__ = ("limit", "messages", "buffered", "reading", "discarded")
+
+    def __init__(self, limit: int) -> None:
+        self.limit: int = limit
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.buffered: int = 0
+        self.reading: bool = False
+        self.discarded: bool = False
+
+    async def put(self, message: dict) -> None:
+        if self.discarded:
+            return
+        self.messages.put_nowait(message)
+        self.buffered += len(message.get("body", b""))
+        if self.buffered <= self.limit:
+            return
+        if self.reading:
+            await self.messages.join()
+            return
+        self.discarded = True
+        while not self.messages.empty():
+            self.messages.get_nowait()
+            self.messages.task_done()
+
+    async def __call__(self) -> dict:
+        if self.discarded:
+            raise HTTPException(413, "Request Entity Too Large")
+        self.reading = True
+        message: dict = await self.messages.get()
+        self.messages.task_done()
+        self.buffered -= len(message.get("body", b""))
+        return message
+
+
+class FileResponse(Response):
+    """
+    Sends (a range of) a file without loading it into memory.
+    Uses the ASGI pathsend or zerocopy extensions when the server offers them,
+    otherwise the file is read chunk by chunk in the default executor.
+    """
+
+    chunk_size: int = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        status: int = 200,
+        headers: dict | None = None,
+        media_type: str | None = None,
+        offset: int = 0,
+        length: int | None = None,
+    ) -> None:
+        self.status: int = status
+        self.content: str = path
+        self.path: str = path
+        if media_type:
+            self.media_type = media_type
+        self.offset: int = offset
+        self.length: int = os.stat(path).st_size - offset if length is None else length
+        self.body: bytes = b""
+        headers = dict(headers or {})
+        headers["content-length"] = str(self.length)
+        self.set_headers(headers)
+
+    async def __call__(self, scope, receive, send) -> None:
+        extensions: dict = scope.get("extensions") or {}
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status,
+                "headers": self.headers,
+            }
+        )
+        if scope.get("method") == "HEAD" or not self.length:
+            await send({"type": "http.response.body", "body": b""})
+        elif "http.response.pathsend" in extensions and self.offset == 0 and self.length == os.stat(self.path).st_size:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+        elif "http.response.zerocopy" in extensions:
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopy", "file": f, "offset": self.offset, "count": self.length})
+        else:
+            await self._send_chunks(send)
+
+    async def _send_chunks(self, send) -> None:
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, self.path, "rb")
+        try:
+            if self.offset:
+                await loop.run_in_executor(None, f.seek, self.offset)
+            remaining: int = self.length
+            while remaining > 0:
+                chunk: bytes = await loop.run_in_executor(None, f.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # the file shrank while it was being sent
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await loop.run_in_executor(None, f.close)
+
+
+class ResponseStatus:
+    """send wrapper noting the status of the response once it started"""
+
+    __slots__ = ("send", "status")
+
+    def __init__(self, send: typing.Callable) -> None:
+        self.send: typing.Callable = send
+        self.status: int = 0
+
+    async def __call__(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        await self.send(message)
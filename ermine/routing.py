@@ -0,0 +1,122 @@
+import typing
+from collections import OrderedDict
+from types import MappingProxyType
+
+from roe_teer import Roeteer
+
+from ermine.plugs.responder import CallPlan
+
+Params = tuple[tuple[str, str], ...]
+
+
+class Route(typing.NamedTuple):
+    method: str
+    path: str
+    plan: CallPlan
+
+
+class MethodTable(typing.NamedTuple):
+    """the compiled routes of a single method"""
+    static: typing.Mapping[str, CallPlan]
+    radix: typing.Any | None
+
+
+class CacheInfo(typing.NamedTuple):
+    static_hits: int
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class Router:
+    """
+    Resolves (method, path) to a call plan.
+
+    Routes are collected until freeze() compiles them into one table per method:
+    routes without parameters are answered from a dict, parameterised ones from the radix tree
+    with a bounded LRU in front of it. Resolved parameters are immutable tuples of (name, value).
+    """
+
+    def __init__(self, cache_size: int = 1024) -> None:
+        self.cache_size: int = cache_size
+        self.routes: list[Route] = []
+        self.frozen: bool = False
+        self._tables: typing.Mapping[str, MethodTable] = MappingProxyType({})
+        self._cache: OrderedDict[tuple[str, str], tuple[CallPlan, Params]] = OrderedDict()
+        self._static_hits: int = 0
+        self._hits: int = 0
+        self._misses: int = 0
+
+    def add(self, method: str, path: str, plan: CallPlan) -> None:
+        if self.frozen:
+            raise Exception(f"Cannot add route '{path}': the routes are frozen")
+        self.routes.append(Route(method, path, plan))
+
+    def freeze(self) -> None:
+        """validates all routes and compiles them into the immutable per-method tables"""
+        if self.frozen:
+            return
+        seen: dict[tuple[str, str], Route] = {}
+        static: dict[str, dict[str, CallPlan]] = {}
+        radix: Roeteer = Roeteer()
+        dynamic: set[str] = set()
+        for route in self.routes:
+            key: tuple[str, str] = (route.method, route.path)
+            if key in seen:
+                raise Exception(f"Route {route.method.upper()} '{route.path}' is registered twice "
+                                f"({_name(seen[key].plan.handler)} and {_name(route.plan.handler)})")
+            seen[key] = route
+            if ":" in route.path or "*" in route.path:
+                try:
+                    radix._get_radix(route.method).insert(route.path, route.plan)
+                except Exception as e:
+                    raise Exception(f"Route {route.method.upper()} '{route.path}' conflicts with another route: {e}")
+                dynamic.add(route.method)
+            else:
+                static.setdefault(route.method, {})[route.path] = route.plan
+
+        self._tables = MappingProxyType({
+            method: MethodTable(MappingProxyType(static.get(method, {})),
+                                radix._get_radix(method) if method in dynamic else None)
+            for method in static.keys() | dynamic
+        })
+        self._cache.clear()
+        self.frozen = True
+
+    def resolve(self, method: str, path: str) -> tuple[CallPlan | None, Params]:
+        table: MethodTable | None = self._tables.get(method)
+        if table is None:
+            return None, ()
+        plan: CallPlan | None = table.static.get(path)
+        if plan is not None:
+            self._static_hits += 1
+            return plan, ()
+        if table.radix is None:
+            return None, ()
+
+        key: tuple[str, str] = (method, path)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._hits += 1
+            self._cache.move_to_end(key)
+            return cached
+
+        self._misses += 1
+        result = table.radix.lookup(path)
+        if not result or not result.handler:
+            # unknown paths are not cached, so scans cannot evict the hot routes
+            return None, ()
+        entry: tuple[CallPlan, Params] = (result.handler[0], tuple((k, p.value) for k, p in result.params.items()))
+        if self.cache_size > 0:
+            self._cache[key] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self._static_hits, self._hits, self._misses, self.cache_size, len(self._cache))
+
+
+def _name(handler: typing.Callable) -> str:
+    return getattr(handler, "__qualname__", type(handler).__name__)
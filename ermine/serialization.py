@@ -0,0 +1,140 @@
+import dataclasses
+import json
+import sys
+import typing
+from contextvars import ContextVar
+
+
+def _pydantic_json(content: typing.Any) -> bytes | None:
+    """encodes a pydantic model straight to bytes, returns None for anything else"""
+    serializer = getattr(content, "__pydantic_serializer__", None)
+    if serializer is not None:
+        return serializer.to_json(content)
+    if hasattr(content, "__fields__") and hasattr(content, "json"):
+        return content.json().encode("utf-8")
+    return None
+
+
+def _default(obj: typing.Any) -> typing.Any:
+    """fallback for types the encoders do not know themselves"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if hasattr(obj, "__fields__") and hasattr(obj, "dict"):
+        return obj.dict()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    # an object of these types implies its module was imported already
+    datetime = sys.modules.get("datetime")
+    if datetime is not None and isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    uuid = sys.modules.get("uuid")
+    if uuid is not None and isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class Codec:
+    """
+    Turns python objects into json bytes and back.
+    """
+
+    name: str = "json"
+
+    def encode(self, content: typing.Any) -> bytes:
+        raw = _pydantic_json(content)
+        if raw is not None:
+            return raw
+        return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data: bytes | str) -> typing.Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+
+    def encode(self, content: typing.Any) -> bytes:
+        raw = _pydantic_json(content)
+        if raw is not None:
+            return raw
+        # orjson handles dataclasses, datetimes and uuids natively
+        return self._dumps(content, default=_default)
+
+    def decode(self, data: bytes | str) -> typing.Any:
+        return self._loads(data)
+
+
+class MsgspecCodec(Codec):
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+        self._encoder = msgspec.json.Encoder(enc_hook=_default)
+        self._decoder = msgspec.json.Decoder()
+        self._error = msgspec.DecodeError
+
+    def encode(self, content: typing.Any) -> bytes:
+        raw = _pydantic_json(content)
+        if raw is not None:
+            return raw
+        return self._encoder.encode(content)
+
+    def decode(self, data: bytes | str) -> typing.Any:
+        try:
+            return self._decoder.decode(data)
+        except self._error as e:
+            raise ValueError(str(e)) from e
+
+
+CODECS: dict[str, type[Codec]] = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "json": Codec,
+}
+
+
+def get_codec(serializer: str | Codec = "auto") -> Codec:
+    """
+    returns the codec for the given name. 'auto' picks the fastest installed encoder
+    """
+    if isinstance(serializer, Codec):
+        return serializer
+    if serializer == "auto":
+        for name in ("orjson", "msgspec"):
+            try:
+                return CODECS[name]()
+            except ImportError:
+                continue
+        return Codec()
+    if serializer not in CODECS:
+        raise Exception(f"Unknown serializer '{serializer}', expected one of {', '.join(CODECS)} or 'auto'")
+    return CODECS[serializer]()
+
+
+# None until an app sets its codec, e.g. outside of a request
+_codec: ContextVar[Codec | None] = ContextVar("ermine_codec", default=None)
+# picked on first use, importing ermine does not import a json library
+_fallback: Codec | None = None
+
+
+def default_codec() -> Codec:
+    """returns the fastest installed codec, the one used outside of an app"""
+    global _fallback
+    if _fallback is None:
+        _fallback = get_codec()
+    return _fallback
+
+
+def current_codec() -> Codec:
+    """returns the codec of the app handling the current request"""
+    codec: Codec | None = _codec.get()
+    return codec if codec is not None else default_codec()
+
+
+def use_codec(codec: Codec) -> None:
+    _codec.set(codec)
@@ -0,0 +1,267 @@
+import asyncio
+import gc
+import importlib
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+import typing
+
+if typing.TYPE_CHECKING:
+    from ermine.app import Ermine
+
+
+def load_app(target: str) -> "Ermine":
+    """imports 'module:attribute', the module is looked up from the current directory first"""
+    module_name, _, attribute = target.partition(":")
+    if not module_name or not attribute:
+        raise Exception(f"Expected the app as 'module:attribute', got '{target}'")
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    app = importlib.import_module(module_name)
+    for name in attribute.split("."):
+        app = getattr(app, name)
+    return app
+
+
+def bind(host: str, port: int, reuse_port: bool = False, backlog: int = 2048) -> socket.socket:
+    family: int = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock: socket.socket = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Worker(typing.NamedTuple):
+    pid: int
+    # the worker writes a byte here once it accepts connections
+    ready: int
+    started: float
+
+
+class Master:
+    """
+    Imports and warms the app once, then forks the workers serving it with uvicorn.
+
+    Everything the master built (the routing tables, the call plans, compiled templates, imported
+    modules) is shared copy-on-write with the workers. gc.freeze() moves it out of the collector's
+    reach, so a collection in a worker does not touch, and thereby copy, the shared pages.
+
+    Workers share the master's listening socket, or with reuse_port bind their own and let the
+    kernel balance the connections. A worker that dies is replaced, waiting longer each time when
+    it keeps crashing right after its start. SIGHUP restarts the workers one at a time, a new worker
+    is ready before an old one is stopped. SIGTERM and SIGINT stop them gracefully.
+    """
+
+    def __init__(self, app: "Ermine", host: str = "127.0.0.1", port: int = 8000, workers: int = 1,
+                 reuse_port: bool = False, graceful_timeout: float = 30.0, log_level: str = "info",
+                 **uvicorn_options) -> None:
+        self.app: Ermine = app
+        self.host: str = host
+        self.port: int = port
+        self.workers: int = workers
+        self.reuse_port: bool = reuse_port
+        self.graceful_timeout: float = graceful_timeout
+        self.log_level: str = log_level
+        self.uvicorn_options: dict = uvicorn_options
+        self.children: dict[int, Worker] = {}
+        self.socket: socket.socket | None = None
+        self.stopping: bool = False
+        self._signals: list[int] = []
+        self._wakeup: tuple[int, int] | None = None
+        self._backoff: float = 0.0
+
+    def warm(self) -> None:
+        """builds everything the workers would otherwise build each, and runs the 'warmup' hooks"""
+        self.app.warm()
+        gc.collect()
+        gc.freeze()
+
+    def run(self) -> None:
+        if not hasattr(os, "fork"):
+            raise Exception("ermine serve needs a platform with os.fork")
+        try:
+            # imported once here and shared with the workers
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise Exception("ermine serve needs uvicorn, install it with `pip install ermine[serve]`") from None
+        # collections before the freeze would leave holes in pages the workers then copy
+        gc.disable()
+        self.warm()
+        if not self.reuse_port:
+            self.socket = bind(self.host, self.port)
+        self._install_signals()
+        self.log(f"serving on http://{self.host}:{self.port} with {self.workers} workers")
+        for _ in range(self.workers):
+            self.spawn()
+        try:
+            self.loop()
+        finally:
+            self.stop()
+
+    def loop(self) -> None:
+        while not self.stopping:
+            select.select([self._wakeup[0]], [], [], 1.0)
+            try:
+                while os.read(self._wakeup[0], 512):
+                    pass
+            except BlockingIOError:
+                pass
+            signals, self._signals = self._signals, []
+            for signum in signals:
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    self.stopping = True
+                elif signum == signal.SIGHUP:
+                    self.restart()
+            if not self.stopping:
+                self.reap()
+                while len(self.children) < self.workers:
+                    self.spawn()
+
+    def spawn(self) -> Worker:
+        read_fd, write_fd = os.pipe()
+        pid: int = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            code: int = 1
+            try:
+                self._serve(write_fd)
+                code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        worker: Worker = Worker(pid, read_fd, time.monotonic())
+        self.children[pid] = worker
+        return worker
+
+    def reap(self) -> None:
+        """replaces the workers that exited"""
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker: Worker | None = self.children.pop(pid, None)
+            if worker is None:
+                continue
+            os.close(worker.ready)
+            self.log(f"worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+            if time.monotonic() - worker.started < 1.0:
+                # crashing on startup, e.g. a failing startup hook: do not fork in a tight loop
+                self._backoff = min(max(self._backoff * 2, 0.1), 10.0)
+                time.sleep(self._backoff)
+            else:
+                self._backoff = 0.0
+
+    def restart(self) -> None:
+        """replaces the workers one at a time, each only after its successor is ready"""
+        self.log("restarting workers")
+        for worker in list(self.children.values()):
+            successor: Worker = self.spawn()
+            if not self._wait_ready(successor, self.graceful_timeout):
+                self.log(f"worker {successor.pid} did not start, keeping worker {worker.pid}")
+                self._terminate([successor])
+                continue
+            self._terminate([worker])
+
+    def stop(self) -> None:
+        self.stopping = True
+        self._terminate(list(self.children.values()))
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def _terminate(self, workers: list[Worker]) -> None:
+        for worker in workers:
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline: float = time.monotonic() + self.graceful_timeout
+        pending: set[int] = {worker.pid for worker in workers}
+        while pending:
+            for pid in list(pending):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    pending.discard(pid)
+                    worker: Worker | None = self.children.pop(pid, None)
+                    if worker is not None:
+                        os.close(worker.ready)
+            if pending and time.monotonic() > deadline:
+                for pid in pending:
+                    os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            if pending:
+                time.sleep(0.05)
+
+    def _wait_ready(self, worker: Worker, timeout: float) -> bool:
+        readable, _, _ = select.select([worker.ready], [], [], timeout)
+        return bool(readable) and os.read(worker.ready, 1) == b"1"
+
+    def _install_signals(self) -> None:
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        os.set_blocking(write_fd, False)
+        self._wakeup = (read_fd, write_fd)
+        signal.set_wakeup_fd(write_fd)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+
+    def _on_signal(self, signum: int, frame: typing.Any) -> None:
+        self._signals.append(signum)
+
+    def _serve(self, ready_fd: int) -> None:
+        """runs in the forked worker"""
+        import uvicorn
+
+        signal.set_wakeup_fd(-1)
+        for signum in (signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        # uvicorn handles them while it serves and raises them again once it stopped
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_IGN)
+        os.close(self._wakeup[0])
+        os.close(self._wakeup[1])
+        for worker in self.children.values():
+            os.close(worker.ready)
+        gc.enable()
+
+        sock: socket.socket = self.socket if self.socket is not None else bind(self.host, self.port, reuse_port=True)
+        config = uvicorn.Config(self.app, lifespan="on", log_level=self.log_level,
+                                timeout_graceful_shutdown=self.graceful_timeout, **self.uvicorn_options)
+        server = uvicorn.Server(config)
+
+        async def serve() -> None:
+            async def announce() -> None:
+                while not server.started and not server.should_exit:
+                    await asyncio.sleep(0.01)
+                os.write(ready_fd, b"1" if server.started else b"0")
+
+            announcer: asyncio.Task = asyncio.create_task(announce())
+            await server.serve(sockets=[sock])
+            announcer.cancel()
+
+        asyncio.run(serve())
+
+    def log(self, message: str) -> None:
+        print(f"[ermine {os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+
+def serve(target: "str | Ermine", **options) -> None:
+    """serves an app, or 'module:attribute' naming one, with pre-forked workers"""
+    app: Ermine = load_app(target) if isinstance(target, str) else target
+    Master(app, **options).run()
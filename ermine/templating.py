@@ -1,13 +1,102 @@
+import os
+import time
+import typing
+
 from fuchs import FuchsTemplate as __foxt
-from ermine.response import HTMLResponse
+from ermine.response import HTMLResponse, StreamingResponse
+
+# the page, or an iterable of its parts for render functions producing it incrementally
+Page = str | typing.Iterable[str]
+
+
+class CompiledTemplate(typing.NamedTuple):
+    name: str
+    mtime_ns: int
+    render: typing.Callable[..., Page]
 
 
 class FoxTemplates(__foxt):
-    def __init__(self, dirname: str):
+    """
+    Fuchs templates of a directory.
+
+    fuchs renders a template by its name and reads and parses the file on every render. A `compiler`
+    turning the source of a template into a render function lets each template be read and parsed
+    once, e.g. `lambda source: string.Template(source).substitute`. Compiled templates are cached by
+    name. With auto_reload the file of a template is looked at again at most every check_interval
+    seconds and compiled again when it changed, freeze() stops looking at the files for production.
+    precompile() compiles the whole directory:
+
+        templates = FoxTemplates("templates", auto_reload=False, compiler=compiler)
+        app.on("startup")(templates.precompile)
+
+    stream() sends the parts of a render function yielding them as they are produced, so the first
+    byte does not wait for the rest of the page. A page rendered in one piece is sent once it is done.
+    """
+
+    def __init__(self, dirname: str, auto_reload: bool = True,
+                 compiler: typing.Callable[[str], typing.Callable[..., Page]] | None = None,
+                 check_interval: float = 1.0):
         super().__init__(dirname=dirname)
+        self.dirname: str = dirname
+        self.auto_reload: bool = auto_reload
+        self.compiler: typing.Callable[[str], typing.Callable[..., Page]] | None = compiler
+        self.check_interval: float = check_interval
+        self.templates: dict[str, CompiledTemplate] = {}
+        # when the file of each template was last looked at
+        self._checked: dict[str, float] = {}
+
+    def get_template(self, template_name: str) -> CompiledTemplate:
+        """return the compiled template, compiling it when it is new or its file changed"""
+        if self.compiler is None:
+            raise Exception("FoxTemplates needs a compiler to compile templates")
+        template: CompiledTemplate | None = self.templates.get(template_name)
+        now: float = time.monotonic()
+        if template is not None and (not self.auto_reload
+                                     or now - self._checked[template_name] < self.check_interval):
+            return template
+        # renders run on the loop: the metadata lookup is served from the dentry cache, the file is
+        # only read when it changed
+        path: str = os.path.join(self.dirname, template_name)
+        mtime_ns: int = os.stat(path).st_mtime_ns
+        self._checked[template_name] = now
+        if template is None or template.mtime_ns != mtime_ns:
+            with open(path, encoding="utf-8") as f:
+                template = CompiledTemplate(template_name, mtime_ns, self.compiler(f.read()))
+            self.templates[template_name] = template
+        return template
+
+    def precompile(self) -> int:
+        """compiles every template of the directory, return how many there are"""
+        if self.compiler is None:
+            # fuchs parses the templates when they are rendered
+            return 0
+        for root, dirs, files in os.walk(self.dirname):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for filename in files:
+                if not filename.startswith("."):
+                    self.get_template(os.path.relpath(os.path.join(root, filename), self.dirname))
+        return len(self.templates)
+
+    def freeze(self) -> None:
+        """stops checking the template files for changes"""
+        self.auto_reload = False
+
+    def page(self, template_name: str, **kwargs) -> Page:
+        if self.compiler is None:
+            return super().render(template_name, **kwargs)
+        return self.get_template(template_name).render(**kwargs)
 
-    def render(self, template_name: str, **kwargs) -> bytes:
-        html = super().render(template_name, **kwargs)
-        return HTMLResponse(html) 
+    def render(self, template_name: str, **kwargs) -> HTMLResponse:
+        page: Page = self.page(template_name, **kwargs)
+        return HTMLResponse(page if isinstance(page, str) else "".join(page))
 
+    def stream(self, template_name: str, **kwargs) -> StreamingResponse:
+        """renders the page while it is sent, in the thread pool of the response"""
+        return StreamingResponse(self.generate(template_name, **kwargs), media_type="text/html")
 
+    def generate(self, template_name: str, **kwargs) -> typing.Iterator[str]:
+        page: Page = self.page(template_name, **kwargs)
+        if isinstance(page, str):
+            yield page
+        else:
+            yield from page
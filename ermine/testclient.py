@@ -0,0 +1,235 @@
+import asyncio
+import typing
+from urllib.parse import urlencode
+
+from multidict import CIMultiDict
+
+from ermine.serialization import get_codec
+
+
+class TestResponse:
+    """the collected response of a request sent through the TestClient"""
+
+    __test__ = False
+
+    def __init__(self, status: int, headers: list[tuple[bytes, bytes]], body: bytes, messages: list[dict]) -> None:
+        self.status: int = status
+        self.raw_headers: list[tuple[bytes, bytes]] = headers
+        self.headers: CIMultiDict = CIMultiDict((k.decode("latin-1"), v.decode("latin-1")) for k, v in headers)
+        self.body: bytes = body
+        self.messages: list[dict] = messages
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8")
+
+    def json(self) -> typing.Any:
+        return get_codec().decode(self.body)
+
+
+class WebSocketSession:
+    """the client side of a websocket connection opened with TestClient.websocket"""
+
+    def __init__(self, app: typing.Callable, scope: dict) -> None:
+        self._app = app
+        self._scope = scope
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._to_client: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "WebSocketSession":
+        self._task = asyncio.ensure_future(self._app(self._scope, self._to_app.get, self._to_client.put))
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self.receive()
+        if message["type"] != "websocket.accept":
+            raise Exception(f"websocket was not accepted: {message}")
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self._task, 1)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+
+    async def send_text(self, text: str) -> None:
+        await self._to_app.put({"type": "websocket.receive", "text": text})
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._to_app.put({"type": "websocket.receive", "bytes": data})
+
+    async def send_json(self, content: typing.Any) -> None:
+        await self.send_text(get_codec().encode(content).decode("utf-8"))
+
+    async def receive(self) -> dict:
+        getter = asyncio.ensure_future(self._to_client.get())
+        done, _ = await asyncio.wait((getter, self._task), return_when=asyncio.FIRST_COMPLETED)
+        if getter in done:
+            return getter.result()
+        getter.cancel()
+        # the app finished (or failed) without sending anything else
+        self._task.result()
+        return {"type": "websocket.close", "code": 1000}
+
+    async def receive_message(self) -> dict:
+        """the next websocket.send message, raises when the app closed the connection instead"""
+        message = await self.receive()
+        if message["type"] != "websocket.send":
+            raise Exception(f"websocket closed: {message}")
+        return message
+
+    async def receive_text(self) -> str:
+        message = await self.receive_message()
+        return message.get("text") if message.get("text") is not None else message["bytes"].decode("utf-8")
+
+    async def receive_bytes(self) -> bytes:
+        message = await self.receive_message()
+        return message.get("bytes") if message.get("bytes") is not None else message["text"].encode("utf-8")
+
+    async def receive_json(self) -> typing.Any:
+        message = await self.receive_message()
+        return get_codec().decode(message.get("text") or message.get("bytes"))
+
+
+class TestClient:
+    """
+    Drives an ASGI app in-process, without a server or a socket.
+
+        client = TestClient(app)
+        async with client:  # runs the lifespan startup and shutdown
+            response = await client.get("/users/1", query={"verbose": "1"})
+    """
+
+    __test__ = False
+
+    def __init__(self, app: typing.Callable, headers: dict | None = None,
+                 client: tuple[str, int] = ("127.0.0.1", 50000), extensions: dict | None = None) -> None:
+        self.app: typing.Callable = app
+        self.headers: list[tuple[bytes, bytes]] = _encode_headers(headers)
+        self.client: tuple[str, int] = client
+        self.extensions: dict = extensions or {}
+        self._lifespan: asyncio.Task | None = None
+        self._lifespan_in: asyncio.Queue | None = None
+        self._lifespan_out: asyncio.Queue | None = None
+
+    async def __aenter__(self) -> "TestClient":
+        self._lifespan_in, self._lifespan_out = asyncio.Queue(), asyncio.Queue()
+        self._lifespan = asyncio.ensure_future(
+            self.app({"type": "lifespan", "asgi": {"version": "3.0"}}, self._lifespan_in.get, self._lifespan_out.put))
+        await self._lifespan_in.put({"type": "lifespan.startup"})
+        message = await self._lifespan_out.get()
+        if message["type"] != "lifespan.startup.complete":
+            raise Exception(f"lifespan startup failed: {message.get('message', '')}")
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._lifespan_in.put({"type": "lifespan.shutdown"})
+        await self._lifespan_out.get()
+        await self._lifespan
+
+    def scope(self, kind: str, method: str, path: str, query: str | dict | None, headers: dict | None) -> dict:
+        path, _, query_string = path.partition("?")
+        if query:
+            query_string = query if isinstance(query, str) else urlencode(query, doseq=True)
+        return {
+            "type": kind,
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method.upper(),
+            "scheme": "http" if kind == "http" else "ws",
+            "path": path,
+            "raw_path": path.encode("latin-1"),
+            "root_path": "",
+            "query_string": query_string.encode("latin-1"),
+            "headers": [*self.headers, *_encode_headers(headers)],
+            "client": self.client,
+            "server": ("testserver", 80),
+            "extensions": dict(self.extensions),
+        }
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        query: str | dict | None = None,
+        headers: dict | None = None,
+        body: bytes | str | typing.Iterable[bytes] = b"",
+        json: typing.Any = None,
+    ) -> TestResponse:
+        """sends one request, an iterable body is sent as one http.request message per chunk"""
+        headers = dict(headers or {})
+        if json is not None:
+            body = get_codec().encode(json)
+            headers.setdefault("content-type", "application/json")
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if isinstance(body, (bytes, bytearray)):
+            headers.setdefault("content-length", str(len(body)))
+            chunks: list[bytes] = [bytes(body)]
+        else:
+            chunks = list(body) or [b""]
+        scope = self.scope("http", method, path, query, headers)
+
+        messages: list[dict] = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+                                for i, chunk in enumerate(chunks)]
+        messages.reverse()
+        complete: asyncio.Event = asyncio.Event()
+        sent: list[dict] = []
+
+        async def receive() -> dict:
+            if messages:
+                return messages.pop()
+            # nothing more to send, the client "disconnects" once the response is complete
+            await complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            sent.append(message)
+            if message["type"] == "http.response.pathsend":
+                with open(message["path"], "rb") as f:
+                    sent[-1] = {"type": "http.response.body", "body": f.read()}
+                complete.set()
+            elif message["type"] == "http.response.zerocopy":
+                message["file"].seek(message.get("offset", 0))
+                sent[-1] = {"type": "http.response.body", "body": message["file"].read(message.get("count", -1))}
+                if not message.get("more_body", False):
+                    complete.set()
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                complete.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            complete.set()
+        start: dict = next((m for m in sent if m["type"] == "http.response.start"), {"status": 500, "headers": []})
+        body_bytes: bytes = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+        return TestResponse(start["status"], list(start.get("headers", [])), body_bytes, sent)
+
+    async def get(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("get", path, **kwargs)
+
+    async def head(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("head", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("post", path, **kwargs)
+
+    async def put(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("put", path, **kwargs)
+
+    async def patch(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("patch", path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("delete", path, **kwargs)
+
+    async def options(self, path: str, **kwargs) -> TestResponse:
+        return await self.request("options", path, **kwargs)
+
+    def websocket(self, path: str, query: str | dict | None = None, headers: dict | None = None) -> WebSocketSession:
+        """opens a websocket connection, use as `async with client.websocket("/ws") as ws:`"""
+        return WebSocketSession(self.app, self.scope("websocket", "get", path, query, headers))
+
+
+def _encode_headers(headers: dict | None) -> list[tuple[bytes, bytes]]:
+    return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
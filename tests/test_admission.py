@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from ermine import Ermine
+from ermine.admission import ConcurrencyLimit, RateLimit
+from ermine.exceptions import HTTPException
+from ermine.testclient import TestClient
+
+
+def test_limit_queues_and_hands_over():
+    async def run():
+        limit = ConcurrencyLimit(1, max_queue=1)
+        await limit.acquire()
+        waiting = asyncio.ensure_future(limit.acquire())
+        await asyncio.sleep(0)
+        assert limit.queued == 1
+        try:
+            await limit.acquire()
+        except HTTPException as e:
+            rejected = e
+        limit.release()
+        await waiting
+        assert (limit.inflight, limit.queued) == (1, 0)
+        limit.release()
+        return limit, rejected
+
+    limit, rejected = asyncio.run(run())
+    assert limit.inflight == 0
+    assert rejected.status == 503
+    assert rejected.headers == {"retry-after": "1"}
+    assert limit.rejected == 1
+
+
+def test_app_sheds_load_before_routing():
+    app = Ermine(limit=ConcurrencyLimit(1, max_queue=1, retry_after=3))
+
+    @app.get("/work")
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        client = TestClient(app)
+        return await asyncio.gather(*(client.get("/work") for _ in range(3)))
+
+    responses = asyncio.run(run())
+    assert sorted(response.status for response in responses) == [200, 200, 503]
+    shed = next(response for response in responses if response.status == 503)
+    assert shed.headers["retry-after"] == "3"
+    assert app.limit.inflight == 0
+
+
+def test_route_limit_and_queue_timeout():
+    app = Ermine()
+
+    @app.get("/render", limit=ConcurrencyLimit(1, max_queue=5, queue_timeout=0.01))
+    async def render():
+        await asyncio.sleep(0.05)
+        return "page"
+
+    async def run():
+        client = TestClient(app)
+        return await asyncio.gather(client.get("/render"), client.get("/render"))
+
+    statuses = [response.status for response in asyncio.run(run())]
+    assert statuses == [200, 503]
+
+
+def test_rate_limit_by_header():
+    app = Ermine()
+
+    @app.post("/login", rate_limit=RateLimit(rate=0.5, burst=2, key="x-api-key"))
+    async def login():
+        return "ok"
+
+    async def run():
+        client = TestClient(app)
+        first = [await client.post("/login", headers={"x-api-key": "a"}) for _ in range(3)]
+        other = await client.post("/login", headers={"x-api-key": "b"})
+        return first, other
+
+    first, other = asyncio.run(run())
+    assert [response.status for response in first] == [200, 200, 429]
+    assert first[2].headers["retry-after"] == "2"
+    assert other.status == 200
+
+
+def test_idle_buckets_are_evicted():
+    limiter = RateLimit(rate=1, idle=10, max_buckets=2)
+    for host in ("a", "b", "c"):
+        limiter.check({"client": (host, 1)})
+    # the oldest bucket made room for the third
+    assert list(limiter.buckets) == ["b", "c"]
+    limiter.buckets["b"][1] -= 20
+    assert limiter.evict() == 1
+    assert list(limiter.buckets) == ["c"]
+
+
+def test_rate_limit_arguments_are_validated():
+    for options in ({"rate": 0}, {"rate": -1}, {"rate": 1, "burst": 0.5}):
+        with pytest.raises(Exception, match="RateLimit"):
+            RateLimit(**options)
@@ -0,0 +1,110 @@
+import asyncio
+import contextvars
+import threading
+
+from ermine import BackgroundTasks, Ermine
+from ermine.background import BackgroundRunner
+from ermine.injections import Depends
+from ermine.metrics import Metrics
+from ermine.serialization import Codec, current_codec
+from ermine.testclient import TestClient
+
+
+def test_tasks_run_after_the_response():
+    app = Ermine()
+    events = []
+
+    def audit(action):
+        events.append((action, threading.current_thread() is not threading.main_thread()))
+
+    async def notify(user):
+        events.append(("notify", user))
+
+    async def tracked(tasks: BackgroundTasks):
+        tasks.add_task(audit, "dependency")
+        return True
+
+    @app.post("/orders")
+    async def order(tasks: BackgroundTasks, ok=Depends(tracked)):
+        tasks.add_task(notify, "leo")
+        events.append("handler")
+        return {"ok": ok}
+
+    async def run():
+        async with TestClient(app) as client:
+            response = await client.post("/orders")
+            # nothing ran before the response was sent
+            assert events == ["handler"]
+            return response
+
+    response = asyncio.run(run())
+    assert response.json() == {"ok": True}
+    # the lifespan shutdown waited for the tasks, the sync one ran in the thread pool
+    assert events == ["handler", ("dependency", True), ("notify", "leo")]
+    assert app.background.completed == 1
+
+
+def test_runner_limit_and_drain():
+    async def run():
+        runner = BackgroundRunner(limit=2, max_pending=3)
+        release = asyncio.Event()
+        for _ in range(4):
+            tasks = BackgroundTasks()
+            tasks.add_task(release.wait)
+            runner.submit(tasks)
+        await asyncio.sleep(0)
+        assert (runner.running, runner.queued, runner.dropped) == (2, 1, 1)
+        release.set()
+        await runner.drain()
+        return runner.stats()
+
+    stats = asyncio.run(run())
+    assert (stats.running, stats.queued, stats.completed) == (0, 0, 3)
+
+
+def test_drain_cancels_after_timeout_and_failures_are_counted():
+    errors = []
+
+    async def run():
+        runner = BackgroundRunner(on_error=errors.append)
+        for func in (asyncio.Event().wait, lambda: 1 / 0):
+            tasks = BackgroundTasks()
+            tasks.add_task(func)
+            runner.submit(tasks)
+        await runner.drain(timeout=0.05)
+        return runner
+
+    runner = asyncio.run(run())
+    assert runner.failed == 1
+    assert isinstance(errors[0], ZeroDivisionError)
+    assert runner.running == 0
+
+
+def test_metrics_report_background_tasks():
+    app = Ermine(metrics=Metrics())
+    response = asyncio.run(TestClient(app).get("/metrics"))
+    assert "ermine_background_tasks_queued 0" in response.text
+    assert "# TYPE ermine_background_tasks_completed_total counter" in response.text
+
+
+def test_lifespan_hooks_and_tasks_use_the_apps_codec():
+    codec = Codec()
+    app = Ermine(serializer=codec)
+    seen = []
+
+    @app.on("startup")
+    async def startup():
+        seen.append(current_codec() is codec)
+
+    def task():
+        seen.append(current_codec() is codec)
+
+    async def run():
+        async with TestClient(app) as client:
+            tasks = BackgroundTasks()
+            tasks.add_task(task)
+            # submitted from a context that never saw the app's codec
+            contextvars.Context().run(app.background.submit, tasks)
+
+    asyncio.run(run())
+    assert seen == [True, True]
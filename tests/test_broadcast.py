@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from ermine import Ermine
+from ermine.broadcast import Broadcast, BroadcastBackend
+from ermine.request import WebSocket
+from ermine.testclient import TestClient
+
+
+def test_publish_to_websockets():
+    broadcast = Broadcast()
+    app = Ermine()
+
+    @app.websocket("/live")
+    async def live(ws: WebSocket):
+        await ws.accept()
+        await broadcast.serve(ws, "dashboard")
+
+    client = TestClient(app)
+
+    async def run():
+        async with client.websocket("/live") as first, client.websocket("/live") as second:
+            await asyncio.sleep(0)
+            assert broadcast.subscribers("dashboard") == 2
+            await broadcast.publish("dashboard", {"cpu": 0.5})
+            await broadcast.publish("other", "ignored")
+            await broadcast.publish("dashboard", "plain")
+            assert await first.receive_json() == {"cpu": 0.5}
+            assert await second.receive_json() == {"cpu": 0.5}
+            assert await first.receive_text() == "plain"
+            assert await second.receive_text() == "plain"
+        await asyncio.sleep(0)
+        assert broadcast.subscribers("dashboard") == 0
+        assert "dashboard" not in broadcast.channels
+
+    asyncio.run(run())
+
+
+def test_encoded_once():
+    broadcast = Broadcast()
+    received = []
+
+    class Socket:
+        async def _send(self, message):
+            received.append(message)
+
+    async def run():
+        async with broadcast.subscribe(Socket(), "a"), broadcast.subscribe(Socket(), "a"):
+            await broadcast.publish("a", {"x": 1})
+            await asyncio.sleep(0)
+        assert len(received) == 2
+        assert received[0] is received[1]
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("policy, expected, code", [
+    ("drop_oldest", ["3", "4"], None),
+    ("drop_newest", ["1", "2"], None),
+    ("disconnect", [], 1008),
+])
+def test_slow_consumer(policy, expected, code):
+    broadcast = Broadcast(max_queue=2, policy=policy)
+    sent = []
+
+    class Socket:
+        async def _send(self, message):
+            sent.append(message)
+
+    async def run():
+        async with broadcast.subscribe(Socket(), "a") as subscriber:
+            # the sender task has not run yet, so the queue fills up
+            for i in range(1, 5):
+                await broadcast.publish("a", str(i))
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            return subscriber
+
+    subscriber = asyncio.run(run())
+    texts = [m["text"] for m in sent if m["type"] == "websocket.send"]
+    assert texts == expected
+    assert subscriber.close_code == code
+    if code:
+        assert sent[-1] == {"type": "websocket.close", "code": 1008}
+    else:
+        assert subscriber.dropped == 2
+
+
+def test_backends_must_implement_the_transport():
+    class Incomplete(BroadcastBackend):
+        async def publish(self, channel, message):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
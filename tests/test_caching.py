@@ -0,0 +1,116 @@
+import asyncio
+
+from ermine import Ermine, Request
+from ermine.caching import CachePolicy
+from ermine.exceptions import HTTPException
+from ermine.injections import Depends
+from ermine.response import TextResponse
+from ermine.testclient import TestClient
+
+
+def test_cached_response_and_etag():
+    calls = []
+    policy = CachePolicy(ttl=60, vary=["accept-language"], query=["page"])
+    app = Ermine()
+
+    @app.get("/items", cache=policy)
+    async def items(page: int = 1, other: str = ""):
+        calls.append(page)
+        return {"page": page}
+
+    client = TestClient(app)
+
+    async def run():
+        first = await client.get("/items", query={"page": "1"})
+        second = await client.get("/items", query={"page": "1", "other": "ignored"})
+        assert first.body == second.body == b'{"page":1}'
+        etag = first.headers["etag"]
+        assert second.headers["etag"] == etag
+        assert first.headers["vary"] == "accept-language"
+
+        not_modified = await client.get("/items", query={"page": "1"}, headers={"if-none-match": f"W/{etag}"})
+        assert not_modified.status == 304
+        assert not_modified.body == b""
+        assert not_modified.headers["etag"] == etag
+
+        await client.get("/items", query={"page": "2"})
+        await client.get("/items", query={"page": "1"}, headers={"accept-language": "de"})
+
+    asyncio.run(run())
+    assert calls == [1, 2, 1]
+    info = policy.cache_info()
+    assert (info.hits, info.misses, info.not_modified, info.currsize) == (2, 3, 1, 3)
+
+
+def test_concurrent_misses_are_coalesced():
+    calls = []
+    app = Ermine()
+
+    @app.get("/slow", cache=CachePolicy(ttl=60))
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    client = TestClient(app)
+
+    async def run():
+        return await asyncio.gather(*(client.get("/slow") for _ in range(10)))
+
+    responses = asyncio.run(run())
+    assert calls == [1]
+    assert {r.text for r in responses} == {"done"}
+
+
+def test_uncacheable_responses():
+    calls = []
+    app = Ermine()
+
+    @app.get("/cookie", cache=CachePolicy(ttl=60))
+    async def cookie():
+        calls.append(1)
+        response = TextResponse("hi")
+        response.set_cookie("session", "abc")
+        return response
+
+    @app.get("/expired", cache=CachePolicy(ttl=0))
+    async def expired():
+        calls.append(2)
+        return "hi"
+
+    client = TestClient(app)
+
+    async def run():
+        for _ in range(2):
+            await client.get("/cookie")
+            await client.get("/expired")
+
+    asyncio.run(run())
+    assert calls == [1, 2, 1, 2]
+
+
+def test_dependencies_guard_cache_hits():
+    calls = []
+    app = Ermine()
+
+    def auth(req: Request):
+        if req.header("authorization") != "Bearer secret":
+            raise HTTPException(401, "Unauthorized")
+
+    @app.get("/private", dependencies=[Depends(auth)], cache=CachePolicy(ttl=60))
+    async def private():
+        calls.append(1)
+        return {"secret": 42}
+
+    client = TestClient(app)
+
+    async def run():
+        authorized = await client.get("/private", headers={"authorization": "Bearer secret"})
+        assert authorized.status == 200
+        anonymous = await client.get("/private")
+        assert anonymous.status == 401
+        assert anonymous.body != authorized.body
+        assert (await client.get("/private", headers={"authorization": "Bearer secret"})).status == 200
+
+    asyncio.run(run())
+    assert calls == [1]
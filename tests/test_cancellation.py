@@ -0,0 +1,85 @@
+import asyncio
+
+from ermine import Ermine, Request
+from ermine.testclient import TestClient
+
+
+def make_app(**options):
+    app = Ermine(**options)
+    app.supervisor.grace = 0
+    app.supervisor.interval = 0.01
+    return app
+
+
+def test_timeout_returns_504():
+    app = make_app(timeout=0.05)
+    cancelled = []
+
+    @app.get("/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    @app.get("/patient", timeout=0)
+    async def patient():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def run():
+        client = TestClient(app)
+        return await client.get("/slow"), await client.get("/patient")
+
+    slow, patient = asyncio.run(run())
+    assert slow.status == 504
+    assert cancelled == [True]
+    assert patient.text == "done"
+    assert app.supervisor.timed_out == 1
+
+
+def test_disconnect_cancels_handler():
+    app = make_app()
+    finished = []
+
+    @app.get("/report")
+    async def report():
+        await asyncio.sleep(10)
+        finished.append(True)
+        return "report"
+
+    async def run():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = TestClient(app).scope("http", "GET", "/report", None, None)
+        await asyncio.wait_for(app(scope, receive, send), 1)
+        return sent
+
+    assert asyncio.run(run()) == []
+    assert finished == []
+    assert app.supervisor.disconnected == 1
+
+
+def test_body_read_after_watching_started():
+    app = make_app()
+
+    @app.post("/echo")
+    async def echo(req: Request):
+        # the connection is watched by now
+        await asyncio.sleep(0.05)
+        return await req.bytes()
+
+    response = asyncio.run(TestClient(app).post("/echo", body=[b"hello ", b"world"]))
+    assert response.body == b"hello world"
+    assert app.supervisor.disconnected == 0
@@ -0,0 +1,92 @@
+import asyncio
+import gzip
+
+from ermine import Ermine
+from ermine.middleware import CompressionMiddleware
+from ermine.response import Response
+
+
+def call(app: Ermine, path: str, accept: str | None = "gzip") -> tuple[dict, bytes, list]:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    headers = [(b"accept-encoding", accept.encode())] if accept else []
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": headers}
+    asyncio.run(app(scope, receive, send))
+    return dict(sent[0]["headers"]), b"".join(m.get("body", b"") for m in sent[1:]), sent
+
+
+def make_app() -> Ermine:
+    app = Ermine()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, offload_threshold=1000)
+
+    @app.get("/big")
+    def big():
+        return {"items": ["x" * 10] * 200}
+
+    @app.get("/small")
+    def small():
+        return "tiny"
+
+    @app.get("/png")
+    def png():
+        return Response(b"\x89PNG" * 100, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream():
+        for i in range(3):
+            yield "line %d\n" % i * 50
+
+    return app
+
+
+def test_large_bodies_are_compressed():
+    app = make_app()
+    headers, body, _ = call(app, "/big")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert int(headers[b"content-length"]) == len(body)
+    assert gzip.decompress(body).startswith(b'{"items":["xxxxxxxxxx"')
+
+
+def test_small_incompressible_and_unaccepted_bodies_are_untouched():
+    app = make_app()
+    assert b"content-encoding" not in call(app, "/small")[0]
+    assert b"content-encoding" not in call(app, "/png")[0]
+    assert b"content-encoding" not in call(app, "/big", accept="gzip;q=0, identity")[0]
+    assert b"content-encoding" not in call(app, "/big", accept=None)[0]
+
+
+def test_streams_are_compressed_incrementally():
+    headers, body, sent = call(make_app(), "/stream")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert len(sent) == 5
+    # every chunk is flushed, so each one can be decoded as soon as it arrives
+    decoder = gzip.zlib.decompressobj(31)
+    assert decoder.decompress(sent[1]["body"]) == b"line 0\n" * 50
+    assert gzip.decompress(body) == b"".join(b"line %d\n" % i * 50 for i in range(3))
+
+
+def test_ranges_are_untouched_and_etags_weakened():
+    app = make_app()
+
+    @app.get("/partial")
+    def partial():
+        return Response(b"x" * 1000, 206, {"content-range": "bytes 0-999/200000"}, media_type="text/plain")
+
+    @app.get("/tagged")
+    def tagged():
+        return Response(b"x" * 1000, headers={"etag": '"v1"'}, media_type="text/plain")
+
+    headers, body, _ = call(app, "/partial")
+    assert b"content-encoding" not in headers
+    assert body == b"x" * 1000
+    headers, body, _ = call(app, "/tagged")
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"etag"] == b'W/"v1"'
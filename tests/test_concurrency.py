@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+from ermine import Ermine
+from ermine.concurrency import ThreadPool
+
+
+def call(app: Ermine, path: str) -> bytes:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""}
+    asyncio.run(app(scope, None, send))
+    return sent[1]["body"]
+
+
+def test_sync_handlers_run_in_the_pool():
+    app = Ermine()
+    loop_thread = threading.get_ident()
+
+    @app.get("/threaded")
+    def threaded():
+        return {"on_loop": threading.get_ident() == loop_thread}
+
+    @app.get("/inline", threaded=False)
+    def inline():
+        return {"on_loop": threading.get_ident() == loop_thread}
+
+    assert call(app, "/threaded") == b'{"on_loop":false}'
+    assert call(app, "/inline") == b'{"on_loop":true}'
+    assert app.thread_pool.stats().completed == 1
+
+
+def test_pool_limits_concurrency():
+    pool = ThreadPool(max_workers=4, limit=2)
+    depth = []
+
+    def work():
+        time.sleep(0.02)
+
+    async def run():
+        tasks = [asyncio.ensure_future(pool.run(work)) for _ in range(5)]
+        await asyncio.sleep(0.005)
+        depth.append(pool.stats())
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert (depth[0].running, depth[0].waiting) == (2, 3)
+    assert pool.stats().completed == 5
+    pool.shutdown()
+
+
+def test_cancelled_callers_keep_their_slot_until_the_thread_is_done():
+    pool = ThreadPool(max_workers=4, limit=1)
+    release = threading.Event()
+
+    async def run():
+        slow = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        slow.cancel()
+        await asyncio.sleep(0.01)
+        # the thread still runs, so the next call has to wait
+        assert (pool.running, pool._semaphore.locked()) == (1, True)
+        queued = asyncio.ensure_future(pool.run(lambda: "done"))
+        await asyncio.sleep(0.01)
+        assert pool.waiting == 1
+        release.set()
+        return await queued
+
+    assert asyncio.run(run()) == "done"
+    pool.shutdown()
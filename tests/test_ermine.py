@@ -0,0 +1,5 @@
+from ermine import __version__
+
+
+def test_version():
+    assert __version__ == '0.4.4'
@@ -0,0 +1,50 @@
+import asyncio
+
+from ermine import Ermine
+from ermine.plugs.event import EventListener, Events
+
+
+def test_events_are_indexed_and_aliased():
+    listener = EventListener()
+    fired = []
+
+    async def on_start():
+        fired.append("async")
+
+    listener.add("lifespan.startup", on_start)
+    listener.add(Events.STARTUP, lambda: fired.append("sync"))
+    assert [hook.is_async for hook in listener.chain("startup")] == [True, False]
+    asyncio.run(listener("startup"))
+    asyncio.run(listener("unknown"))
+    assert fired == ["async", "sync"]
+
+
+def test_request_hooks():
+    app = Ermine()
+    seen = []
+
+    @app.get("/")
+    def index():
+        return "ok"
+
+    @app.on("request")
+    def before(req):
+        seen.append(("request", req.path))
+
+    @app.on(Events.ON_RESPONSE)
+    async def after(req, resp):
+        resp.headers.append((b"x-hooked", b"1"))
+
+    @app.on("sent")
+    def sent(req, resp):
+        seen.append(("sent", resp.status))
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""}
+    asyncio.run(app(scope, None, send))
+    assert seen == [("request", "/"), ("sent", 200)]
+    assert (b"x-hooked", b"1") in messages[0]["headers"]
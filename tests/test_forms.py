@@ -0,0 +1,162 @@
+import asyncio
+import inspect
+
+import pytest
+
+from ermine import Ermine, Request
+from ermine.forms import DATA, END, PART, MultipartParser, UploadFile, parse_options, parse_urlencoded
+from ermine.testclient import TestClient
+
+BOUNDARY = "----ermineboundary"
+
+
+def multipart(*parts: tuple[str, str | None, bytes]) -> bytes:
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        if filename:
+            body += b"Content-Type: application/octet-stream\r\n"
+        body += b"\r\n" + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+HEADERS = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+
+def test_parse_options():
+    assert parse_options('form-data; name="a;b"; filename="x \\"y\\".txt"') == \
+        ("form-data", {"name": "a;b", "filename": 'x "y".txt'})
+    assert parse_options("attachment; filename*=UTF-8''%C3%A4.txt")[1] == {"filename": "ä.txt"}
+    assert parse_options("multipart/form-data; boundary=abc") == ("multipart/form-data", {"boundary": "abc"})
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100_000])
+def test_parser_is_incremental(chunk_size):
+    body = multipart(("field", None, b"value"), ("file", "a.bin", b"\r\n--not-the-boundary\r\n" * 50))
+    parser = MultipartParser(BOUNDARY.encode())
+    events = []
+    for i in range(0, len(body), chunk_size):
+        events.extend(parser.feed(body[i:i + chunk_size]))
+    parser.close()
+    kinds = [event for event, _ in events]
+    assert kinds[0] == PART and kinds[-1] == END
+    contents, current = [], None
+    for event, value in events:
+        if event == PART:
+            current = bytearray()
+            contents.append(current)
+        elif event == DATA:
+            current += value
+    assert contents == [b"value", b"\r\n--not-the-boundary\r\n" * 50]
+
+
+def make_app(**options) -> Ermine:
+    app = Ermine()
+
+    @app.post("/upload")
+    async def upload(req: Request):
+        form = await req.form(**options)
+        result = {}
+        for name, value in form.items():
+            if isinstance(value, UploadFile):
+                result[name] = {"filename": value.filename, "size": value.size, "in_memory": value.in_memory,
+                                "head": (await value.read(4)).decode()}
+            else:
+                result[name] = value
+        await form.close()
+        return result
+
+    @app.post("/stream")
+    async def stream(req: Request):
+        sizes = {}
+        async for part in req.parts():
+            if part.filename:
+                sizes[part.name] = sum([len(chunk) async for chunk in part])
+        return sizes
+
+    return app
+
+
+def chunked(body: bytes, size: int = 1000) -> list[bytes]:
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def test_form_fields_and_files():
+    client = TestClient(make_app(spool_size=1024))
+    body = multipart(("title", None, "grüße".encode()), ("small", "s.txt", b"abcdef"),
+                     ("large", "l.bin", b"wxyz" * 1000))
+
+    async def run():
+        return await client.post("/upload", body=chunked(body), headers=HEADERS)
+
+    response = asyncio.run(run())
+    assert response.json() == {
+        "title": "grüße",
+        "small": {"filename": "s.txt", "size": 6, "in_memory": True, "head": "abcd"},
+        "large": {"filename": "l.bin", "size": 4000, "in_memory": False, "head": "wxyz"},
+    }
+
+
+def test_form_limits():
+    client = TestClient(make_app(max_part_size=100, max_field_size=10))
+
+    async def run():
+        big_file = await client.post("/upload", body=multipart(("f", "f.bin", b"x" * 101)), headers=HEADERS)
+        big_field = await client.post("/upload", body=multipart(("f", None, b"x" * 11)), headers=HEADERS)
+        broken = await client.post("/upload", body=multipart(("f", None, b"x"))[:-10], headers=HEADERS)
+        unsupported = await client.post("/upload", body=b"x", headers={"content-type": "text/plain"})
+        return big_file.status, big_field.status, broken.status, unsupported.status
+
+    assert asyncio.run(run()) == (413, 413, 400, 415)
+
+
+def test_urlencoded_form():
+    client = TestClient(make_app())
+
+    async def run():
+        return await client.post("/upload", body="a=1&b=h%C3%A9&a=2&empty=",
+                                 headers={"content-type": "application/x-www-form-urlencoded"})
+
+    assert asyncio.run(run()).json() == {"a": "2", "b": "hé", "empty": ""}
+    assert parse_urlencoded(b"a=1&a=2", 10).getall("a") == ["1", "2"]
+
+
+def test_streaming_parts():
+    client = TestClient(make_app())
+    body = multipart(("skip", None, b"ignored"), ("one", "1.bin", b"a" * 5000), ("two", "2.bin", b"b" * 300))
+
+    async def run():
+        return await client.post("/stream", body=chunked(body, 512), headers=HEADERS)
+
+    assert asyncio.run(run()).json() == {"one": 5000, "two": 300}
+
+
+def test_uploaded_files_are_closed_after_the_response():
+    app = Ermine()
+    uploads = []
+
+    @app.post("/keep")
+    async def keep(req: Request):
+        form = await req.form(spool_size=10)
+        uploads.extend(form.values())
+        return {"in_memory": [upload.in_memory for upload in uploads]}
+
+    body = multipart(("small", "s.txt", b"abc"), ("large", "l.bin", b"x" * 100))
+    response = asyncio.run(TestClient(app).post("/keep", body=body, headers=HEADERS))
+    assert response.json() == {"in_memory": [True, False]}
+    assert [upload.file.closed for upload in uploads] == [True, True]
+
+
+def test_forms_have_a_size_limit_by_default():
+    client = TestClient(make_app(max_size=1000))
+
+    async def run():
+        multipart_form = await client.post("/upload", body=chunked(multipart(("f", "f.bin", b"x" * 2000)), 100),
+                                           headers=HEADERS)
+        urlencoded = await client.post("/upload", body="a=" + "x" * 2000,
+                                       headers={"content-type": "application/x-www-form-urlencoded"})
+        return multipart_form.status, urlencoded.status
+
+    assert asyncio.run(run()) == (413, 413)
+    assert inspect.signature(Request.form).parameters["max_size"].default == 16 * 1024 * 1024
@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_coldstart import COLD_START, import_time_ms
+
+# generous defaults so slow CI machines pass, lower them locally to catch regressions early
+IMPORT_BUDGET_MS: float = float(os.environ.get("ERMINE_IMPORT_BUDGET_MS", 500))
+FIRST_REQUEST_BUDGET_MS: float = float(os.environ.get("ERMINE_FIRST_REQUEST_BUDGET_MS", 250))
+
+# optional subsystems an app not using them must not pay for at startup
+LAZY: tuple[str, ...] = (
+    "http.cookies", "tempfile", "mimetypes", "email.utils", "ermine.forms", "ermine.logs", "ermine.admission",
+    "ermine.caching", "ermine.plugs.static", "ermine.templating", "ermine.testclient", "ermine.serve",
+)
+
+
+def run(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *options, "-c", code], capture_output=True, text=True, check=True)
+
+
+def test_import_time_within_budget():
+    result = run("from ermine import Ermine; Ermine()", "-X", "importtime")
+    assert import_time_ms(result.stderr) < IMPORT_BUDGET_MS
+
+
+def test_first_request_within_budget_and_optional_subsystems_stay_unimported():
+    report: dict = json.loads(run(COLD_START).stdout)
+    assert report["status"] == 200
+    assert report["first_request_ms"] < FIRST_REQUEST_BUDGET_MS
+    assert [name for name in LAZY if name in report["modules"]] == []
+
+
+def test_package_attributes_are_imported_on_access():
+    code = ("import sys, ermine; assert 'ermine.app' not in sys.modules; "
+            "assert ermine.Ermine.__module__ == 'ermine.app'; assert ermine.metrics.Metrics; "
+            "assert 'Ermine' in dir(ermine)")
+    run(code)
+
+
+def test_json_library_is_imported_on_first_use():
+    code = ("import sys, ermine.serialization, ermine.logs, ermine.response; assert 'orjson' not in sys.modules; "
+            "assert ermine.serialization.current_codec().encode({'a': 1}) == b'{\"a\":1}'")
+    run(code)
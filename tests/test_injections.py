@@ -0,0 +1,90 @@
+import asyncio
+
+from ermine import Ermine, Request
+from ermine.injections import Depends, Inject
+from ermine.plugs.responder import CallPlan, Responder
+
+
+def make_request(query: bytes = b"") -> Request:
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": query}
+    return Request(scope, None, None)
+
+
+def test_dependencies_run_once_and_concurrently():
+    calls = []
+    running = set()
+    overlapped = []
+
+    async def settings():
+        calls.append("settings")
+        return {"dsn": "db://"}
+
+    async def db(conf=Depends(settings)):
+        running.add("db")
+        await asyncio.sleep(0.01)
+        overlapped.append(running == {"db", "user"})
+        running.discard("db")
+        return conf["dsn"]
+
+    async def user(token: str, conf=Depends(settings)):
+        running.add("user")
+        await asyncio.sleep(0.01)
+        running.discard("user")
+        return token
+
+    def handler(d=Depends(db), u=Depends(user), s=Depends(settings)):
+        return {"db": d, "user": u, "settings": s}
+
+    plan = CallPlan(handler, "/")
+    assert [len(level) for level in plan.dependencies.levels] == [1, 2]
+    response = asyncio.run(Responder()(make_request(b"token=abc"), plan, ()))
+    assert response.body == b'{"db":"db://","user":"abc","settings":{"dsn":"db://"}}'
+    assert calls == ["settings"]
+    assert overlapped == [True]
+
+
+def test_route_dependencies_and_singletons():
+    created = []
+    closed = []
+
+    async def client_factory():
+        created.append(1)
+        yield "client"
+        closed.append(1)
+
+    client = Inject(client_factory)
+    checks = []
+
+    app = Ermine()
+
+    @app.get("/", dependencies=[lambda: checks.append(1)])
+    def index(c=client):
+        return c
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        lifespan = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        ready = asyncio.Event()
+        done = asyncio.Event()
+
+        async def receive():
+            if not lifespan[0]["type"].endswith("startup"):
+                ready.set()
+                await done.wait()
+            return lifespan.pop(0)
+
+        task = asyncio.create_task(app({"type": "lifespan"}, receive, send))
+        await ready.wait()
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""}
+        await app(scope, None, send)
+        await app(scope, None, send)
+        done.set()
+        await task
+
+    asyncio.run(run())
+    assert [m["body"] for m in sent if "body" in m] == [b"client", b"client"]
+    assert created == [1] and closed == [1] and checks == [1, 1]
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import json
+import logging
+
+import pytest
+
+from ermine import Ermine
+from ermine.logs import AccessLog, FileSink, Sink, StreamSink
+from ermine.testclient import TestClient
+
+
+class ListSink(Sink):
+    def __init__(self):
+        self.records = []
+
+    def write(self, records):
+        self.records.extend(records)
+
+
+def test_access_records():
+    sink = ListSink()
+    app = Ermine(access_log=AccessLog(sinks=[sink]))
+
+    @app.get("/users/:user_id")
+    async def user(user_id: int):
+        return {"id": user_id}
+
+    client = TestClient(app)
+
+    async def run():
+        await client.get("/users/7")
+        await client.get("/nowhere")
+
+    asyncio.run(run())
+    app.access_log.close()
+    found, missing = sink.records
+    assert found["type"] == "access"
+    assert found["method"] == "GET"
+    assert found["path"] == "/users/7"
+    assert found["route"] == "/users/:user_id"
+    assert found["status"] == 200
+    assert found["bytes"] == len(b'{"id":7}')
+    assert found["client"] == "127.0.0.1"
+    assert found["duration_ms"] >= 0
+    assert missing["status"] == 404
+    assert missing["route"] is None
+
+
+def test_error_records_off_the_loop():
+    stream = io.StringIO()
+    app = Ermine(access_log=AccessLog(sinks=[StreamSink(stream)], log_access=False))
+
+    @app.get("/boom")
+    async def boom():
+        raise ValueError("broken")
+
+    response = asyncio.run(TestClient(app).get("/boom"))
+    assert response.status == 500
+    app.access_log.close()
+    output = stream.getvalue()
+    assert 'ERROR ValueError: broken during "GET /boom"' in output
+    assert "Traceback" in output
+
+
+def test_dropped_when_full():
+    log = AccessLog(sinks=[ListSink()], max_queue=2, flush_interval=60)
+    # keep the writer from running so the queue fills up
+    log._thread = object()
+    for _ in range(5):
+        log.push(("log", None, None))
+    assert log.dropped == 3
+    assert len(log._queue) == 2
+
+
+def test_json_lines_file_and_handler(tmp_path):
+    path = tmp_path / "app.jsonl"
+    log = AccessLog(sinks=[FileSink(str(path))])
+    logger = logging.getLogger("ermine.test")
+    logger.addHandler(log.handler())
+    logger.setLevel(logging.INFO)
+    try:
+        logger.info("hello %s", "world")
+    finally:
+        logger.handlers.clear()
+    log.close()
+    record = json.loads(path.read_text().strip())
+    assert record["type"] == "log"
+    assert record["message"] == "hello world"
+    assert record["level"] == "INFO"
+
+
+def test_sinks_must_implement_write():
+    class Closing(Sink):
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Closing()
@@ -0,0 +1,58 @@
+import asyncio
+
+from ermine import Ermine
+from ermine.exceptions import HTTPException
+from ermine.metrics import Histogram, Metrics
+from ermine.testclient import TestClient
+
+
+def test_histogram_buckets():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.cumulative() == [2, 3, 4]
+    assert histogram.count == 4
+
+
+def test_metrics_endpoint():
+    metrics = Metrics(buckets=(0.5, 1.0), phases=True)
+    app = Ermine(metrics=metrics)
+
+    @app.get("/users/:user_id")
+    async def user(user_id: int):
+        return {"id": user_id}
+
+    @app.get("/teapot")
+    async def teapot():
+        raise HTTPException(418, "teapot")
+
+    client = TestClient(app)
+
+    async def run():
+        await client.get("/users/1")
+        await client.get("/users/2")
+        await client.get("/teapot")
+        await client.get("/nowhere")
+        return await client.get("/metrics")
+
+    response = asyncio.run(run())
+    assert response.status == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'ermine_requests_total{method="GET",route="/users/:user_id",status="200"} 2' in text
+    assert 'ermine_requests_total{method="GET",route="/teapot",status="418"} 1' in text
+    assert 'ermine_requests_total{method="GET",route="unmatched",status="404"} 1' in text
+    assert 'ermine_request_duration_seconds_bucket{method="GET",route="/users/:user_id",le="+Inf"} 2' in text
+    assert 'ermine_request_duration_seconds_count{method="GET",route="/users/:user_id"} 2' in text
+    for phase in ("resolve", "arguments", "handler", "render", "send"):
+        assert f'route="/users/:user_id",phase="{phase}",le="+Inf"}} 2' in text
+    assert "# TYPE ermine_thread_pool_waiting gauge\nermine_thread_pool_waiting 0" in text
+    assert "ermine_thread_pool_running 0" in text
+
+
+def test_metrics_disabled():
+    app = Ermine()
+    app.freeze()
+    assert app.metrics is None
+    assert app._stack == app._dispatch
@@ -0,0 +1,81 @@
+import asyncio
+
+from ermine import Ermine
+from ermine.middleware import CORSMiddleware, Middleware, RequestIDMiddleware
+
+
+def call(app: Ermine, method: str = "GET", path: str = "/", headers: dict | None = None) -> list:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"",
+             "headers": [(k.encode(), v.encode()) for k, v in (headers or {}).items()]}
+    asyncio.run(app(scope, None, send))
+    return sent
+
+
+def make_app() -> Ermine:
+    app = Ermine()
+
+    @app.get("/")
+    def index():
+        return "ok"
+
+    return app
+
+
+def test_stack_order_and_shared_request():
+    order = []
+
+    class Tracing(Middleware):
+        def __init__(self, app, name):
+            super().__init__(app)
+            self.name = name
+
+        async def __call__(self, scope, receive, send):
+            order.append((self.name, id(self.request(scope))))
+            await self.app(scope, receive, send)
+
+    app = make_app()
+    app.add_middleware(Tracing, name="outer")
+    app.add_middleware(Tracing, name="inner")
+    assert call(app)[1]["body"] == b"ok"
+    assert [name for name, _ in order] == ["outer", "inner"]
+    assert order[0][1] == order[1][1]
+
+
+def test_short_circuit_skips_routing():
+    class Deny(Middleware):
+        async def __call__(self, scope, receive, send):
+            await send({"type": "http.response.start", "status": 403, "headers": []})
+            await send({"type": "http.response.body", "body": b"no"})
+
+    app = make_app()
+    app.add_middleware(Deny)
+    assert call(app)[0]["status"] == 403
+
+
+def test_cors():
+    app = make_app()
+    app.add_middleware(CORSMiddleware, allow_origins=["https://a.example"], allow_headers=["x-token"])
+    preflight = call(app, "OPTIONS", headers={"origin": "https://a.example", "access-control-request-method": "GET",
+                                               "access-control-request-headers": "X-Token"})
+    headers = dict(preflight[0]["headers"])
+    assert preflight[0]["status"] == 200
+    assert headers[b"access-control-allow-origin"] == b"https://a.example"
+    assert call(app, "OPTIONS", headers={"origin": "https://evil.example",
+                                         "access-control-request-method": "GET"})[0]["status"] == 400
+
+    simple = dict(call(app, headers={"origin": "https://a.example"})[0]["headers"])
+    assert simple[b"access-control-allow-origin"] == b"https://a.example"
+    assert b"access-control-allow-origin" not in dict(call(app)[0]["headers"])
+
+
+def test_request_id():
+    app = make_app()
+    app.add_middleware(RequestIDMiddleware)
+    generated = dict(call(app)[0]["headers"])[b"x-request-id"]
+    assert len(generated) == 32
+    assert dict(call(app, headers={"x-request-id": "abc"})[0]["headers"])[b"x-request-id"] == b"abc"
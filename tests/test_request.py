@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from ermine.exceptions import HTTPException
+from ermine.request import Request, WebSocket
+
+
+def make_request(headers: list, query: bytes = b"") -> Request:
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": query}
+    return Request(scope, None, None)
+
+
+def test_single_header_lookup_does_not_build_multidict():
+    req = make_request([(b"host", b"example.com"), (b"x-token", b"abc")])
+    assert req.header("X-Token") == "abc"
+    assert req.header("missing", "default") == "default"
+    assert req._req_headers is None
+    assert req.headers["x-token"] == "abc"
+
+
+def test_query_is_parsed_once():
+    req = make_request([], b"a=1&b=2")
+    assert req.query is req.query
+    assert req.query["a"] == "1"
+
+
+def test_cookies():
+    req = make_request([(b"cookie", b"session=abc; theme=dark")])
+    assert req.cookies == {"session": "abc", "theme": "dark"}
+    assert make_request([]).cookies == {}
+
+
+def test_requests_have_no_instance_dict():
+    with pytest.raises(AttributeError):
+        make_request([]).anything = 1
+    ws = WebSocket({"type": "websocket", "path": "/", "headers": []}, None, None)
+    assert ws.method == "ws"
+
+
+def body_request(chunks: list, headers: list | None = None, max_body_size: int | None = None) -> Request:
+    messages = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1} for i, c in enumerate(chunks)]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {"type": "http", "method": "POST", "path": "/", "headers": headers or [], "query_string": b""}
+    return Request(scope, receive, None, max_body_size=max_body_size)
+
+
+def test_body_accessors():
+    req = body_request([b'{"a":', b' 1}'])
+    assert asyncio.run(req.bytes()) == b'{"a": 1}'
+    assert asyncio.run(req.json()) == {"a": 1}
+    # non-json payloads are not parsed speculatively
+    assert asyncio.run(body_request([b"[1]"]).body()) == b"[1]"
+    assert asyncio.run(body_request([b"[1]"], [(b"content-type", b"application/json")]).body()) == [1]
+
+
+def test_stream_yields_chunks():
+    async def collect(req):
+        return [chunk async for chunk in req.stream()]
+
+    assert asyncio.run(collect(body_request([b"a", b"", b"b"]))) == [b"a", b"b"]
+
+
+def test_max_body_size():
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(body_request([b"x" * 10], [(b"content-length", b"10")], max_body_size=5).bytes())
+    assert e.value.status == 413
+    with pytest.raises(HTTPException):
+        asyncio.run(body_request([b"x" * 4, b"x" * 4], max_body_size=5).bytes())
+    assert asyncio.run(body_request([b"x" * 5], max_body_size=5).bytes()) == b"xxxxx"
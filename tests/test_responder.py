@@ -0,0 +1,80 @@
+import asyncio
+import typing
+
+import pytest
+
+from ermine.exceptions import HTTPException
+from ermine.plugs.responder import CallPlan, Responder, Source
+from ermine.request import Request
+
+
+def make_request(query: bytes = b"") -> Request:
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": query}
+    return Request(scope, None, None)
+
+
+async def handler(req: Request, item_id: int, limit: int = 10, flag: bool = False, name="x"):
+    return {"item_id": item_id, "limit": limit, "flag": flag, "name": name, "req": req}
+
+
+def test_plan_is_compiled_once():
+    plan = CallPlan(handler, "/items/:item_id")
+    assert plan.is_async
+    assert plan.path_params == ("item_id",)
+    assert [a.source for a in plan.arguments] == [Source.REQUEST, Source.PATH, Source.QUERY, Source.QUERY,
+                                                  Source.QUERY]
+
+
+def test_arguments_are_converted():
+    plan = CallPlan(handler, "/items/:item_id")
+    req = make_request(b"limit=5&flag=true")
+    args = Responder._parse_arguments(req, plan, (("item_id", "7"),))
+    assert args == {"req": req, "item_id": 7, "limit": 5, "flag": True, "name": "x"}
+
+
+def test_missing_required_query_is_bad_request():
+    def sync_handler(q: str):
+        return q
+
+    plan = CallPlan(sync_handler, "/")
+    assert not plan.is_async
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(Responder()(make_request(), plan, ()))
+    assert e.value.status == 400
+    response = asyncio.run(Responder()(make_request(b"q=hi"), plan, ()))
+    assert response.body == b"hi"
+
+
+def test_async_generator_handler_is_streamed():
+    async def export(n: int = 3):
+        for i in range(n):
+            yield f"{i}\n"
+
+    plan = CallPlan(export, "/export")
+    assert plan.is_stream
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        response = await Responder()(make_request(b"n=2"), plan, ())
+        await response({}, receive, send)
+
+    asyncio.run(run())
+    assert [m.get("body") for m in sent[1:]] == [b"0\n", b"1\n", b""]
+    assert [m.get("more_body") for m in sent[1:]] == [True, True, False]
+
+
+def test_optional_annotations_are_converted():
+    def paged(page: int | None = None, size: "typing.Optional[float]" = None, tag: int | str = "x"):
+        return page, size, tag
+
+    plan = CallPlan(paged, "/")
+    args = Responder._parse_arguments(make_request(b"page=3&size=1.5&tag=7"), plan, ())
+    # unions of several types are passed on as the raw string
+    assert args == {"page": 3, "size": 1.5, "tag": "7"}
+    assert Responder._parse_arguments(make_request(), plan, ()) == {"page": None, "size": None, "tag": "x"}
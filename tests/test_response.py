@@ -0,0 +1,107 @@
+import asyncio
+
+from ermine import Ermine, Request
+from ermine.response import StreamingResponse
+
+
+def test_streaming_stops_on_disconnect():
+    produced = []
+
+    async def endless():
+        i = 0
+        while True:
+            produced.append(i)
+            yield b"chunk"
+            i += 1
+            await asyncio.sleep(0)
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}, {"type": "http.disconnect"}]
+
+    async def receive():
+        await asyncio.sleep(0.01)
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    asyncio.run(asyncio.wait_for(StreamingResponse(endless())({}, receive, send), 1))
+    assert produced
+
+
+def test_sync_iterator_is_streamed():
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(StreamingResponse(iter(["a", b"b"]), media_type="text/csv")({}, receive, send))
+    assert b"".join(m.get("body", b"") for m in sent) == b"ab"
+    assert dict(sent[0]["headers"])[b"content-type"].startswith(b"text/csv")
+
+
+def run_app(app, messages: list, scope: dict | None = None) -> list:
+    """calls the app with the given request messages, then waits as a client that stays connected"""
+    sent = []
+
+    async def receive():
+        if messages:
+            await asyncio.sleep(0.01)
+            return messages.pop(0)
+        await asyncio.sleep(10)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = scope or {"type": "http", "method": "POST", "path": "/", "query_string": b"", "headers": []}
+    asyncio.run(asyncio.wait_for(app(scope, receive, send), 5))
+    return sent
+
+
+def test_streamed_request_body_reaches_a_streaming_handler():
+    app = Ermine()
+
+    @app.post("/")
+    async def echo(req: Request):
+        async for chunk in req.stream():
+            yield chunk
+
+    sent = run_app(app, [{"type": "http.request", "body": b"A" * 5, "more_body": True},
+                         {"type": "http.request", "body": b"B" * 5, "more_body": True},
+                         {"type": "http.request", "body": b"C" * 5, "more_body": False}])
+    assert b"".join(m.get("body", b"") for m in sent) == b"AAAAABBBBBCCCCC"
+    assert sent[-1]["more_body"] is False
+
+
+def test_error_after_the_response_started_sends_no_second_start():
+    app = Ermine()
+
+    @app.post("/")
+    async def failing():
+        yield "first"
+        raise RuntimeError("boom")
+
+    sent = run_app(app, [{"type": "http.request", "body": b"", "more_body": False}])
+    assert [m["type"] for m in sent] == ["http.response.start", "http.response.body"]
+    assert sent[0]["status"] == 200
+
+
+def test_disconnect_is_seen_when_the_handler_ignores_its_body():
+    app = Ermine()
+    produced = []
+
+    @app.post("/")
+    async def endless():
+        while True:
+            produced.append(1)
+            yield "chunk"
+            await asyncio.sleep(0.001)
+
+    for size in (10, 64 * 1024):
+        produced.clear()
+        run_app(app, [{"type": "http.request", "body": b"x" * size, "more_body": True},
+                      {"type": "http.request", "body": b"x" * size, "more_body": False},
+                      {"type": "http.disconnect"}])
+        assert produced
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from ermine import Ermine
+from ermine.groups import Group
+from ermine.plugs.responder import CallPlan
+from ermine.routing import Router
+
+
+def handler():
+    return "ok"
+
+
+def test_static_routes_skip_the_tree():
+    router = Router()
+    plan = CallPlan(handler, "/health")
+    router.add("get", "/health", plan)
+    router.freeze()
+    assert router.resolve("get", "/health") == (plan, ())
+    assert router.resolve("post", "/health") == (None, ())
+    assert router.cache_info().static_hits == 1
+
+
+def test_parameterised_routes_are_cached_immutably():
+    router = Router(cache_size=2)
+    plan = CallPlan(handler, "/users/:id")
+    router.add("get", "/users/:id", plan)
+    router.freeze()
+    assert router.resolve("get", "/users/1") == (plan, (("id", "1"),))
+    assert router.resolve("get", "/users/1") == (plan, (("id", "1"),))
+    router.resolve("get", "/users/2")
+    router.resolve("get", "/users/3")
+    info = router.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 3, 2)
+    # unknown paths are not cached
+    router.resolve("get", "/nope")
+    assert router.cache_info().currsize == 2
+
+
+def test_app_resolves_through_router():
+    app = Ermine()
+
+    @app.get("/items/:item_id")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def call(path):
+        scope = {"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""}
+        await app(scope, None, send)
+
+    for path in ("/items/1", "/items/1", "/missing"):
+        asyncio.run(call(path))
+    assert [m["body"] for m in sent if "body" in m] == [b'{"id":1}', b'{"id":1}', b"Not found"]
+    assert app.route_cache_info().hits == 1
+
+
+def get(app: Ermine, path: str) -> list:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""}
+    asyncio.run(app(scope, None, send))
+    return sent
+
+
+def test_groups_are_flattened_on_freeze():
+    app = Ermine()
+    api = Group("/api")
+    users = Group()
+    api.mount(users, "/users")
+    app.include(api)
+
+    # routes added to a mounted group before freezing are still picked up
+    @users.get("/:user_id")
+    def user(user_id: int):
+        return {"user": user_id}
+
+    app.freeze()
+    assert get(app, "/api/users/3")[1]["body"] == b'{"user":3}'
+    with pytest.raises(Exception):
+        app.get("/late")(handler)
+
+
+def test_conflicts_are_reported():
+    app = Ermine()
+    app.get("/a")(handler)
+    app.get("/a")(handler)
+    with pytest.raises(Exception, match="registered twice"):
+        app.freeze()
+
+    app = Ermine()
+    app.get("/users/:id")(handler)
+    app.get("/users/:name")(handler)
+    with pytest.raises(Exception, match="conflicts"):
+        app.freeze()
+
+
+def test_failed_freeze_can_be_retried():
+    app = Ermine()
+    api = Group("/api")
+    api.get("/users/:id")(handler)
+    app.include(api)
+    app.get("/api/users/:name")(handler)
+    for _ in range(2):
+        # the second attempt reports the same conflict, not the group's routes added twice
+        with pytest.raises(Exception, match="conflicts"):
+            app.freeze()
+    assert len(app._router.routes) == 1
+
+    app = Ermine()
+    app.include(api)
+    failures = []
+
+    def flaky(inner):
+        if not failures:
+            failures.append(True)
+            raise Exception("not ready")
+        return inner
+
+    app.add_middleware(flaky)
+    with pytest.raises(Exception, match="not ready"):
+        app.freeze()
+    app.freeze()
+    assert get(app, "/api/users/3")[0]["status"] == 200
+
+
+def test_lifespan_freezes_the_app():
+    app = Ermine()
+    app.get("/a")(handler)
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(app({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+    assert app._router.frozen
@@ -0,0 +1,73 @@
+import asyncio
+import dataclasses
+import datetime
+
+import pytest
+
+from ermine.plugs.responder import CallPlan, Responder
+from ermine.request import Request
+from ermine.response import JsonResponse
+from ermine.serialization import Codec, OrjsonCodec, get_codec, use_codec
+
+
+@dataclasses.dataclass
+class User:
+    name: str
+    joined: datetime.date
+
+
+def test_auto_prefers_installed_fast_encoder():
+    pytest.importorskip("orjson")
+    assert isinstance(get_codec(), OrjsonCodec)
+    assert get_codec("json").name == "json"
+    with pytest.raises(Exception):
+        get_codec("yaml")
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_codecs_encode_dataclasses_and_pydantic(name):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    codec = get_codec(name)
+    assert codec.encode(User("leo", datetime.date(2022, 1, 2))) == b'{"name":"leo","joined":"2022-01-02"}'
+    assert codec.decode(b'{"a":[1,2]}') == {"a": [1, 2]}
+
+    pydantic = pytest.importorskip("pydantic")
+
+    class Item(pydantic.BaseModel):
+        id: int
+
+    assert codec.encode(Item(id=1)) == b'{"id":1}'
+    assert codec.encode({"items": [Item(id=2)]}) == b'{"items":[{"id":2}]}'
+
+
+def test_app_codec_is_used_for_responses_and_bodies():
+    class Recording(Codec):
+        def encode(self, content):
+            return b"encoded"
+
+        def decode(self, data):
+            return "decoded"
+
+    async def run():
+        use_codec(Recording())
+        messages = [{"type": "http.request", "body": b"{}", "more_body": False}]
+
+        async def receive():
+            return messages.pop(0)
+
+        req = Request({"type": "http", "method": "POST", "path": "/", "headers": [], "query_string": b""},
+                      receive, None)
+        return JsonResponse({"a": 1}).body, await req.json()
+
+    assert asyncio.run(run()) == (b"encoded", "decoded")
+
+
+def test_dataclass_return_values_become_json():
+    def handler():
+        return User("leo", datetime.date(2022, 1, 2))
+
+    req = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""}, None, None)
+    response = asyncio.run(Responder()(req, CallPlan(handler), ()))
+    assert isinstance(response, JsonResponse)
+    assert response.body == b'{"name":"leo","joined":"2022-01-02"}'
@@ -0,0 +1,47 @@
+import sys
+
+import pytest
+
+from ermine import Ermine
+from ermine.serve import load_app
+
+
+def test_warm_freezes_and_runs_warmup_hooks():
+    app = Ermine()
+    calls = []
+
+    @app.on("warmup")
+    def sync_hook():
+        calls.append("sync")
+
+    @app.on("warmup")
+    async def async_hook():
+        calls.append("async")
+
+    @app.get("/")
+    async def index():
+        return "ok"
+
+    app.warm()
+    assert calls == ["sync", "async"]
+    with pytest.raises(Exception):
+        app.include(object())
+    # no thread may be running when the master forks
+    assert app.thread_pool._executor is None
+
+
+def test_load_app(tmp_path, monkeypatch):
+    (tmp_path / "serve_demo.py").write_text("from ermine import Ermine\napp = Ermine(title='demo')\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    assert load_app("serve_demo:app").title == "demo"
+    with pytest.raises(Exception):
+        load_app("serve_demo")
+
+
+def test_serve_needs_uvicorn(monkeypatch):
+    from ermine.serve import Master
+
+    monkeypatch.setitem(sys.modules, "uvicorn", None)
+    with pytest.raises(Exception, match=r"pip install ermine\[serve\]"):
+        Master(Ermine()).run()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+
+from ermine.request import Request
+from ermine.response import FileResponse
+from ermine.static import StaticFiles
+
+
+def serve(static: StaticFiles, filename: str, headers: dict | None = None, extensions: dict | None = None):
+    scope = {"type": "http", "method": "GET", "path": "/" + filename, "query_string": b"",
+             "headers": [(k.encode(), v.encode()) for k, v in (headers or {}).items()],
+             "extensions": extensions or {}}
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        response = await static(Request(scope, None, None), filename)
+        await response(scope, None, send)
+        return response
+
+    response = asyncio.run(run())
+    return response, dict(sent[0]["headers"]), b"".join(m.get("body", b"") for m in sent[1:]), sent
+
+
+def test_small_files_are_cached_and_invalidated(tmp_path):
+    (tmp_path / "app.css").write_bytes(b"body{}")
+    static = StaticFiles(str(tmp_path))
+    response, headers, body, _ = serve(static, "app.css")
+    assert response.status == 200 and body == b"body{}"
+    assert headers[b"content-type"].startswith(b"text/css")
+    assert str(tmp_path / "app.css") in static._cache
+
+    (tmp_path / "app.css").write_bytes(b"html{}!")
+    assert serve(static, "app.css")[2] == b"html{}!"
+
+
+def test_conditional_requests(tmp_path):
+    (tmp_path / "a.txt").write_bytes(b"hello")
+    static = StaticFiles(str(tmp_path))
+    _, headers, _, _ = serve(static, "a.txt")
+    assert serve(static, "a.txt", {"if-none-match": headers[b"etag"].decode()})[0].status == 304
+    assert serve(static, "a.txt", {"if-modified-since": headers[b"last-modified"].decode()})[0].status == 304
+    assert serve(static, "a.txt", {"if-none-match": '"other"'})[0].status == 200
+
+
+def test_range_requests(tmp_path):
+    (tmp_path / "data.bin").write_bytes(bytes(range(100)))
+    static = StaticFiles(str(tmp_path))
+    response, headers, body, _ = serve(static, "data.bin", {"range": "bytes=10-19"})
+    assert response.status == 206 and body == bytes(range(10, 20))
+    assert headers[b"content-range"] == b"bytes 10-19/100"
+    assert serve(static, "data.bin", {"range": "bytes=-5"})[2] == bytes(range(95, 100))
+    assert serve(static, "data.bin", {"range": "bytes=200-"})[0].status == 416
+
+
+def test_large_files_are_streamed(tmp_path):
+    (tmp_path / "big.bin").write_bytes(os.urandom(200_000))
+    static = StaticFiles(str(tmp_path), cache_file_limit=1024)
+    response, _, body, sent = serve(static, "big.bin")
+    assert isinstance(response, FileResponse)
+    assert body == (tmp_path / "big.bin").read_bytes()
+    assert len(sent) > 2
+
+    _, _, _, sent = serve(static, "big.bin", extensions={"http.response.pathsend": {}})
+    assert sent[1] == {"type": "http.response.pathsend", "path": str(tmp_path / "big.bin")}
+
+
+def test_precompressed_and_traversal(tmp_path):
+    (tmp_path / "app.js").write_bytes(b"plain")
+    (tmp_path / "app.js.gz").write_bytes(b"gzipped")
+    static = StaticFiles(str(tmp_path), precompressed=True)
+    _, headers, body, _ = serve(static, "app.js", {"accept-encoding": "gzip, deflate"})
+    assert body == b"gzipped" and headers[b"content-encoding"] == b"gzip"
+    assert serve(static, "app.js")[2] == b"plain"
+    assert serve(static, "../etc/passwd")[0].status == 404
+
+
+def test_precompressed_variants_have_their_own_etag(tmp_path):
+    (tmp_path / "app.js").write_bytes(b"plain")
+    (tmp_path / "app.js.gz").write_bytes(b"gzipped")
+    static = StaticFiles(str(tmp_path), precompressed=True)
+    identity = serve(static, "app.js")[1][b"etag"]
+    gzipped = serve(static, "app.js", {"accept-encoding": "gzip"})[1][b"etag"]
+    assert identity != gzipped
+    assert serve(static, "app.js", {"accept-encoding": "gzip", "if-none-match": gzipped.decode()})[0].status == 304
+    assert serve(static, "app.js", {"if-none-match": gzipped.decode()})[0].status == 200
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+import types
+
+import pytest
+
+
+class StubFuchs:
+    """stands in for fuchs.FuchsTemplate, which renders a template by name and parses it every time"""
+
+    parsed: int = 0
+
+    def __init__(self, dirname: str) -> None:
+        self.stub_dirname = dirname
+
+    def render(self, template_name: str, **kwargs) -> str:
+        StubFuchs.parsed += 1
+        with open(os.path.join(self.stub_dirname, template_name)) as f:
+            return f.read().format(**kwargs)
+
+
+@pytest.fixture
+def templating(monkeypatch):
+    monkeypatch.setitem(sys.modules, "fuchs", types.SimpleNamespace(FuchsTemplate=StubFuchs))
+    monkeypatch.delitem(sys.modules, "ermine.templating", raising=False)
+    import ermine.templating
+    yield ermine.templating
+    sys.modules.pop("ermine.templating", None)
+    vars(sys.modules["ermine"]).pop("templating", None)
+
+
+def test_without_compiler_fuchs_renders(templating, tmp_path):
+    (tmp_path / "home.html").write_text("<p>{name}</p>")
+    templates = templating.FoxTemplates(str(tmp_path))
+    StubFuchs.parsed = 0
+    assert templates.render("home.html", name="Leo").body == b"<p>Leo</p>"
+    assert templates.precompile() == 0
+    assert StubFuchs.parsed == 1
+
+
+def test_compiled_templates_are_cached_until_their_file_changes(templating, tmp_path):
+    compiled = []
+
+    def compiler(source):
+        compiled.append(source)
+        return lambda **kwargs: source.format(**kwargs)
+
+    path = tmp_path / "home.html"
+    path.write_text("<p>{name}</p>")
+    (tmp_path / "about.html").write_text("about")
+    templates = templating.FoxTemplates(str(tmp_path), compiler=compiler, check_interval=0)
+    assert templates.precompile() == 2
+    assert templates.render("home.html", name="Leo").body == b"<p>Leo</p>"
+    assert templates.render("home.html", name="Ada").body == b"<p>Ada</p>"
+    assert len(compiled) == 2
+
+    path.write_text("<b>{name}</b>")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert templates.render("home.html", name="Leo").body == b"<b>Leo</b>"
+    assert len(compiled) == 3
+    templates.freeze()
+    path.write_text("changed")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 2_000_000))
+    assert templates.render("home.html", name="Leo").body == b"<b>Leo</b>"
+
+
+def test_parts_are_sent_as_they_are_rendered(templating, tmp_path):
+    events = []
+
+    def compiler(source):
+        def render(**kwargs):
+            for line in source.splitlines(keepends=True):
+                events.append("rendered")
+                yield line
+
+        return render
+
+    (tmp_path / "report.html").write_text("<tr>1</tr>\n<tr>2</tr>\n<tr>3</tr>\n")
+    response = templating.FoxTemplates(str(tmp_path), compiler=compiler).stream("report.html")
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    async def send(message):
+        if message.get("body"):
+            events.append("sent")
+
+    asyncio.run(response({}, receive, send))
+    assert events == ["rendered", "sent"] * 3
+
+
+def test_template_files_are_looked_at_once_per_interval(templating, tmp_path, monkeypatch):
+    path = tmp_path / "home.html"
+    path.write_text("{name}")
+    templates = templating.FoxTemplates(str(tmp_path), compiler=lambda source: source.format)
+    assert templates.render("home.html", name="Leo").body == b"Leo"
+    stats = []
+    monkeypatch.setattr(templating.os, "stat", lambda *args: stats.append(args) or os.stat_result((0,) * 10))
+    for _ in range(100):
+        templates.render("home.html", name="Leo")
+    assert stats == []
@@ -0,0 +1,75 @@
+import asyncio
+
+from ermine import Ermine, Request
+from ermine.request import WebSocket
+from ermine.response import StreamingResponse
+from ermine.testclient import TestClient
+
+
+def make_app() -> tuple[Ermine, list]:
+    app = Ermine()
+    events = []
+
+    @app.on("startup")
+    async def startup():
+        events.append("startup")
+
+    @app.get("/items/:item_id")
+    async def item(req: Request, item_id: int, q: str = ""):
+        return {"id": item_id, "q": q, "agent": req.header("user-agent")}
+
+    @app.post("/echo")
+    async def echo(req: Request):
+        return await req.json()
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield "a"
+            yield "b"
+        return StreamingResponse(chunks())
+
+    @app.websocket("/ws")
+    async def ws(socket: WebSocket):
+        await socket.accept()
+        while (message := await socket._receive())["type"] != "websocket.disconnect":
+            if message["type"] == "websocket.receive":
+                await socket.send_txt(message["text"].upper())
+
+    return app, events
+
+
+def test_http_requests():
+    app, events = make_app()
+    client = TestClient(app, headers={"user-agent": "tests"})
+
+    async def run():
+        async with client:
+            assert events == ["startup"]
+            response = await client.get("/items/3", query={"q": "x"})
+            assert response.status == 200
+            assert response.headers["Content-Type"].startswith("application/json")
+            assert response.json() == {"id": 3, "q": "x", "agent": "tests"}
+
+            response = await client.post("/echo", json={"a": [1, 2]})
+            assert response.json() == {"a": [1, 2]}
+
+            response = await client.post("/echo", body=[b'{"a":', b' 1}'], headers={"content-type": "application/json"})
+            assert response.json() == {"a": 1}
+
+            response = await client.get("/stream")
+            assert response.text == "ab"
+            assert (await client.get("/missing")).status == 404
+
+    asyncio.run(run())
+
+
+def test_websocket_session():
+    client = TestClient(make_app()[0])
+
+    async def run():
+        async with client.websocket("/ws") as ws:
+            await ws.send_text("hello")
+            assert await ws.receive_text() == "HELLO"
+
+    asyncio.run(run())
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from ermine import Ermine
+from ermine.exceptions import WebSocketDisconnect
+from ermine.request import WebSocket
+from ermine.testclient import TestClient
+
+
+def make_socket(*messages: dict) -> tuple[WebSocket, list]:
+    queue = [{"type": "websocket.connect"}, *messages]
+    sent = []
+
+    async def receive():
+        if queue:
+            return queue.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    return WebSocket({"type": "websocket", "path": "/", "headers": []}, receive, send), sent
+
+
+def test_receive_frames():
+    ws, sent = make_socket({"type": "websocket.receive", "text": "hi"},
+                           {"type": "websocket.receive", "bytes": b"\x00\x01"},
+                           {"type": "websocket.receive", "bytes": b'{"a": 1}'},
+                           {"type": "websocket.disconnect", "code": 1001})
+
+    async def run():
+        await ws.accept(subprotocol="telemetry")
+        assert sent == [{"type": "websocket.accept", "subprotocol": "telemetry"}]
+        assert await ws.receive_text() == "hi"
+        assert await ws.receive_bytes() == b"\x00\x01"
+        assert await ws.receive_json() == {"a": 1}
+        with pytest.raises(WebSocketDisconnect) as info:
+            await ws.receive_text()
+        assert info.value.code == 1001
+        # stays disconnected
+        assert await ws._receive_raw() is None
+
+    asyncio.run(run())
+
+
+def test_async_iteration_ends_on_disconnect():
+    ws, _ = make_socket({"type": "websocket.receive", "text": "a"},
+                        {"type": "websocket.receive", "bytes": b"b"},
+                        {"type": "websocket.disconnect", "code": 1000})
+
+    async def run():
+        await ws.accept()
+        return [message async for message in ws]
+
+    assert asyncio.run(run()) == ["a", b"b"]
+
+
+def test_receive_many():
+    ws, _ = make_socket(*({"type": "websocket.receive", "text": str(i)} for i in range(5)))
+
+    async def run():
+        await ws.accept()
+        first = await ws.receive_many(max_n=3)
+        rest = await ws.receive_many(max_n=10, timeout=0.01)
+        return first, rest
+
+    assert asyncio.run(run()) == (["0", "1", "2"], ["3", "4"])
+
+
+def test_receive_many_returns_before_disconnect():
+    ws, _ = make_socket({"type": "websocket.receive", "text": "a"}, {"type": "websocket.disconnect", "code": 1000})
+
+    async def run():
+        await ws.accept()
+        assert await ws.receive_many(timeout=1) == ["a"]
+        with pytest.raises(WebSocketDisconnect):
+            await ws.receive_many()
+
+    asyncio.run(run())
+
+
+def test_json_modes():
+    app = Ermine()
+
+    @app.websocket("/json")
+    async def echo(ws: WebSocket):
+        await ws.accept()
+        async for message in ws:
+            if isinstance(message, bytes):
+                await ws.send_json({"echo": message.decode(), "mode": "binary"}, mode="binary")
+            else:
+                await ws.send_json({"echo": message, "mode": "text"})
+
+    client = TestClient(app)
+
+    async def run():
+        async with client.websocket("/json") as ws:
+            await ws.send_text("x")
+            text = await ws.receive()
+            await ws.send_bytes(b"y")
+            binary = await ws.receive()
+        return text, binary
+
+    text, binary = asyncio.run(run())
+    assert text["text"] == '{"echo":"x","mode":"text"}'
+    assert binary["bytes"] == b'{"echo":"y","mode":"binary"}'
+
+
+def test_cancelled_receive_many_leaves_the_socket_alone():
+    async def run():
+        queue = asyncio.Queue()
+        for message in ({"type": "websocket.connect"}, {"type": "websocket.receive", "text": "a"}):
+            queue.put_nowait(message)
+
+        async def send(message):
+            pass
+
+        ws = WebSocket({"type": "websocket", "path": "/", "headers": []}, queue.get, send)
+        await ws.accept()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(ws.receive_many(timeout=10), 0.05)
+        queue.put_nowait({"type": "websocket.receive", "text": "b"})
+        return await asyncio.wait_for(ws.receive(), 1)
+
+    assert asyncio.run(run()) == "b"